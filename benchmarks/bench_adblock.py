@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Filter engine micro-benchmark against a large synthetic rule set.
+
+    python benchmarks/bench_adblock.py [--rules 80000] [--list easylist.txt]
+
+Reports parse time, cache load time and per-request matching cost.
+No Qt needed: this exercises filters.py only.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from filters import load_lists
+
+WORDS = ("ads", "banner", "track", "pixel", "beacon", "promo", "sponsor",
+         "analytics", "metrics", "collect", "widget", "static", "media", "img")
+TYPES = ("script", "image", "stylesheet", "xmlhttprequest", "subdocument", "other")
+
+
+def synthetic_list(n, rnd):
+    lines = ["[Adblock Plus 2.0]", "! synthetic list"]
+    for i in range(n):
+        kind = i % 10
+        if kind < 5:
+            lines.append("||ad%d.%s-network.com^" % (i, rnd.choice(WORDS)))
+        elif kind < 8:
+            lines.append("/%s%d/%s^" % (rnd.choice(WORDS), i, rnd.choice(WORDS)))
+        elif kind == 8:
+            lines.append("||cdn%d.example.net/%s/*$script,third-party" % (i, rnd.choice(WORDS)))
+        else:
+            lines.append("@@||ok%d.example.org/%s/" % (i, rnd.choice(WORDS)))
+        if i % 1000 == 0:
+            lines.append("example%d.com##.sponsored" % i)
+    return "\n".join(lines)
+
+
+def synthetic_requests(n, rnd):
+    for i in range(n):
+        host = rnd.choice(("ad%d.ads-network.com" % rnd.randint(0, 80000),
+                           "cdn%d.example.net" % rnd.randint(0, 80000),
+                           "static.news-site.com", "www.shop.example"))
+        path = "/".join(rnd.choice(WORDS) + str(rnd.randint(0, 80000)) for _ in range(3))
+        yield ("https://%s/%s?x=%d" % (host, path, i), host, "news-site.com", rnd.choice(TYPES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rules", type=int, default=80000)
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--list", action="append", help="use real filter lists instead")
+    args = parser.parse_args()
+    rnd = random.Random(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lists = args.list
+        if not lists:
+            lists = [os.path.join(tmp, "synthetic.txt")]
+            with open(lists[0], "w") as f:
+                f.write(synthetic_list(args.rules, rnd))
+        cache = os.path.join(tmp, "cache")
+        os.makedirs(cache)
+
+        t = time.perf_counter()
+        load_lists(lists, cache)
+        parse_s = time.perf_counter() - t
+        t = time.perf_counter()
+        engine = load_lists(lists, cache)
+        cached_s = time.perf_counter() - t
+
+    requests = list(synthetic_requests(args.requests, rnd))
+    # The first pass also compiles the regex of every rule it touches
+    timings = []
+    for _ in range(2):
+        t = time.perf_counter()
+        blocked = sum(engine.should_block(*r) for r in requests)
+        timings.append((time.perf_counter() - t) / len(requests) * 1e6)
+
+    print(json.dumps({
+        "rules": engine.stats(),
+        "parse_and_cache_s": round(parse_s, 3),
+        "cached_load_s": round(cached_s, 3),
+        "requests": len(requests),
+        "blocked": blocked,
+        "per_request_us_cold": round(timings[0], 2),
+        "per_request_us_warm": round(timings[1], 2),
+    }, indent=1))
+
+
+if __name__ == "__main__":
+    main()
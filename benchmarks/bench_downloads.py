@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Download manager against the local fixture server.
+
+    python benchmarks/bench_downloads.py [--files 8] [--size-mb 20] [--rate-kib 4096]
+
+Queues --files downloads split over two host names (127.0.0.1 and
+localhost), pauses and resumes the first one half way, and waits for all
+of them. Reports aggregate throughput, the highest number of transfers
+seen running overall and per host (must stay within the limits), how
+many 'changed' notifications reached the GUI thread, and whether every
+file arrived complete.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from harness import spin, wait_until, make_window  # sets up sys.path and Qt
+from PyQt5.QtCore import QUrl
+from PyQt5.QtWidgets import QApplication
+
+from fixtures import FixtureServer
+from downloads import QUEUED, ACTIVE, DONE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--size-mb", type=int, default=20)
+    parser.add_argument("--rate-kib", type=int, default=4096, help="per transfer, 0 = unlimited")
+    parser.add_argument("--max-downloads", type=int, default=3)
+    parser.add_argument("--per-host", type=int, default=2)
+    args = parser.parse_args()
+    size = args.size_mb * 2**20
+
+    with FixtureServer() as server, tempfile.TemporaryDirectory() as tmp:
+        window = make_window("test", home_url=server.url("page/5"), download_dir=tmp,
+                             max_downloads=args.max_downloads,
+                             max_downloads_per_host=args.per_host)
+        window.show()
+        manager = window.downloads
+        page = window.current_pane.ensure_webview().page()
+        spin(500)
+
+        peaks = {"active": 0, "per_host": 0, "changed": 0}
+
+        def observe():
+            active = manager.active()
+            peaks["changed"] += 1
+            peaks["active"] = max(peaks["active"], len(active))
+            if active:
+                peaks["per_host"] = max(peaks["per_host"],
+                                        max(Counter(d.host for d in active).values()))
+        manager.changed.connect(observe)
+
+        start = time.perf_counter()
+        port = server.httpd.server_address[1]
+        for i in range(args.files):
+            host = "127.0.0.1" if i % 2 == 0 else "localhost"
+            rate = "/%d" % args.rate_kib if args.rate_kib else ""
+            page.download(QUrl("http://%s:%d/blob/%d%s" % (host, port, size + i, rate)))
+
+        wait_until(lambda: len(manager.downloads) == args.files, timeout=30)
+        first = manager.downloads[0]
+        wait_until(lambda: first.received >= size // 2 or first.state == DONE, timeout=300)
+        resumed = False
+        if first.state == ACTIVE:
+            manager.pause(first)
+            spin(1000)
+            paused_at = first.item.receivedBytes()
+            manager.resume(first)
+            resumed = paused_at > 0 and first.state in (QUEUED, ACTIVE)
+
+        wait_until(lambda: all(d.state not in (QUEUED, ACTIVE) for d in manager.downloads),
+                   timeout=600)
+        elapsed = time.perf_counter() - start
+        complete = all(d.state == DONE and os.path.getsize(d.item.path()) == d.total
+                       for d in manager.downloads)
+        total = sum(d.total for d in manager.downloads)
+        results = {
+            "files": args.files,
+            "bytes": total,
+            "seconds": round(elapsed, 2),
+            "throughput_mib_s": round(total / elapsed / 2**20, 2),
+            "peak_active": peaks["active"],
+            "peak_active_per_host": peaks["per_host"],
+            "limits": {"max_downloads": args.max_downloads, "per_host": args.per_host},
+            "changed_signals": peaks["changed"],
+            "changed_per_s": round(peaks["changed"] / elapsed, 1),
+            "paused_and_resumed": resumed,
+            "all_complete": complete,
+            "states": Counter(d.state for d in manager.downloads),
+        }
+        window.close()
+    QApplication.instance().quit()
+    print(json.dumps(results, indent=1))
+    return 0 if complete and peaks["active"] <= args.max_downloads \
+        and peaks["per_host"] <= args.per_host else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
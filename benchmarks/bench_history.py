@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""URL bar completion latency against a large synthetic history.
+
+    python benchmarks/bench_history.py [--entries 300000]
+
+Builds a HistoryIndex in memory (no Qt event loop needed), then times
+complete() for every keystroke of a set of typed queries.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from history import HistoryIndex
+
+WORDS = ("status", "grafana", "kibana", "ticket", "deploy", "metrics", "alerts",
+         "build", "wiki", "search", "docs", "report", "team", "queue", "graph")
+QUERIES = ("grafana.example", "docs.host12", "https://www.wiki", "ticket deploy",
+           "status alerts", "host3", "zzz-no-match")
+
+
+def synthetic_rows(n, seed=1):
+    rnd = random.Random(seed)
+    now = time.time()
+    for i in range(n):
+        host = "%s.host%d.example.com" % (rnd.choice(WORDS), i % 997)
+        path = "/".join(rnd.choice(WORDS) for _ in range(rnd.randint(1, 4)))
+        title = " ".join(rnd.choice(WORDS) for _ in range(4)) + " #%d" % i
+        yield ("https://%s/%s?id=%d" % (host, path, i), title,
+               rnd.randint(1, 50), now - rnd.uniform(0, 90 * 86400))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=300000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = HistoryIndex.build(synthetic_rows(args.entries))
+    build_s = time.perf_counter() - start
+
+    samples = []
+    for query in QUERIES:
+        for n in range(1, len(query) + 1):
+            t = time.perf_counter()
+            index.complete(query[:n])
+            samples.append((time.perf_counter() - t) * 1000)
+
+    t = time.perf_counter()
+    for row in synthetic_rows(1000, seed=2):
+        index.add(row[0] + "&new", row[1])
+    add_ms = (time.perf_counter() - t) * 1000 / 1000
+
+    samples.sort()
+    print(json.dumps({
+        "entries": len(index),
+        "build_s": round(build_s, 2),
+        "keystrokes": len(samples),
+        "complete_ms_mean": round(sum(samples) / len(samples), 4),
+        "complete_ms_p95": round(samples[int(len(samples) * 0.95)], 4),
+        "complete_ms_max": round(samples[-1], 4),
+        "add_ms_mean": round(add_ms, 4),
+    }, indent=1))
+
+
+if __name__ == "__main__":
+    main()
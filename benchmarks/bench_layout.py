@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Grid layout cost as the pane count grows.
+
+    python benchmarks/bench_layout.py [--grids 2x2,3x3,4x4,5x5,6x6] [--rounds 5]
+
+For each grid size: time of grid_current() from a single pane, of a
+window resize, of entering/leaving pane full screen and of a 2D focus
+move, each including the layout pass it triggers. Panes open about:blank
+so the numbers are layout cost rather than page loads; 'per_pane_us'
+shows whether the cost stays flat.
+"""
+import argparse
+import json
+
+from harness import timed, summarize, spin, make_window  # sets up sys.path and Qt
+from PyQt5.QtWidgets import QApplication
+
+from config import PRESETS
+
+
+def bench_grid(window, rows, cols, rounds):
+    count = rows * cols
+    build, resize, full, move = [], [], [], []
+    for _ in range(rounds):
+        window.split_current(None, 1)
+        spin(50)
+        build.append(timed(window.grid_current, rows, cols))
+        spin(200)       # let the lazy panes create their views
+        for size in ((1000, 700), (1200, 800)):
+            resize.append(timed(window.resize, *size))
+        full.append(timed(window.full_pane_action.setChecked, True)
+                    + timed(window.full_pane_action.setChecked, False))
+        window.set_current_pane(window.tab_widget.currentWidget().panes[0])
+        move.append(timed(window.move_focus, "right") + timed(window.move_focus, "down"))
+    result = {
+        "panes": count,
+        "grid_current_ms": summarize(build),
+        "resize_ms": summarize(resize),
+        "full_pane_toggle_ms": summarize(full),
+        "move_focus_ms": summarize(move),
+    }
+    result["per_pane_us"] = {
+        key: round(result[key + "_ms"]["median"] * 1000 / count, 1)
+        for key in ("grid_current", "resize", "full_pane_toggle")
+    }
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--grids", default="2x2,3x3,4x4,5x5,6x6")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--preset", default="test", choices=sorted(PRESETS))
+    args = parser.parse_args()
+    grids = [tuple(int(n) for n in g.split("x")) for g in args.grids.split(",")]
+
+    window = make_window(args.preset, home_url="about:blank")
+    window.resize(1200, 800)
+    window.show()
+    spin(500)
+
+    results = [bench_grid(window, rows, cols, args.rounds) for rows, cols in grids]
+    window.close()
+    QApplication.instance().quit()
+    print(json.dumps(results, indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Cost of the per-pane network log, off versus on.
+
+    python benchmarks/bench_netlog.py [--images 200] [--rounds 10] [--capacity 500]
+
+Loads /assets pages with --images uncached subresources in one pane, first
+with the log disabled (no interceptor installed) and then with a ring
+buffer of --capacity entries. Reports time-to-loadFinished for both, the
+Python time spent per intercepted request, the cost of a Resource Timing
+merge and a HAR export, and the buffer size after all rounds (it must
+stay at the capacity however many requests went through).
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from harness import spin, wait_until, summarize, timed, make_window  # sets up sys.path and Qt
+from PyQt5.QtCore import QUrl
+from PyQt5.QtWidgets import QApplication
+
+from fixtures import FixtureServer
+
+
+def run(server, capacity, args):
+    window = make_window("test", home_url="about:blank", network_log=capacity)
+    window.show()
+    pane = window.current_pane
+    view = pane.ensure_webview()
+    spin(300)
+
+    loads = []
+    for i in range(args.rounds):
+        done = []
+        slot = lambda ok: done.append(time.perf_counter())
+        view.loadFinished.connect(slot)
+        start = time.perf_counter()
+        view.load(QUrl(server.url("assets/%d/c%d-r%d" % (args.images, capacity, i))))
+        wait_until(lambda: done, timeout=60)
+        view.loadFinished.disconnect(slot)
+        loads.append(((done or [time.perf_counter()])[0] - start) * 1000)
+        spin(100)
+
+    result = {"load_ms": summarize(loads)}
+    if capacity:
+        merged = []
+        start = time.perf_counter()
+        window.netlog.collect(pane, lambda: merged.append(time.perf_counter()))
+        wait_until(lambda: merged, timeout=10)
+        with tempfile.TemporaryDirectory() as tmp:
+            har_ms = timed(window.netlog.write_har, pane, os.path.join(tmp, "pane.har"))
+        result.update({
+            "stats": window.netlog.stats(),
+            "collect_ms": round(((merged or [start])[0] - start) * 1000, 2),
+            "har_export_ms": round(har_ms, 2),
+            "summary": window.netlog.summary(pane, 3),
+        })
+    window.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--images", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--capacity", type=int, default=500)
+    args = parser.parse_args()
+
+    with FixtureServer() as server:
+        results = {"off": run(server, 0, args),
+                   "on": run(server, args.capacity, args)}
+    off, on = results["off"]["load_ms"]["median"], results["on"]["load_ms"]["median"]
+    results["overhead_pct"] = round((on - off) / off * 100, 1) if off else None
+    QApplication.instance().quit()
+    print(json.dumps(results, indent=1))
+
+
+if __name__ == "__main__":
+    main()
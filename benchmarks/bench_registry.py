@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Scaling benchmark: focus changes and title updates with up to 500 tabs.
+
+Runs offscreen with lazy panes and no web view pool (no renderer is
+started), with every data path in a temporary directory, and prints the
+mean cost per operation for growing tab counts; it should stay flat.
+
+    python benchmarks/bench_registry.py
+"""
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication
+
+from harness import make_window
+
+SIZES  = (10, 100, 500)
+ROUNDS = 2000
+
+
+def per_op(fn, panes):
+    start = time.perf_counter()
+    for i in range(ROUNDS):
+        fn(panes[i % len(panes)])
+    return (time.perf_counter() - start) / ROUNDS * 1e6
+
+
+def main():
+    window = make_window("default", webview_pool=0, home_url="about:blank")
+    results = []
+    for size in SIZES:
+        while window.tab_widget.count() < size:
+            window.add_tab()
+        panes = window.all_panes()
+        # Spread the samples over the whole tab bar
+        sample = panes[::max(1, len(panes) // 50)]
+        results.append({
+            "tabs": size,
+            "set_current_pane_us": round(per_op(window.set_current_pane, sample), 2),
+            "update_tab_title_us": round(per_op(lambda p: p.update_tab_title("t"), sample), 2),
+        })
+    print(json.dumps(results, indent=1))
+    window.close()
+    QApplication.instance().quit()
+
+
+if __name__ == "__main__":
+    main()
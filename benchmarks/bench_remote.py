@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Remote control throughput, measured with a local client.
+
+    python benchmarks/bench_remote.py [--calls 500] [--panes 16]
+
+Runs MainWindow offscreen with the control socket enabled and drives it
+from a client thread: round trips per second for single calls and for
+batches, and a reconfiguration to --panes panes (split + one navigate
+per pane) sent as single calls versus one batch, with the number of web
+views created and page loads started by each.
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from harness import Probe, wait_until, spin, summarize, make_window  # sets up sys.path and Qt
+from PyQt5.QtWidgets import QApplication
+
+from fixtures import FixtureServer
+from config import PRESETS
+from remote import RemoteClient
+
+
+def in_thread(fn, *args):
+    """Run fn(*args) on a client thread while the GUI loop keeps serving."""
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fn(*args)), daemon=True)
+    thread.start()
+    wait_until(lambda: not thread.is_alive(), timeout=300, step=1)
+    return result[0]
+
+
+def single_calls(path, n):
+    client = RemoteClient(path)
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        client.call("state")
+        samples.append((time.perf_counter() - start) * 1000)
+    client.close()
+    return samples
+
+
+def batched_calls(path, n, size):
+    client = RemoteClient(path)
+    start = time.perf_counter()
+    for _ in range(n // size):
+        client.batch([("state", {})] * size)
+    elapsed = time.perf_counter() - start
+    client.close()
+    return elapsed
+
+
+def reconfigure(path, calls, batch):
+    client = RemoteClient(path)
+    start = time.perf_counter()
+    if batch:
+        client.batch(calls)
+    else:
+        for method, params in calls:
+            client.call(method, **params)
+    elapsed = (time.perf_counter() - start) * 1000
+    client.close()
+    return elapsed
+
+
+def bench_reconfigure(window, path, server, panes, batch):
+    window.split_current(None, 1)
+    probe = Probe(window)
+    views, loads = probe.counts()
+    calls = [("split_current", {"count": panes, "orientation": "horizontal"})]
+    calls += [("navigate", {"pane": i, "url": server.url("page/%d" % (i + 1))})
+              for i in range(panes)]
+    ms = in_thread(reconfigure, path, calls, batch)
+    views2, loads2 = probe.counts(settle=1000)
+    probe.timer.stop()
+    return {"ms": round(ms, 3), "views_created": views2 - views, "loads_started": loads2 - loads}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--panes", type=int, default=16)
+    parser.add_argument("--preset", default="test", choices=sorted(PRESETS))
+    args = parser.parse_args()
+
+    with FixtureServer() as server, tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "control.sock")
+        window = make_window(args.preset, home_url=server.url("page/5"), control_socket=path)
+        window.show()
+        spin(500)
+
+        samples = in_thread(single_calls, path, args.calls)
+        elapsed = in_thread(batched_calls, path, args.calls, args.batch_size)
+        results = {
+            "single_call_ms": summarize(samples),
+            "single_calls_per_s": round(len(samples) / (sum(samples) / 1000), 1),
+            "batched_calls_per_s": round(args.calls // args.batch_size * args.batch_size
+                                         / elapsed, 1),
+            "reconfigure_single": bench_reconfigure(window, path, server, args.panes, False),
+            "reconfigure_batch": bench_reconfigure(window, path, server, args.panes, True),
+        }
+        window.close()
+    QApplication.instance().quit()
+    print(json.dumps(results, indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Batch render throughput against the local fixture server.
+
+    python benchmarks/bench_render.py [--pages 32] [--grid 2x2] [--concurrency 1,2,4,8]
+
+Runs 'main.py render' once per concurrency level (a fresh process each,
+since engine flags are fixed at start-up) over --pages /slow pages
+delayed by --delay-ms, and reports pages per minute from each run's
+manifest. With network-bound pages the rate should grow roughly with
+the concurrency until the renderer becomes the limit.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from fixtures import FixtureServer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=32)
+    parser.add_argument("--grid", default="2x2")
+    parser.add_argument("--concurrency", default="1,2,4,8")
+    parser.add_argument("--delay-ms", type=int, default=500)
+    parser.add_argument("--settle", type=int, default=200)
+    args = parser.parse_args()
+
+    results = []
+    with FixtureServer() as server, tempfile.TemporaryDirectory() as tmp:
+        urls = os.path.join(tmp, "urls.txt")
+        with open(urls, "w", encoding="utf-8") as f:
+            for i in range(args.pages):
+                f.write(server.url("slow/%d/%d" % (args.delay_ms, i)) + "\n")
+        for level in (int(n) for n in args.concurrency.split(",")):
+            out = os.path.join(tmp, "c%d" % level)
+            proc = subprocess.run(
+                [sys.executable, os.path.join(os.path.dirname(HERE), "main.py"), "render",
+                 "--urls", urls, "--out", out, "--grid", args.grid,
+                 "--concurrency", str(level), "--settle", str(args.settle)],
+                capture_output=True, text=True,
+                env=dict(os.environ, QT_QPA_PLATFORM="offscreen"))
+            manifest = os.path.join(out, "manifest.json")
+            if not os.path.exists(manifest):
+                results.append({"concurrency": level, "error": proc.stderr[-2000:]})
+                continue
+            with open(manifest, encoding="utf-8") as f:
+                summary = json.load(f)
+            loads = sorted(p["load_ms"] for b in summary["results"] for p in b["panes"])
+            results.append({
+                "concurrency": level,
+                "pages": summary["pages"],
+                "failed": summary["failed"],
+                "seconds": summary["seconds"],
+                "pages_per_minute": summary["pages_per_minute"],
+                "load_ms_median": loads[len(loads) // 2] if loads else None,
+                "pngs": sum(name.endswith(".png") for name in os.listdir(out)),
+            })
+    base = next((r["pages_per_minute"] for r in results if "pages_per_minute" in r), None)
+    for r in results:
+        if base and "pages_per_minute" in r:
+            r["speedup"] = round(r["pages_per_minute"] / base, 2)
+    print(json.dumps(results, indent=1))
+
+
+if __name__ == "__main__":
+    main()
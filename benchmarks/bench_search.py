@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Open-page search: indexing cost, query latency and memory.
+
+    python benchmarks/bench_search.py [--pages 200] [--words 5000] [--budget-mb 32]
+
+Fills a TextIndex with --pages synthetic pages of --words words each (the
+50 tabs x 4 panes case), then times search() for every keystroke of a set
+of typed queries. No Qt event loop is needed.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from textsearch import TextIndex
+
+WORDS = ("status", "grafana", "kibana", "ticket", "deploy", "metrics", "alerts",
+         "build", "wiki", "search", "docs", "report", "team", "queue", "graph",
+         "disk", "latency", "error", "rollback", "incident", "owner", "review")
+QUERIES = ("OPS-1234", "db17.example", "incident rollback", "latency error owner",
+           "grafana", "zzz-no-match")
+
+
+def synthetic_page(i, words, rnd):
+    body = [rnd.choice(WORDS) for _ in range(words)]
+    body += ["OPS-%d" % rnd.randint(1000, 9999) for _ in range(words // 100)]
+    body += ["db%d.example.com" % rnd.randint(1, 40) for _ in range(words // 200)]
+    rnd.shuffle(body)
+    url = "https://%s.example.com/page/%d" % (rnd.choice(WORDS), i)
+    return url, "Page %d %s" % (i, rnd.choice(WORDS)), " ".join(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--words", type=int, default=5000)
+    parser.add_argument("--budget-mb", type=int, default=32)
+    args = parser.parse_args()
+    rnd = random.Random(1)
+    pages = [synthetic_page(i, args.words, rnd) for i in range(args.pages)]
+
+    index = TextIndex(args.budget_mb * 2**20)
+    add = []
+    for i, page in enumerate(pages):
+        t = time.perf_counter()
+        index.add(i, *page)
+        add.append((time.perf_counter() - t) * 1000)
+    t = time.perf_counter()
+    index.rebuild_vocab()
+    vocab_ms = (time.perf_counter() - t) * 1000
+
+    samples = []
+    for query in QUERIES:
+        for n in range(1, len(query) + 1):
+            t = time.perf_counter()
+            index.search(query[:n])
+            samples.append((time.perf_counter() - t) * 1000)
+
+    # Re-indexing a page (navigation) while the rest stays in place
+    t = time.perf_counter()
+    index.add(0, *synthetic_page(0, args.words, rnd))
+    reindex_ms = (time.perf_counter() - t) * 1000
+
+    add.sort()
+    samples.sort()
+    print(json.dumps({
+        "index": index.stats(),
+        "add_ms_mean": round(sum(add) / len(add), 3),
+        "add_ms_max": round(add[-1], 3),
+        "reindex_ms": round(reindex_ms, 3),
+        "rebuild_vocab_ms": round(vocab_ms, 3),
+        "keystrokes": len(samples),
+        "search_ms_mean": round(sum(samples) / len(samples), 4),
+        "search_ms_p95": round(samples[int(len(samples) * 0.95)], 4),
+        "search_ms_max": round(samples[-1], 4),
+    }, indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""Perceived navigation latency with and without speculative loading.
+
+    python benchmarks/bench_speculation.py [--rounds 10] [--delay-ms 400] [--think-ms 800]
+
+Each round 'types' a URL the history knows well into the pane's URL bar,
+waits --think-ms (the user reading their input) and commits it, then
+times commit -> loadFinished. The targets are /slow pages delayed by
+--delay-ms. 'cold' runs with speculation off, 'prefetch' with hints only
+and 'prerender' with one pre-rendered page; the predictor's own hit/miss
+counts are reported next to the measured times.
+"""
+import argparse
+import json
+import time
+
+from harness import spin, wait_until, summarize, make_window  # sets up sys.path and Qt
+from PyQt5.QtWidgets import QApplication
+
+from fixtures import FixtureServer
+
+MODES = {"cold": (0, 0), "prefetch": (8, 0), "prerender": (8, 1)}
+
+
+def run_mode(server, mode, args):
+    hints, prerenders = MODES[mode]
+    window = make_window("test", home_url=server.url("page/5"),
+                         speculative_hints=hints, max_prerenders=prerenders)
+    window.show()
+    pane = window.current_pane
+    pane.ensure_webview()
+    wait_until(lambda: pane.webview.url().path() == "/page/5", timeout=30)
+    spin(300)
+
+    times = []
+    for i in range(args.rounds):
+        url = server.url("slow/%d/%s-%04d" % (args.delay_ms, mode, i))
+        for _ in range(5):
+            window.history.record(url, "Target %d" % i)
+        spin(50)
+        pane.url_bar.setText(url)
+        window.predictor.text_edited(pane, url)
+        spin(args.think_ms)
+
+        # The predictor clears its pending commit once the pane has loaded,
+        # also for a pre-rendered page that was complete when adopted
+        start = time.perf_counter()
+        pane.load_url()
+        wait_until(lambda: pane not in window.predictor.pending_commit, timeout=30)
+        times.append((time.perf_counter() - start) * 1000)
+        spin(100)
+
+    result = {"commit_to_loaded_ms": summarize(times), "predictor": window.predictor.stats()}
+    window.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--delay-ms", type=int, default=400)
+    parser.add_argument("--think-ms", type=int, default=800)
+    parser.add_argument("--modes", default="cold,prefetch,prerender")
+    args = parser.parse_args()
+
+    with FixtureServer() as server:
+        results = {mode: run_mode(server, mode, args)
+                   for mode in args.modes.split(",")}
+    QApplication.instance().quit()
+    print(json.dumps(results, indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""Cold start-up timeline, engine started before the window versus after its first frame.
+
+    python benchmarks/bench_startup.py [--rounds 5] [--preset test]
+
+Starts 'main.py' in a fresh process per round (offscreen Qt platform, no
+session or history) with --startup-report and --exit-after-startup, once
+with --no-defer-engine and once deferred, each opening a fixture page and
+about:blank as start page. Reports the median ms from process start to
+the window being built, the first paint, the engine being ready and the
+first loadFinished. Deferring should bring the first paint well before
+engine_ready; first_load should not get worse.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from fixtures import FixtureServer
+
+MARKS = ("imports", "qapplication", "window", "first_paint", "engine_start", "engine_ready",
+         "first_load")
+
+
+def run_once(tmp, start_page, defer, preset):
+    report = os.path.join(tmp, "startup.json")
+    if os.path.exists(report):
+        os.unlink(report)
+    argv = [sys.executable, os.path.join(os.path.dirname(HERE), "main.py"),
+            "--config", os.path.join(tmp, "none.json"), "--preset", preset,
+            "--no-session", "--no-history", "--no-snapshots",
+            "--start-page", start_page, "--startup-report", report, "--exit-after-startup"]
+    if not defer:
+        argv.append("--no-defer-engine")
+    proc = subprocess.run(argv, capture_output=True, text=True, timeout=120,
+                          env=dict(os.environ, QT_QPA_PLATFORM="offscreen"))
+    if not os.path.exists(report):
+        return {"error": proc.stderr[-2000:]}
+    with open(report, encoding="utf-8") as f:
+        return json.load(f)["ms"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--preset", default="test")
+    args = parser.parse_args()
+
+    results = {}
+    with FixtureServer() as server, tempfile.TemporaryDirectory() as tmp:
+        for page_name, page in (("fixture", server.url("page/20")), ("blank", "blank")):
+            for mode, defer in (("eager", False), ("deferred", True)):
+                runs = [run_once(tmp, page, defer, args.preset) for _ in range(args.rounds)]
+                ok = [r for r in runs if "error" not in r]
+                row = {"runs": len(runs), "failed": len(runs) - len(ok)}
+                for name in MARKS:
+                    values = [r[name] for r in ok if name in r]
+                    row[name + "_ms"] = round(statistics.median(values), 1) if values else None
+                if len(ok) < len(runs):
+                    row["error"] = next(r["error"] for r in runs if "error" in r)
+                results["%s/%s" % (page_name, mode)] = row
+    for page_name in ("fixture", "blank"):
+        eager, deferred = results[page_name + "/eager"], results[page_name + "/deferred"]
+        if eager["first_paint_ms"] and deferred["first_paint_ms"]:
+            results[page_name + "/first_paint_saved_ms"] = round(
+                eager["first_paint_ms"] - deferred["first_paint_ms"], 1)
+    print(json.dumps(results, indent=1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Local HTTP fixture serving synthetic pages for the benchmarks.
+
+    /page/<n>     HTML page with <n> paragraphs and a small timer script
+    /blob/<bytes>[/<KiB per s>]  binary body of the given size, optionally
+                  rate limited; supports Range requests so downloads resume
+    /slow/<ms>    page whose response is delayed by <ms> milliseconds
+    /assets/<n>[/<tag>]  page loading <n> distinct images from /pixel/<i>?<tag>
+    /pixel/<i>    1x1 GIF
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PIXEL = bytes.fromhex("47494638396101000100800000000000ffffff21f90401000000002c"
+                      "00000000010001000002024401003b")
+PARAGRAPH = ("<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit, "
+             "sed do eiusmod tempor incididunt ut labore et dolore magna.</p>\n")
+
+
+def synthetic_page(n, title="Synthetic page"):
+    return (
+        f"<!doctype html><html><head><title>{title} {n}</title></head><body>"
+        f"<h1>{title} {n}</h1>\n{PARAGRAPH * n}"
+        "<script>setInterval(function () {"
+        " document.title = document.title; }, 1000);</script>"
+        "</body></html>"
+    ).encode()
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        parts = self.path.split("?")[0].strip("/").split("/")
+        try:
+            kind, arg = parts[0], int(parts[1]) if len(parts) > 1 else 10
+        except ValueError:
+            return self.send_error(400)
+
+        if kind == "page":
+            return self.reply(synthetic_page(arg))
+        if kind == "slow":
+            time.sleep(arg / 1000)
+            return self.reply(synthetic_page(10, "Slow page"))
+        if kind == "assets":
+            tag = parts[2] if len(parts) > 2 else ""
+            images = "".join('<img src="/pixel/%d?%s">' % (i, tag) for i in range(arg))
+            return self.reply(synthetic_page(10, "Assets").replace(b"</body>", images.encode()
+                                                                   + b"</body>"))
+        if kind == "pixel":
+            return self.reply(PIXEL, "image/gif")
+        if kind == "blob":
+            rate = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else 0
+            return self.reply_blob(arg, rate)
+        self.send_error(404)
+
+    def reply(self, body, ctype="text/html; charset=utf-8"):
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def reply_blob(self, size, rate=0):
+        chunk = b"\0" * (min(65536, rate * 1024 // 10) if rate else 65536)
+        start = 0
+        ranged = self.headers.get("Range", "")
+        if ranged.startswith("bytes=") and ranged[6:].split("-")[0].isdigit():
+            start = min(int(ranged[6:].split("-")[0]), size)
+        self.send_response(206 if start else 200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(size - start))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("ETag", f'"blob-{size}"')
+        self.send_header("Last-Modified", "Mon, 01 Jan 2024 00:00:00 GMT")
+        if start:
+            self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+        self.send_header("Content-Disposition", f'attachment; filename="blob-{size}.bin"')
+        self.end_headers()
+        sent = start
+        try:
+            while sent < size:
+                n = min(len(chunk), size - sent)
+                self.wfile.write(chunk[:n])
+                sent += n
+                if rate:
+                    time.sleep(n / (rate * 1024))
+        except (BrokenPipeError, ConnectionResetError):
+            pass        # client paused or cancelled
+
+    def log_message(self, *args):
+        pass
+
+
+class FixtureServer:
+    """Threaded HTTP server on 127.0.0.1 and a random free port."""
+
+    def __init__(self):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), FixtureHandler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return "http://127.0.0.1:%d" % self.httpd.server_address[1]
+
+    def url(self, path):
+        return self.base_url + "/" + path.lstrip("/")
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+"""Headless benchmark harness for SplitBrowser.
+
+Runs MainWindow on the offscreen Qt platform against the local fixture
+server and writes the results as JSON:
+
+    python benchmarks/harness.py --out results.json
+    python benchmarks/harness.py --baseline results.json   # fail on regressions
+    python benchmarks/harness.py --preset kiosk-low-memory
+    python benchmarks/harness.py --all-presets --out presets.json
+
+Measured: startup (process start -> window shown -> first loadFinished),
+add_tab, new tab time-to-interactive (with web view pool stats), split_current for every orientation and pane count (with the
+number of web views created and page loads started by each change,
+counted through signals; the run exits 1 when a change recreates or
+reloads panes it should have kept),
+toggle_full_pane / switch_pane, time-to-loadFinished per pane, the page
+lifecycle counts once hidden tabs are frozen (the run also exits 1 when
+they are not as expected), session restore of 100 tabs x 4 panes and peak RSS of the browser and renderer
+processes.
+"""
+import time
+T0 = time.perf_counter()
+
+import argparse
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+from PyQt5.QtCore import Qt, QTimer, QEventLoop, QT_VERSION_STR, PYQT_VERSION_STR
+from PyQt5.QtWidgets import QApplication
+from PyQt5 import sip
+
+from fixtures import FixtureServer
+from config import PRESETS, DEFAULTS, apply_engine_flags, window_options
+from layout import grid_spec
+from main import MainWindow
+from memory import process_rss
+from session import VERSION
+
+ORIENTATIONS = {"horizontal": Qt.Horizontal, "vertical": Qt.Vertical}
+APP = None          # the QApplication make_window() created
+DATA_TMP = None     # removed at exit; every window gets a directory in it
+
+
+def spin(ms=0):
+    """Run the event loop for 'ms' milliseconds."""
+    loop = QEventLoop()
+    QTimer.singleShot(ms, loop.quit)
+    loop.exec_()
+
+
+def wait_until(predicate, timeout=30.0, step=10):
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            return False
+        spin(step)
+    return True
+
+
+def timed(fn, *args):
+    """Milliseconds spent in fn(*args) plus the layout pass it triggers."""
+    start = time.perf_counter()
+    fn(*args)
+    QApplication.processEvents()
+    return (time.perf_counter() - start) * 1000
+
+
+def summarize(values):
+    if not values:
+        return None
+    values = sorted(values)
+    return {
+        "n": len(values),
+        "mean": round(statistics.mean(values), 3),
+        "median": round(statistics.median(values), 3),
+        "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 3),
+        "max": round(values[-1], 3),
+    }
+
+
+class Probe:
+    """Counts web views and page loads, and samples renderer RSS.
+
+    Counting goes through signals, so nothing is missed between polls:
+    views are counted where panes get them (ProfileManager.new_view) and
+    each one's loadStarted is connected before it can load anything.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.created = 0
+        self.loads = 0
+        self.view_loads = {}        # view -> loads started
+        self.peak_renderers = 0
+        for pane in window.all_panes():
+            if pane.webview is not None:
+                self.watch(pane.webview)
+
+        new_view = window.profiles.new_view
+        def counting_new_view(name):
+            view = new_view(name)
+            self.created += 1
+            self.watch(view)
+            return view
+        window.profiles.new_view = counting_new_view
+
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.poll)
+        self.timer.start(100)
+
+    def watch(self, view):
+        # A view back from the pool lost its connections in release()
+        self.view_loads.setdefault(view, 0)
+        view.loadStarted.connect(lambda v=view: self.on_load_started(v))
+
+    def poll(self):
+        pids = {pane.webview.page().renderProcessPid()
+                for pane in self.window.all_panes() if pane.webview is not None}
+        rss = sum(process_rss(pid) for pid in pids)
+        self.peak_renderers = max(self.peak_renderers, rss)
+
+    def on_load_started(self, view):
+        self.loads += 1
+        self.view_loads[view] += 1
+
+    def counts(self, settle=300):
+        """(web views created, loads started) after letting things settle."""
+        spin(settle)
+        self.poll()
+        spin(settle)
+        return self.created, self.loads
+
+
+def isolated(options, tmp):
+    """'options' with every data path inside 'tmp' or turned off.
+
+    Runs then neither depend on nor write to the user's ~/.splitbrowser:
+    no session, history or filter lists are read, and snapshots,
+    thumbnails, downloads and the HTTP cache start empty.
+    """
+    options.update(session_path=None, history_path=None, filter_lists=[],
+                   snapshot_dir=os.path.join(tmp, "snapshots"),
+                   thumbnail_dir=os.path.join(tmp, "thumbnails"),
+                   download_dir=os.path.join(tmp, "downloads"),
+                   cache_path=os.path.join(tmp, "cache"),
+                   metrics_export=None, startup_report=None, control_socket=None)
+    return options
+
+
+def make_window(preset="test", **overrides):
+    """A MainWindow for 'preset' with isolated() data paths, then 'overrides'.
+
+    The first call applies the preset's Chromium flags and creates the
+    QApplication; flags are per process, so later calls only change the
+    window options.
+    """
+    global APP, DATA_TMP
+    config = dict(DEFAULTS, **PRESETS[preset])
+    if QApplication.instance() is None:
+        apply_engine_flags(config)
+        APP = QApplication(sys.argv[:1])
+    if DATA_TMP is None:
+        DATA_TMP = tempfile.TemporaryDirectory(prefix="splitbrowser-bench-")
+    options = isolated(window_options(config), tempfile.mkdtemp(dir=DATA_TMP.name))
+    options.update(overrides)
+    return MainWindow(**options)
+
+
+def bench_startup(server, preset):
+    window = make_window(preset, home_url=server.url("page/20"))
+    window.show()
+    QApplication.processEvents()
+    shown = time.perf_counter()
+
+    finished = []
+    view = window.current_pane.ensure_webview()
+    view.loadFinished.connect(lambda ok: finished.append(time.perf_counter()))
+    wait_until(lambda: finished)
+    return window, {
+        "window_shown_ms": round((shown - T0) * 1000, 3),
+        "first_load_finished_ms": round(((finished or [shown])[0] - T0) * 1000, 3),
+    }
+
+
+def bench_tabs(window, rounds):
+    samples = [timed(window.add_tab) for _ in range(rounds)]
+    while window.tab_widget.count() > 1:
+        window.close_tab(window.tab_widget.count() - 1)
+    return summarize(samples)
+
+
+def bench_splits(window, probe):
+    """Time every split change and count the views and loads it caused.
+
+    A change from n to m panes must create exactly max(m - n, 0) web views
+    and must not start a load in any pane that existed before; "ok" is
+    False otherwise and run() reports the change as a failure.
+    """
+    results = []
+    for name, orientation in ORIENTATIONS.items():
+        for count in (1, 2, 3, 4):
+            cont = window.tab_widget.currentWidget()
+            before = len(cont.panes)
+            kept = {p.webview: probe.view_loads.get(p.webview, 0)
+                    for p in cont.panes if p.webview is not None}
+            created, loads = probe.counts()
+            ms = timed(window.split_current, orientation, count)
+            created_after, loads_after = probe.counts()
+            reloaded = sum(probe.view_loads[v] - n for v, n in kept.items()
+                           if v in probe.view_loads and not sip.isdeleted(v))
+            results.append({
+                "orientation": name,
+                "panes": count,
+                "time_ms": round(ms, 3),
+                "webviews_created": created_after - created,
+                "loads_started": loads_after - loads,
+                "existing_panes_reloaded": reloaded,
+                "ok": created_after - created == max(count - before, 0) and reloaded == 0,
+            })
+    return results
+
+
+def bench_full_pane(window, rounds):
+    window.split_current(Qt.Horizontal, 4)
+    QApplication.processEvents()
+    toggle, switch = [], []
+    for _ in range(rounds):
+        toggle.append(timed(window.full_pane_action.setChecked, True))
+        switch.append(timed(window.switch_pane, 1))
+        toggle.append(timed(window.full_pane_action.setChecked, False))
+    return {"toggle_full_pane_ms": summarize(toggle), "switch_pane_ms": summarize(switch)}
+
+
+def bench_page_load(window, server, panes, rounds):
+    """Time from load_url() to loadFinished for every pane of a split."""
+    window.split_current(Qt.Horizontal, panes)
+    samples = []
+    for r in range(rounds):
+        started, done, slots = {}, {}, {}
+        for i, pane in enumerate(window.tab_widget.currentWidget().panes):
+            slots[pane] = lambda ok, p=pane: done.setdefault(p, time.perf_counter())
+            pane.ensure_webview().loadFinished.connect(slots[pane])
+            pane.url_bar.setText(server.url("page/%d" % (50 + 10 * i + r)))
+            started[pane] = time.perf_counter()
+            pane.load_url()
+        wait_until(lambda: len(done) == len(started))
+        for pane, slot in slots.items():
+            pane.webview.loadFinished.disconnect(slot)
+            if pane in done:
+                samples.append((done[pane] - started[pane]) * 1000)
+    return summarize(samples)
+
+
+def bench_lifecycle(window, server, tabs=3):
+    """Freeze the panes of hidden tabs and check lifecycle.counts().
+
+    Loads 'tabs' extra tabs, shows the first tab again and lowers
+    freeze_after: every loaded pane of a hidden tab must end up frozen
+    and every loaded pane of the shown tab active. "ok" is False
+    otherwise and run() reports it as a failure.
+    """
+    lifecycle = window.lifecycle
+    saved = lifecycle.freeze_after
+    lifecycle.set_freeze_after(None)
+    first = window.tab_widget.currentIndex()
+    for i in range(tabs):
+        done = []
+        window.add_tab(url=server.url("page/%d" % (90 + i)))
+        view = window.current_pane.ensure_webview()
+        view.loadFinished.connect(lambda ok: done.append(ok))
+        wait_until(lambda: done)
+    window.tab_widget.setCurrentIndex(first)
+    shown = window.tab_widget.currentWidget().panes
+    loaded = [p for p in window.all_panes() if p.webview is not None]
+    expected = {"active": sum(1 for p in loaded if p in shown),
+                "frozen": sum(1 for p in loaded if p not in shown),
+                "discarded": 0}
+
+    start = time.perf_counter()
+    lifecycle.set_freeze_after(100)
+    wait_until(lambda: lifecycle.counts()["frozen"] >= expected["frozen"], timeout=5)
+    frozen_ms = (time.perf_counter() - start) * 1000
+    counts = lifecycle.counts()
+
+    lifecycle.set_freeze_after(saved)
+    while window.tab_widget.count() > first + 1:
+        window.close_tab(window.tab_widget.count() - 1)
+    return {"counts": counts, "expected": expected, "freeze_all_ms": round(frozen_ms, 1),
+            "ok": all(counts[k] == v for k, v in expected.items())}
+
+
+def bench_restore(window, server, tabs=100, panes=4):
+    """session.restore() of 'tabs' saved tabs with 'panes' panes in a grid each.
+
+    Restored panes are lazy, so this is the cost of rebuilding the widget
+    tree. One leaf names a profile that cannot exist and must come back
+    in the default profile; "ok" is False when a tab is missing.
+    """
+    rows = 2 if panes % 2 == 0 else 1
+    saved = []
+    for t in range(tabs):
+        urls = [{"url": server.url("page/%d" % (t * panes + i))} for i in range(panes)]
+        if t == tabs - 1:
+            urls[0]["profile"] = "../gone"
+        saved.append({"layout": grid_spec(rows, panes // rows, urls), "current": 0})
+    path = os.path.join(DATA_TMP.name, "restore-session.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": VERSION, "current": 0, "tabs": saved}, f)
+
+    before = window.tab_widget.count()
+    session_path, window.session.path = window.session.path, path
+    start = time.perf_counter()
+    restored = window.session.restore()
+    QApplication.processEvents()
+    elapsed = (time.perf_counter() - start) * 1000
+    window.session.path = session_path
+    count = window.tab_widget.count() - before
+    while window.tab_widget.count() > before:
+        window.close_tab(window.tab_widget.count() - 1)
+    return {"tabs": tabs, "panes": tabs * panes, "restore_ms": round(elapsed, 1),
+            "per_pane_us": round(elapsed * 1000 / (tabs * panes), 1),
+            "ok": restored and count == tabs}
+
+
+def bench_new_pane(window, rounds):
+    """Time-to-interactive of a new tab: add_tab() -> loadFinished."""
+    samples = []
+    for _ in range(rounds):
+        spin(300)   # let the web view pool refill in idle time
+        done = []
+        start = time.perf_counter()
+        window.add_tab()
+        view = window.current_pane.ensure_webview()
+        view.loadFinished.connect(lambda ok: done.append(time.perf_counter()))
+        if wait_until(lambda: done):
+            samples.append((done[0] - start) * 1000)
+    while window.tab_widget.count() > 1:
+        window.close_tab(window.tab_widget.count() - 1)
+    return {"tti_ms": summarize(samples), "pool": window.webview_pool.stats()}
+
+
+def flatten(data, prefix=""):
+    """{'a': {'b_ms': 1}} -> {'a.b_ms': 1}, lists indexed by position."""
+    out = {}
+    items = data.items() if isinstance(data, dict) else enumerate(data)
+    for key, value in items:
+        name = f"{prefix}{key}"
+        if isinstance(value, (dict, list)):
+            out.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)):
+            out[name] = value
+    return out
+
+
+def regressions(results, baseline, tolerance):
+    """Timing metrics (keys containing '_ms') worse than baseline * tolerance."""
+    new, old = flatten(results), flatten(baseline)
+    found = []
+    for key, value in new.items():
+        timing = "_ms" in key
+        if timing and key in old and old[key] > 0 and value > old[key] * tolerance:
+            found.append({"metric": key, "baseline": old[key], "current": value})
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", help="write the JSON results to this file")
+    parser.add_argument("--baseline", help="compare against a previous results file")
+    parser.add_argument("--tolerance", type=float, default=1.25,
+                        help="allowed slowdown factor against the baseline")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="default",
+                        help="engine/window settings preset to benchmark")
+    parser.add_argument("--all-presets", action="store_true",
+                        help="benchmark every preset, each in its own process")
+    args = parser.parse_args()
+
+    if args.all_presets:
+        results = {"presets": run_presets(args.rounds)}
+    else:
+        results = run(args.preset, args.rounds)
+
+    failures = [f for r in results.get("presets", {"": results}).values()
+                for f in r.get("check_failures", [])]
+    status = 1 if failures else 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            results["regressions"] = regressions(results, json.load(f), args.tolerance)
+        status = 1 if results["regressions"] or failures else 0
+
+    text = json.dumps(results, indent=1)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    return status
+
+
+def run_presets(rounds):
+    """Chromium flags are per process: run the harness once per preset."""
+    results = {}
+    for name in sorted(PRESETS):
+        with tempfile.NamedTemporaryFile(suffix=".json") as out:
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--preset", name,
+                                   "--rounds", str(rounds), "--out", out.name],
+                                  stdout=subprocess.DEVNULL)
+            if proc.returncode not in (0, 1):   # 1: failed checks, reported below
+                raise subprocess.CalledProcessError(proc.returncode, proc.args)
+            with open(out.name, encoding="utf-8") as f:
+                results[name] = json.load(f)
+    return results
+
+
+def run(preset, rounds):
+    with FixtureServer() as server:
+        window, startup = bench_startup(server, preset)
+        probe = Probe(window)
+        results = {
+            "meta": {
+                "preset": preset,
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "qt": QT_VERSION_STR,
+                "pyqt": PYQT_VERSION_STR,
+                "platform": platform.platform(),
+            },
+            "startup": startup,
+            "add_tab_ms": bench_tabs(window, rounds),
+            "new_pane": bench_new_pane(window, rounds),
+            "split_current": bench_splits(window, probe),
+            "full_pane": bench_full_pane(window, rounds),
+            "page_load_ms": bench_page_load(window, server, 4, max(1, rounds // 3)),
+            "lifecycle": bench_lifecycle(window, server),
+            "restore": bench_restore(window, server),
+        }
+        results["check_failures"] = [
+            "%s/%d" % (r["orientation"], r["panes"]) for r in results["split_current"]
+            if not r["ok"]]
+        for check in ("lifecycle", "restore"):
+            if not results[check]["ok"]:
+                results["check_failures"].append(check)
+        probe.poll()
+        results["memory"] = {
+            "browser_peak_rss_mb": round(
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "renderers_peak_rss_mb": round(probe.peak_renderers / 2**20, 1),
+        }
+        window.close()
+    APP.quit()
+    return results
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+"""Configuration file, command line and Chromium engine flags.
+
+Settings are resolved as: defaults < preset < config file < command line.
+Everything that Chromium reads at start-up must be applied with
+apply_engine_flags() before the QApplication is created.
+"""
+import argparse
+import json
+import os
+
+from paths import DATA_DIR
+from session import SESSION_PATH
+from history import HISTORY_PATH
+from snapshots import SNAPSHOT_DIR
+from remote import CONTROL_SOCKET
+from downloads import DOWNLOAD_DIR
+from thumbnails import SPILL_DIR
+from profiling import PROFILE_DIR, DEVTOOLS_PORT
+
+CONFIG_PATH = os.path.join(DATA_DIR, "config.json")
+
+PROCESS_MODELS = (
+    "process-per-site-instance",    # Chromium default
+    "process-per-site",
+    "process-per-tab",
+    "single-process",               # tests only
+)
+
+DEFAULTS = {
+    # Engine (applied before QApplication)
+    "process_model": "process-per-site-instance",
+    "renderer_process_limit": 0,        # 0 = Chromium decides
+    "software_rendering": False,
+    "raster_threads": 0,                # 0 = Chromium decides
+    "background_throttling": True,
+    "extra_flags": [],
+    "devtools_port": None,              # Chromium remote debugging, None = off
+    # Profile (applied after QApplication)
+    "disk_cache_mb": 0,                 # 0 = Qt default size
+    "cache_path": None,                 # None = Qt default location
+    "profiles": {},                     # name -> {"cache_mb", "cache_path", "persistent_cookies"}
+    # Window
+    "home_url": "https://www.google.com",
+    "start_page": None,                 # first tab: None/"home", "blank", a URL or an HTML file
+    "defer_engine": True,               # start Qt WebEngine after the first frame
+    "startup_report": None,             # write the start-up timeline (JSON) here
+    "exit_after_startup": False,        # close once the first page has loaded (benchmarks)
+    "log_level": "warning",             # stderr logging: debug, info, warning or error
+    "lazy_panes": True,
+    "freeze_after": 30000,              # ms, None = never freeze
+    "memory_budget_mb": None,
+    "session_path": SESSION_PATH,
+    "history_path": HISTORY_PATH,
+    "metrics_export": None,
+    "content_blocking": True,
+    "filter_lists": None,               # None = ~/.splitbrowser/filters/*.txt
+    "webview_pool": 2,                  # pre-warmed views, 0 = off
+    "snapshot_dir": SNAPSHOT_DIR,
+    "snapshot_max_mb": 256,             # offline MHTML snapshots, 0 = off
+    "control_socket": None,             # JSON-RPC remote control, None = off
+    "thumbnail_budget_mb": 16,          # in-memory tab thumbnails, 0 = off
+    "thumbnail_dir": SPILL_DIR,         # where thumbnails past the budget are spilled
+    "refresh_max_concurrent": 2,        # auto-refresh reloads running at once
+    "download_dir": DOWNLOAD_DIR,
+    "max_downloads": 3,                 # transfers running at once
+    "max_downloads_per_host": 2,
+    "speculative_hints": 8,             # preconnects/prefetches per 30 s, 0 = off
+    "max_prerenders": 1,                # hidden pre-rendered pages, 0 = off
+    "search_index_mb": 32,              # open-page text search, 0 = off
+    "network_log": 500,                 # requests kept per pane, 0 = off
+    "profile_dir": None,                # profile from start-up into this dir, None = off
+}
+
+PRESETS = {
+    "default": {},
+    "kiosk-low-memory": {
+        "process_model": "process-per-site",
+        "renderer_process_limit": 2,
+        "raster_threads": 1,
+        "disk_cache_mb": 32,
+        "freeze_after": 10000,
+        "memory_budget_mb": 600,
+        "webview_pool": 0,
+        "snapshot_max_mb": 64,
+        "thumbnail_budget_mb": 4,
+        "refresh_max_concurrent": 1,
+        "max_prerenders": 0,
+        "search_index_mb": 8,
+        "network_log": 0,
+    },
+    "max-throughput": {
+        "raster_threads": 4,
+        "background_throttling": False,
+        "disk_cache_mb": 512,
+        "freeze_after": None,
+        "lazy_panes": False,
+        "webview_pool": 4,
+    },
+    "test": {
+        "process_model": "single-process",
+        "software_rendering": True,
+        "session_path": None,
+        "history_path": None,
+        "snapshot_dir": None,
+        "freeze_after": None,
+        "webview_pool": 0,
+    },
+}
+
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="main.py", description="Split Browser")
+    p.add_argument("--config", default=CONFIG_PATH, help="JSON configuration file")
+    p.add_argument("--preset", choices=sorted(PRESETS), help="named settings preset")
+    p.add_argument("--process-model", choices=PROCESS_MODELS)
+    p.add_argument("--renderer-process-limit", type=int, metavar="N")
+    p.add_argument("--single-process", dest="process_model", action="store_const",
+                   const="single-process", help="run renderers in the browser process")
+    p.add_argument("--software-rendering", action="store_true", default=None)
+    p.add_argument("--raster-threads", type=int, metavar="N")
+    p.add_argument("--no-background-throttling", dest="background_throttling",
+                   action="store_false", default=None)
+    p.add_argument("--devtools-port", type=int, metavar="PORT",
+                   help="serve Chromium remote debugging on PORT")
+    p.add_argument("--disk-cache-mb", type=int, metavar="MB")
+    p.add_argument("--cache-path", metavar="DIR")
+    p.add_argument("--define-profile", dest="profile_specs", action="append",
+                   metavar="NAME[:CACHE_MB[:CACHE_PATH]]",
+                   help="named browser profile with its own cache size and location (repeatable)")
+    p.add_argument("--home-url", metavar="URL")
+    p.add_argument("--start-page", metavar="URL|FILE|blank|home",
+                   help="page of the first tab when no session is restored")
+    p.add_argument("--no-defer-engine", dest="defer_engine", action="store_false", default=None,
+                   help="initialize Qt WebEngine before the window is shown")
+    p.add_argument("--startup-report", metavar="FILE",
+                   help="write process start -> first paint -> first load timings as JSON")
+    p.add_argument("--exit-after-startup", action="store_true", default=None,
+                   help="quit once the first page has loaded")
+    p.add_argument("--log-level", choices=("debug", "info", "warning", "error"),
+                   help="log to stderr from this level on (info shows memory evictions)")
+    p.add_argument("--eager-panes", dest="lazy_panes", action="store_false", default=None,
+                   help="load every new pane immediately")
+    p.add_argument("--freeze-after", type=int, metavar="MS")
+    p.add_argument("--memory-budget-mb", type=int, metavar="MB")
+    p.add_argument("--no-session", dest="session_path", action="store_const", const="")
+    p.add_argument("--no-history", dest="history_path", action="store_const", const="")
+    p.add_argument("--no-snapshots", dest="snapshot_dir", action="store_const", const="")
+    p.add_argument("--snapshot-max-mb", type=int, metavar="MB",
+                   help="size cap of the offline snapshot store")
+    p.add_argument("--control-socket", nargs="?", const=CONTROL_SOCKET, metavar="PATH",
+                   help="serve the JSON-RPC remote control (default %(const)s)")
+    p.add_argument("--thumbnail-budget-mb", type=int, metavar="MB",
+                   help="memory for tab thumbnails before they spill to disk")
+    p.add_argument("--refresh-max-concurrent", type=int, metavar="N",
+                   help="auto-refresh reloads allowed at the same time")
+    p.add_argument("--download-dir", metavar="DIR")
+    p.add_argument("--max-downloads", type=int, metavar="N")
+    p.add_argument("--max-downloads-per-host", type=int, metavar="N")
+    p.add_argument("--speculative-hints", type=int, metavar="N",
+                   help="preconnects/prefetches allowed per 30 s (0 disables speculation)")
+    p.add_argument("--max-prerenders", type=int, metavar="N",
+                   help="pages pre-rendered in the background (0 disables)")
+    p.add_argument("--search-index-mb", type=int, metavar="MB",
+                   help="memory for the open-page search index (0 disables)")
+    p.add_argument("--network-log", type=int, metavar="N",
+                   help="requests kept per pane for HAR export (0 disables capture)")
+    p.add_argument("--profile", dest="profile_dir", nargs="?", const=PROFILE_DIR, metavar="DIR",
+                   help="record cProfile, slot timings and a Chromium trace from start-up "
+                        "into a timestamped directory under DIR (default %(const)s)")
+    p.add_argument("--metrics-export", metavar="FILE", help=".prom or .json file")
+    p.add_argument("--no-content-blocking", dest="content_blocking", action="store_false",
+                   default=None)
+    p.add_argument("--webview-pool", type=int, metavar="N",
+                   help="number of pre-warmed web views (0 disables)")
+    p.add_argument("--filter-list", dest="filter_lists", action="append", metavar="FILE",
+                   help="EasyList-style filter list (repeatable)")
+    return p
+
+
+def load_config(argv=None):
+    """Resolve the settings; returns (config dict, arguments left for Qt)."""
+    args, rest = build_parser().parse_known_args(argv)
+    cli = {k: v for k, v in vars(args).items() if v is not None and k not in ("config", "preset")}
+    specs = cli.pop("profile_specs", [])
+
+    from_file = {}
+    if args.config and os.path.exists(args.config):
+        with open(args.config, encoding="utf-8") as f:
+            from_file = json.load(f)
+
+    config = dict(DEFAULTS)
+    preset = args.preset or from_file.pop("preset", None) or "default"
+    if preset not in PRESETS:
+        raise SystemExit(f"unknown preset: {preset}")
+    config.update(PRESETS[preset])
+    config.update({k: v for k, v in from_file.items() if k in DEFAULTS})
+    config.update(cli)
+    config["preset"] = preset
+    config["profiles"] = dict(config["profiles"])
+    for spec in specs:
+        config["profiles"][spec.split(":", 1)[0]] = parse_profile(spec)
+    for key in ("session_path", "history_path", "snapshot_dir"):
+        if config[key] == "":
+            config[key] = None
+    if config["profile_dir"] and not config["devtools_port"]:
+        config["devtools_port"] = DEVTOOLS_PORT     # for the Chromium trace
+    return config, rest
+
+
+def parse_profile(spec):
+    """--define-profile NAME[:CACHE_MB[:CACHE_PATH]] as a profile definition."""
+    name, _, rest = spec.partition(":")
+    cache_mb, _, cache_path = rest.partition(":")
+    if not name:
+        raise SystemExit("profile name missing in --define-profile " + spec)
+    definition = {}
+    if cache_mb:
+        definition["cache_mb"] = int(cache_mb)
+    if cache_path:
+        definition["cache_path"] = cache_path
+    return definition
+
+
+def chromium_flags(config):
+    flags = []
+    model = config["process_model"]
+    if model != "process-per-site-instance":
+        flags.append("--" + model)
+    if config["renderer_process_limit"]:
+        flags.append("--renderer-process-limit=%d" % config["renderer_process_limit"])
+    if config["software_rendering"]:
+        flags.append("--disable-gpu")
+    if config["devtools_port"]:
+        flags.append("--remote-debugging-port=%d" % config["devtools_port"])
+    if config["raster_threads"]:
+        flags.append("--num-raster-threads=%d" % config["raster_threads"])
+    if not config["background_throttling"]:
+        flags += [
+            "--disable-background-timer-throttling",
+            "--disable-renderer-backgrounding",
+            "--disable-backgrounding-occluded-windows",
+        ]
+    return flags + list(config["extra_flags"])
+
+
+def apply_engine_flags(config):
+    """Export the Chromium flags; must run before QApplication is created."""
+    from PyQt5.QtCore import Qt, QCoreApplication
+
+    flags = chromium_flags(config)
+    existing = os.environ.get("QTWEBENGINE_CHROMIUM_FLAGS", "")
+    os.environ["QTWEBENGINE_CHROMIUM_FLAGS"] = " ".join([existing] + flags).strip()
+    if config["software_rendering"]:
+        QCoreApplication.setAttribute(Qt.AA_UseSoftwareOpenGL)
+
+
+def apply_profile(config, profile):
+    """Disk cache size and location of a QWebEngineProfile.
+
+    MainWindow applies it to the default profile when it starts the
+    engine; calling it earlier starts Qt WebEngine right away.
+    """
+    if config["disk_cache_mb"]:
+        profile.setHttpCacheMaximumSize(config["disk_cache_mb"] * 1024 * 1024)
+    if config["cache_path"]:
+        profile.setCachePath(config["cache_path"])
+
+
+def window_options(config):
+    """Keyword arguments for MainWindow."""
+    keys = ("home_url", "lazy_panes", "freeze_after", "memory_budget_mb",
+            "session_path", "history_path", "metrics_export", "content_blocking",
+            "filter_lists", "webview_pool", "snapshot_dir", "snapshot_max_mb",
+            "control_socket", "thumbnail_budget_mb", "thumbnail_dir", "refresh_max_concurrent",
+            "download_dir", "max_downloads", "max_downloads_per_host",
+            "speculative_hints", "max_prerenders", "profile_dir", "devtools_port",
+            "search_index_mb", "network_log", "profiles", "disk_cache_mb", "cache_path",
+            "start_page", "defer_engine", "startup_report")
+    return {k: config[k] for k in keys}
@@ -0,0 +1,297 @@
+"""Download manager: priority queue, global and per-host limits, pause/resume."""
+import itertools
+import logging
+import os
+import time
+
+from PyQt5.QtCore import Qt, QObject, QTimer, QUrl, pyqtSignal
+from PyQt5.QtGui import QDesktopServices
+from PyQt5.QtWidgets import (
+    QDockWidget, QTableWidget, QTableWidgetItem, QHeaderView, QLabel,
+    QVBoxLayout, QWidget, QMenu,
+)
+from PyQt5.QtWebEngineWidgets import QWebEngineDownloadItem
+
+log = logging.getLogger("splitbrowser.downloads")
+
+DOWNLOAD_DIR = os.path.join(os.path.expanduser("~"), "Downloads")
+
+_item = QWebEngineDownloadItem
+QUEUED, ACTIVE, PAUSED, DONE, FAILED, CANCELLED = (
+    "queued", "active", "paused", "done", "failed", "cancelled")
+MAX_RETRIES = 3
+
+
+def unique_path(directory, name):
+    """'name' in 'directory', numbered like 'file (1).ext' if it exists."""
+    base, ext = os.path.splitext(name or "download")
+    path = os.path.join(directory, base + ext)
+    for n in itertools.count(1):
+        if not os.path.exists(path):
+            return path
+        path = os.path.join(directory, f"{base} ({n}){ext}")
+
+
+class Download:
+    """One transfer and the bookkeeping around its QWebEngineDownloadItem."""
+
+    def __init__(self, item, seq, priority=0):
+        self.item = item
+        self.seq = seq
+        self.priority = priority
+        self.host = item.url().host()
+        self.state = QUEUED
+        self.retries = 0
+        self.received = 0
+        self.total = item.totalBytes()
+        self.rate = 0.0                 # bytes per second, smoothed
+        self.started = time.monotonic()
+
+    @property
+    def name(self):
+        return os.path.basename(self.item.path())
+
+    def eta(self):
+        if self.rate <= 0 or self.total <= 0:
+            return None
+        return (self.total - self.received) / self.rate
+
+    def as_dict(self):
+        return {
+            "id": self.item.id(), "name": self.name, "url": self.item.url().toString(),
+            "host": self.host, "state": self.state, "priority": self.priority,
+            "received": self.received, "total": self.total,
+            "rate": round(self.rate), "eta": self.eta(),
+        }
+
+
+class DownloadManager(QObject):
+    """Accepts the profile's downloads and runs them under limits.
+
+    Every download is accepted at once (Qt cancels those that are not)
+    and paused while it waits in the queue; the queue is served by
+    priority, then arrival, within 'max_concurrent' transfers overall and
+    'per_host' per server. Interrupted transfers are resumed up to
+    MAX_RETRIES times. Progress is polled every 'interval' ms instead of
+    handled per downloadProgress signal, so a fast transfer costs one
+    update per tick; 'changed' is emitted once per tick.
+    """
+    changed = pyqtSignal()
+    added = pyqtSignal(object)
+
+    def __init__(self, parent=None, directory=DOWNLOAD_DIR, max_concurrent=3, per_host=2,
+                 interval=500):
+        super().__init__(parent)
+        self.directory = directory
+        self.max_concurrent = max_concurrent
+        self.per_host = per_host
+        self.downloads = []
+        self.counter = itertools.count()
+        self.rate = 0.0
+        self.last_poll = time.monotonic()
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.poll)
+
+    def on_download(self, item):
+        """profile.downloadRequested handler (save-page downloads are not ours)."""
+        if item.isSavePageDownload() or item.state() != _item.DownloadRequested:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        item.setPath(unique_path(self.directory, item.suggestedFileName()
+                                 or os.path.basename(item.path())))
+        item.accept()
+        download = Download(item, next(self.counter))
+        item.finished.connect(lambda d=download: self._finished(d))
+        item.stateChanged.connect(lambda state, d=download: self._state_changed(d, state))
+        # Keep it running only if it would be the next one started anyway
+        if any(d.state == QUEUED for d in self.downloads) or not self._has_slot(download):
+            item.pause()
+        self.downloads.append(download)
+        log.info("download %s from %s", download.name, download.host)
+        self.added.emit(download)
+        self.pump()
+
+    def active(self):
+        return [d for d in self.downloads if d.state == ACTIVE]
+
+    def _has_slot(self, download):
+        active = self.active()
+        return (len(active) < self.max_concurrent
+                and sum(d.host == download.host for d in active) < self.per_host)
+
+    def pump(self):
+        """Start queued downloads while the limits allow."""
+        queued = sorted((d for d in self.downloads if d.state == QUEUED),
+                        key=lambda d: (-d.priority, d.seq))
+        for download in queued:
+            if self._has_slot(download):
+                download.state = ACTIVE
+                if download.item.isPaused() or \
+                        download.item.state() == _item.DownloadInterrupted:
+                    download.item.resume()
+        if self.active() and not self.timer.isActive():
+            self.last_poll = time.monotonic()
+            self.timer.start()
+        self.changed.emit()
+
+    def pause(self, download):
+        if download.state in (QUEUED, ACTIVE):
+            download.item.pause()
+            download.state = PAUSED
+            download.rate = 0.0
+            self.pump()
+
+    def resume(self, download):
+        """Put a paused transfer back in the queue."""
+        if download.state == PAUSED or (
+                download.state == FAILED and download.item.state() == _item.DownloadInterrupted):
+            download.state = QUEUED
+            self.pump()
+
+    def cancel(self, download):
+        if download.state not in (DONE, CANCELLED):
+            download.item.cancel()
+            download.state = CANCELLED
+            self.pump()
+
+    def set_priority(self, download, priority):
+        download.priority = priority
+        self.pump()
+
+    def _state_changed(self, download, state):
+        if state == _item.DownloadInterrupted and download.state == ACTIVE:
+            reason = download.item.interruptReasonString()
+            if download.retries < MAX_RETRIES:
+                download.retries += 1
+                log.info("download %s interrupted (%s), retrying", download.name, reason)
+                download.state = QUEUED
+            else:
+                log.warning("download %s failed: %s", download.name, reason)
+                download.state = FAILED
+            QTimer.singleShot(1000 * download.retries, self.pump)
+
+    def _finished(self, download):
+        state = download.item.state()
+        download.received = download.item.receivedBytes()
+        download.rate = 0.0
+        if state == _item.DownloadCompleted:
+            download.state = DONE
+        elif state == _item.DownloadCancelled:
+            download.state = CANCELLED
+        else:
+            download.state = FAILED     # interrupted for good
+        self.pump()
+
+    def poll(self):
+        """Sample progress of running transfers; one 'changed' per tick."""
+        now = time.monotonic()
+        elapsed = max(now - self.last_poll, 1e-3)
+        self.last_poll = now
+        delta_total = 0
+        for download in self.active():
+            received = download.item.receivedBytes()
+            delta = received - download.received
+            download.received = received
+            download.total = download.item.totalBytes()
+            download.rate = 0.7 * download.rate + 0.3 * (delta / elapsed)
+            delta_total += delta
+        self.rate = 0.7 * self.rate + 0.3 * (delta_total / elapsed)
+        if not self.active():
+            self.timer.stop()
+            self.rate = 0.0
+        self.changed.emit()
+
+    def stats(self):
+        """Aggregate throughput (bytes/s), remaining bytes and ETA (s)."""
+        running = [d for d in self.downloads if d.state in (ACTIVE, QUEUED)]
+        remaining = sum(max(d.total - d.received, 0) for d in running if d.total > 0)
+        return {
+            "active": len(self.active()),
+            "queued": sum(d.state == QUEUED for d in self.downloads),
+            "done": sum(d.state == DONE for d in self.downloads),
+            "rate": round(self.rate),
+            "remaining": remaining,
+            "eta": remaining / self.rate if self.rate > 0 and remaining else None,
+        }
+
+
+def human_bytes(n):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if n < 1024 or unit == "GiB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+
+
+class DownloadsDock(QDockWidget):
+    """Table of transfers with a context menu and an aggregate status line."""
+    COLUMNS = ("File", "Host", "Progress", "Size", "Speed", "ETA", "State", "Priority")
+
+    def __init__(self, main_window, manager):
+        super().__init__("Downloads", main_window)
+        self.manager = manager
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.table.customContextMenuRequested.connect(self.context_menu)
+        self.status = QLabel()
+
+        body = QWidget()
+        layout = QVBoxLayout(body)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.table)
+        layout.addWidget(self.status)
+        self.setWidget(body)
+
+        manager.changed.connect(self.refresh)
+        manager.added.connect(lambda _: self.show())
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+
+    def refresh(self):
+        if not self.isVisible():
+            return
+        rows = self.manager.downloads
+        self.table.setRowCount(len(rows))
+        for r, d in enumerate(rows):
+            progress = f"{100 * d.received // d.total} %" if d.total > 0 else human_bytes(d.received)
+            eta = d.eta()
+            values = (
+                d.name, d.host, progress, human_bytes(d.total) if d.total > 0 else "?",
+                human_bytes(d.rate) + "/s" if d.state == ACTIVE else "",
+                f"{eta:.0f} s" if eta is not None and d.state == ACTIVE else "",
+                d.state, str(d.priority),
+            )
+            for c, value in enumerate(values):
+                self.table.setItem(r, c, QTableWidgetItem(value))
+        stats = self.manager.stats()
+        eta = f", ETA {stats['eta']:.0f} s" if stats["eta"] is not None else ""
+        self.status.setText(
+            f"{stats['active']} active, {stats['queued']} queued, "
+            f"{human_bytes(stats['rate'])}/s{eta}")
+
+    def context_menu(self, pos):
+        row = self.table.rowAt(pos.y())
+        if row < 0:
+            return
+        d = self.manager.downloads[row]
+        menu = QMenu(self)
+        menu.addAction("Pause", lambda: self.manager.pause(d)).setEnabled(
+            d.state in (QUEUED, ACTIVE))
+        menu.addAction("Resume", lambda: self.manager.resume(d)).setEnabled(
+            d.state in (PAUSED, FAILED))
+        menu.addAction("Cancel", lambda: self.manager.cancel(d)).setEnabled(
+            d.state not in (DONE, CANCELLED))
+        menu.addSeparator()
+        menu.addAction("Raise Priority", lambda: self.manager.set_priority(d, d.priority + 1))
+        menu.addAction("Lower Priority", lambda: self.manager.set_priority(d, d.priority - 1))
+        menu.addSeparator()
+        menu.addAction("Open Folder", lambda: QDesktopServices.openUrl(
+            QUrl.fromLocalFile(os.path.dirname(d.item.path()))))
+        menu.exec_(self.table.viewport().mapToGlobal(pos))
@@ -0,0 +1,306 @@
+"""EasyList-style filter lists compiled into fast matching structures.
+
+Pure Python (no Qt) so it can be benchmarked and cached on its own; the
+Qt request interceptor lives in adblock.py.
+
+Supported: '||host^' domain rules (hash set), URL patterns with '*', '^'
+and '|' anchors, '@@' exceptions, and the options third-party / 1p / 3p,
+domain=, and resource types. Cosmetic rules and rules with unsupported
+options are skipped rather than applied too broadly.
+"""
+import hashlib
+import os
+import pickle
+import re
+
+from paths import write_atomic
+
+ENGINE_VERSION = 2
+
+TOKEN_RE   = re.compile(r"[a-z0-9%]+")
+PATTERN_TOKEN_RE = re.compile(r"[a-z0-9%]{3,}")
+HOST_RULE_RE = re.compile(r"^\|\|([a-z0-9.-]+)\^?$")
+
+# Tokens so common that indexing a rule under them would not narrow anything
+BAD_TOKENS = {"http", "https", "www", "com", "net", "org", "html", "js"}
+
+RESOURCE_TYPES = {
+    "script", "image", "stylesheet", "object", "xmlhttprequest", "subdocument",
+    "ping", "media", "font", "other", "websocket",
+}
+TYPE_ALIASES = {"xhr": "xmlhttprequest", "css": "stylesheet", "frame": "subdocument"}
+IGNORED_OPTIONS = {"important", "match-case", "all"}
+
+
+def base_domain(host):
+    """Last two labels of the host: a cheap stand-in for the registrable domain."""
+    return ".".join(host.rsplit(".", 2)[-2:])
+
+
+def domain_in(host, domains):
+    """True if 'host' or one of its parent domains is in 'domains'."""
+    while host:
+        if host in domains:
+            return True
+        dot = host.find(".")
+        if dot < 0:
+            return False
+        host = host[dot + 1:]
+    return False
+
+
+def pattern_to_regex(pattern):
+    if len(pattern) > 1 and pattern.startswith("/") and pattern.endswith("/"):
+        return pattern[1:-1]
+    out = []
+    if pattern.startswith("||"):
+        out.append(r"^[a-z][a-z0-9+.-]*://(?:[^/?#]*\.)?")
+        pattern = pattern[2:]
+    elif pattern.startswith("|"):
+        out.append("^")
+        pattern = pattern[1:]
+    end = ""
+    if pattern.endswith("|"):
+        end = "$"
+        pattern = pattern[:-1]
+    for ch in pattern:
+        if ch == "*":
+            out.append(".*")
+        elif ch == "^":
+            out.append(r"(?:[^\w.%-]|$)")
+        else:
+            out.append(re.escape(ch))
+    return "".join(out) + end
+
+
+def pattern_tokens(pattern):
+    """Tokens that must appear as whole URL tokens for the pattern to match."""
+    if pattern.startswith("/") and pattern.endswith("/"):
+        return []
+    tokens = []
+    for m in PATTERN_TOKEN_RE.finditer(pattern):
+        start, end = m.span()
+        # At an unanchored edge or next to '*' the URL token may be longer
+        if start == 0 or pattern[start - 1] == "*":
+            continue
+        if end == len(pattern) or pattern[end] == "*":
+            continue
+        if m.group() not in BAD_TOKENS:
+            tokens.append(m.group())
+    return tokens
+
+
+class Rule:
+    """One URL pattern rule; the regex is compiled on first use."""
+    __slots__ = ("source", "types", "third_party", "include", "exclude", "_regex")
+
+    def __init__(self, source, types=None, third_party=None, include=None, exclude=None):
+        self.source = source
+        self.types = types
+        self.third_party = third_party
+        self.include = include
+        self.exclude = exclude
+        self._regex = None
+
+    def __getstate__(self):
+        return (self.source, self.types, self.third_party, self.include, self.exclude)
+
+    def __setstate__(self, state):
+        self.source, self.types, self.third_party, self.include, self.exclude = state
+        self._regex = None
+
+    def matches(self, url, rtype, third_party, page_host):
+        if self.types is not None and rtype not in self.types:
+            return False
+        if self.third_party is not None and self.third_party != third_party:
+            return False
+        if self.include is not None and not domain_in(page_host, self.include):
+            return False
+        if self.exclude is not None and domain_in(page_host, self.exclude):
+            return False
+        if self._regex is None:
+            self._regex = re.compile(self.source)
+        return self._regex.search(url) is not None
+
+
+def parse_options(text):
+    """Rule options -> keyword arguments for Rule, or None if unsupported."""
+    types, negated = set(), set()
+    kwargs = {}
+    for opt in text.split(","):
+        opt = opt.strip()
+        neg = opt.startswith("~")
+        name = opt.lstrip("~")
+        name = TYPE_ALIASES.get(name, name)
+        if name in ("third-party", "3p"):
+            kwargs["third_party"] = not neg
+        elif name in ("first-party", "1p"):
+            kwargs["third_party"] = neg
+        elif name in RESOURCE_TYPES:
+            (negated if neg else types).add(name)
+        elif name.startswith("domain="):
+            domains = name[len("domain="):].split("|")
+            include = frozenset(d for d in domains if not d.startswith("~"))
+            exclude = frozenset(d[1:] for d in domains if d.startswith("~"))
+            kwargs["include"] = include or None
+            kwargs["exclude"] = exclude or None
+        elif name in IGNORED_OPTIONS:
+            continue
+        else:
+            return None
+    if types or negated:
+        kwargs["types"] = frozenset(types or RESOURCE_TYPES - negated)
+    return kwargs
+
+
+class RuleSet:
+    """Domain hash set plus a token-indexed pattern matcher.
+
+    Each pattern rule is filed under one token that any matching URL must
+    contain, so a request only checks the rules of its own URL tokens.
+    finalize() picks, per rule, the token shared by the fewest rules.
+    """
+
+    def __init__(self):
+        self.domains = set()
+        self.index = {}         # token -> [Rule]
+        self.fallback = []      # rules without a usable token
+        self._pending = []
+
+    def add_pattern(self, pattern, options):
+        is_regex = len(pattern) > 1 and pattern.startswith("/") and pattern.endswith("/")
+        if not is_regex:
+            pattern = pattern.lower()
+        rule = Rule(pattern_to_regex(pattern), **options)
+        self._pending.append((rule, pattern_tokens(pattern)))
+
+    def finalize(self):
+        counts = {}
+        for _, tokens in self._pending:
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+        for rule, tokens in self._pending:
+            if tokens:
+                token = min(tokens, key=lambda t: (counts[t], -len(t)))
+                self.index.setdefault(token, []).append(rule)
+            else:
+                self.fallback.append(rule)
+        self._pending = []
+
+    def match(self, url, tokens, host, rtype, third_party, page_host):
+        if self.domains and domain_in(host, self.domains):
+            return True
+        index = self.index
+        for token in tokens & index.keys():
+            for rule in index[token]:
+                if rule.matches(url, rtype, third_party, page_host):
+                    return True
+        for rule in self.fallback:
+            if rule.matches(url, rtype, third_party, page_host):
+                return True
+        return False
+
+    def __len__(self):
+        return len(self.domains) + len(self.fallback) + sum(map(len, self.index.values()))
+
+
+class FilterEngine:
+    """Compiled block and exception rules of one or more filter lists."""
+
+    def __init__(self):
+        self.block = RuleSet()
+        self.allow = RuleSet()
+        self.skipped = 0
+
+    @classmethod
+    def parse(cls, lines):
+        engine = cls()
+        for line in lines:
+            engine.add_rule(line.strip())
+        engine.block.finalize()
+        engine.allow.finalize()
+        return engine
+
+    def add_rule(self, line):
+        if not line or line.startswith(("!", "[")) or "##" in line or "#@#" in line \
+                or "#?#" in line or "#$#" in line:
+            return
+        target = self.block
+        if line.startswith("@@"):
+            target = self.allow
+            line = line[2:]
+
+        pattern, options = line, {}
+        dollar = line.rfind("$")
+        if dollar == 0:
+            # Options-only rule ("$third-party,script"): it would apply to
+            # every URL, which the token index cannot serve; not supported
+            self.skipped += 1
+            return
+        if dollar > 0 and not line.endswith("/"):
+            pattern = line[:dollar]
+            options = parse_options(line[dollar + 1:].lower())
+            if options is None:
+                self.skipped += 1
+                return
+        if not pattern or pattern in ("*", "|", "||"):
+            self.skipped += 1
+            return
+
+        host = HOST_RULE_RE.match(pattern.lower())
+        if host and not options:
+            target.domains.add(host.group(1))
+        else:
+            target.add_pattern(pattern, options)
+
+    def should_block(self, url, host, page_host="", rtype="other"):
+        """True if a block rule matches and no exception rule does."""
+        url = url.lower()
+        host = host.lower()
+        page_host = page_host.lower()
+        third_party = bool(page_host) and base_domain(host) != base_domain(page_host)
+        tokens = set(TOKEN_RE.findall(url))
+        if not self.block.match(url, tokens, host, rtype, third_party, page_host):
+            return False
+        return not self.allow.match(url, tokens, host, rtype, third_party, page_host)
+
+    def stats(self):
+        return {
+            "block_domains": len(self.block.domains),
+            "block_rules": len(self.block) - len(self.block.domains),
+            "allow_rules": len(self.allow),
+            "unindexed_rules": len(self.block.fallback) + len(self.allow.fallback),
+            "skipped_rules": self.skipped,
+        }
+
+
+def load_lists(paths, cache_dir=None):
+    """Compile the filter lists, reusing a pickled engine when unchanged.
+
+    The cache key is a digest of the list contents, so editing or updating
+    a list invalidates it while restarts with the same lists skip parsing.
+    """
+    digest = hashlib.sha256(b"v%d" % ENGINE_VERSION)
+    texts = []
+    for path in paths:
+        with open(path, "rb") as f:
+            data = f.read()
+        digest.update(data)
+        texts.append(data.decode("utf-8", "replace"))
+
+    cache = None
+    if cache_dir:
+        cache = os.path.join(cache_dir, digest.hexdigest()[:32] + ".pickle")
+        try:
+            with open(cache, "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError, AttributeError):
+            pass
+
+    engine = FilterEngine.parse(line for text in texts for line in text.splitlines())
+    if cache:
+        for name in os.listdir(cache_dir):
+            if name.endswith(".pickle"):
+                os.unlink(os.path.join(cache_dir, name))
+        write_atomic(cache, pickle.dumps(engine, pickle.HIGHEST_PROTOCOL), "wb")
+    return engine
@@ -0,0 +1,265 @@
+"""Browsing history: SQLite store, in-memory completion index, URL normalization."""
+import bisect
+import heapq
+import ipaddress
+import itertools
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+from PyQt5.QtCore import Qt, QObject, QStringListModel, pyqtSignal
+from PyQt5.QtWidgets import QCompleter
+
+from paths import DATA_DIR
+
+HISTORY_PATH = os.path.join(DATA_DIR, "history.db")
+
+SCHEMES  = ("http://", "https://", "file://", "about:", "data:", "view-source:", "chrome:")
+SKIPPED  = ("about:", "data:", "view-source:", "chrome:")
+WORD_RE  = re.compile(r"[a-z0-9]+")
+PREFIX_RE = re.compile(r"^(?:https?://)?(?:www\.)?")
+
+
+def normalize_url(text):
+    """Turn URL bar input into a URL, preferring https:// for bare hosts.
+
+    localhost, IP addresses and single-label (intranet) hosts keep http://,
+    since they rarely serve TLS and an https attempt would just fail.
+    """
+    text = text.strip()
+    if text.lower().startswith(SCHEMES):
+        return text
+    host = re.split(r"[/:?#]", text, 1)[0].lower()
+    try:
+        ipaddress.ip_address(host)
+        is_ip = True
+    except ValueError:
+        is_ip = False
+    if host == "localhost" or is_ip or "." not in host:
+        return "http://" + text
+    return "https://" + text
+
+
+def completion_key(url):
+    """'https://www.Example.com/x' -> 'example.com/x' (what users type)."""
+    return PREFIX_RE.sub("", url.lower(), 1)
+
+
+class HistoryIndex:
+    """In-memory prefix and word index over history entries.
+
+    Prefix lookups bisect a sorted key list; word lookups bisect a sorted
+    vocabulary. At most 'scan' candidates are ranked per query, which keeps
+    completions well under a millisecond with hundreds of thousands of URLs.
+    """
+
+    def __init__(self, scan=200):
+        self.scan = scan
+        self.entries = {}       # url -> [title, visits, last_visit]
+        self.keys = []          # sorted (completion key, url)
+        self.words = {}         # word -> set of urls
+        self.vocab = []         # sorted words
+
+    def __len__(self):
+        return len(self.entries)
+
+    @classmethod
+    def build(cls, rows, scan=200):
+        """Bulk-load (url, title, visits, last_visit) rows."""
+        index = cls(scan)
+        for url, title, visits, last_visit in rows:
+            index.entries[url] = [title or "", visits, last_visit]
+            for word in index._tokens(url, title):
+                index.words.setdefault(word, set()).add(url)
+        index.keys = sorted((completion_key(url), url) for url in index.entries)
+        index.vocab = sorted(index.words)
+        return index
+
+    def _tokens(self, url, title):
+        return set(WORD_RE.findall(completion_key(url))) | set(WORD_RE.findall((title or "").lower()))
+
+    def add(self, url, title=None, visits=1, last_visit=None):
+        """Record visits and/or a new title for 'url'."""
+        entry = self.entries.get(url)
+        if entry is None:
+            entry = self.entries[url] = ["", 0, 0.0]
+            bisect.insort(self.keys, (completion_key(url), url))
+        entry[1] += visits
+        entry[2] = last_visit or time.time()
+        if title:
+            entry[0] = title
+        for word in self._tokens(url, title):
+            urls = self.words.get(word)
+            if urls is None:
+                urls = self.words[word] = set()
+                bisect.insort(self.vocab, word)
+            urls.add(url)
+
+    def merge(self, other):
+        """Fold entries recorded into 'other' (e.g. while loading) into self."""
+        for url, (title, visits, last_visit) in other.entries.items():
+            self.add(url, title, visits, last_visit)
+
+    def score(self, url, now):
+        _, visits, last_visit = self.entries[url]
+        age_days = max(0.0, now - last_visit) / 86400
+        return visits / (1 + age_days / 7)
+
+    def _prefix(self, prefix):
+        start = bisect.bisect_left(self.keys, (prefix, ""))
+        for key, url in self.keys[start:start + self.scan]:
+            if not key.startswith(prefix):
+                break
+            yield url
+
+    def _postings(self, prefix):
+        """URL sets of the (at most 'scan') words starting with 'prefix'."""
+        start = bisect.bisect_left(self.vocab, prefix)
+        sets = []
+        for word in self.vocab[start:start + self.scan]:
+            if not word.startswith(prefix):
+                break
+            sets.append(self.words[word])
+        return sets
+
+    def _word_matches(self, terms):
+        """URLs containing a word for every term, driven by the rarest term."""
+        postings = sorted(((sum(map(len, sets)), term, sets)
+                           for term in terms for sets in [self._postings(term)]),
+                          key=lambda p: p[0])
+        if not postings or postings[0][0] == 0:
+            return
+        others = [term for _, term, _ in postings[1:]]
+        for url in itertools.islice(itertools.chain.from_iterable(postings[0][2]), self.scan):
+            # Substring test instead of re-tokenizing: cheap and close enough
+            if others:
+                text = url.lower() + " " + self.entries[url][0].lower()
+                if not all(t in text for t in others):
+                    continue
+            yield url
+
+    def complete(self, text, limit=8):
+        """Best URLs for the typed text: prefix matches first, then words."""
+        text = completion_key(text.strip())
+        if not text:
+            return []
+        now = time.time()
+        ranked = heapq.nlargest(limit, self._prefix(text), key=lambda u: self.score(u, now))
+
+        if len(ranked) < limit:
+            seen = set(ranked)
+            extra = (u for u in self._word_matches(WORD_RE.findall(text)) if u not in seen)
+            ranked += heapq.nlargest(limit - len(ranked), extra,
+                                     key=lambda u: self.score(u, now))
+        return ranked
+
+
+class HistoryStore(QObject):
+    """History persisted to SQLite (WAL) by a writer thread.
+
+    The GUI thread only touches the in-memory index; the database is read
+    once in the background at start-up and written in batches afterwards.
+    """
+    loaded = pyqtSignal(object)     # HistoryIndex, emitted from the loader thread
+
+    def __init__(self, parent=None, path=HISTORY_PATH):
+        super().__init__(parent)
+        self.path = path
+        self.index = HistoryIndex()
+        self.ready = path is None
+        self.queue = queue.Queue()
+        self.loaded.connect(self._on_loaded)
+        if path:
+            self.thread = threading.Thread(target=self._run, name="history", daemon=True)
+            self.thread.start()
+
+    def record(self, url, title=None, visit=True):
+        """Called on urlChanged (visit) and titleChanged (title only)."""
+        if not url or url.startswith(SKIPPED):
+            return
+        visits = 1 if visit else 0
+        now = time.time()
+        self.index.add(url, title, visits, now)
+        if self.path:
+            self.queue.put((url, title, visits, now))
+
+    def complete(self, text, limit=8):
+        return self.index.complete(text, limit)
+
+    def close(self):
+        """Flush pending writes and stop the writer thread."""
+        if self.path:
+            self.queue.put(None)
+            self.thread.join(timeout=5)
+
+    def _on_loaded(self, index):
+        # Visits recorded while the database was loading live in self.index
+        index.merge(self.index)
+        self.index = index
+        self.ready = True
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        db = sqlite3.connect(self.path)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS history ("
+            " url TEXT PRIMARY KEY, title TEXT, visits INTEGER NOT NULL DEFAULT 0,"
+            " last_visit REAL NOT NULL DEFAULT 0)"
+        )
+        return db
+
+    def _run(self):
+        db = self._connect()
+        rows = db.execute("SELECT url, title, visits, last_visit FROM history").fetchall()
+        self.loaded.emit(HistoryIndex.build(rows))
+
+        while True:
+            item = self.queue.get()
+            batch = [item]
+            # Group whatever else is already queued into the same transaction
+            while item is not None and len(batch) < 500:
+                try:
+                    item = self.queue.get(timeout=0.2)
+                except queue.Empty:
+                    break
+                batch.append(item)
+            stop = None in batch
+            db.executemany(
+                "INSERT INTO history (url, title, visits, last_visit) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET visits = visits + excluded.visits,"
+                " last_visit = excluded.last_visit,"
+                " title = COALESCE(excluded.title, history.title)",
+                [row for row in batch if row is not None],
+            )
+            db.commit()
+            if stop:
+                db.close()
+                return
+
+
+class HistoryCompleter(QCompleter):
+    """URL bar completer fed from the history index on every keystroke.
+
+    One instance is shared by all URL bars: QLineEdit re-targets its
+    completer to itself when it gains focus.
+    """
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.model = QStringListModel(self)
+        self.setModel(self.model)
+        self.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.setCaseSensitivity(Qt.CaseInsensitive)
+
+    def attach(self, line_edit):
+        line_edit.setCompleter(self)
+        line_edit.textEdited.connect(self.update_model)
+
+    def update_model(self, text):
+        self.model.setStringList(self.store.complete(text))
@@ -0,0 +1,175 @@
+"""Pane layouts as trees of nested QSplitters: flat splits, grids, 2D navigation.
+
+A layout is described by a plain dict (the form stored in the session):
+
+    {"orientation": "vertical", "sizes": [1, 1], "children": [
+        {"orientation": "horizontal", "children": [{"url": ...}, {"url": ...}]},
+        {"url": ...},
+    ]}
+
+Leaves are panes; build_tree() creates them through a callback, so a spec can
+also carry existing panes ({"pane": pane}) to rearrange them.
+"""
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QSplitter
+
+ORIENTATIONS = {Qt.Horizontal: "horizontal", Qt.Vertical: "vertical"}
+BY_NAME = {name: o for o, name in ORIENTATIONS.items()}
+
+DIRECTIONS = ("left", "right", "up", "down")
+
+
+def flat_spec(orientation, leaves, sizes=None):
+    spec = {"orientation": ORIENTATIONS[orientation], "children": list(leaves)}
+    if sizes:
+        spec["sizes"] = list(sizes)
+    return spec
+
+
+def grid_spec(rows, cols, leaves):
+    """'rows' horizontal splitters of 'cols' leaves each, stacked vertically."""
+    if rows == 1:
+        return flat_spec(Qt.Horizontal, leaves)
+    if cols == 1:
+        return flat_spec(Qt.Vertical, leaves)
+    return flat_spec(Qt.Vertical, [
+        flat_spec(Qt.Horizontal, leaves[r * cols:(r + 1) * cols]) for r in range(rows)
+    ])
+
+
+def is_flat(spec):
+    return all("children" not in child for child in spec["children"])
+
+
+def new_splitter(orientation, on_moved=None):
+    splitter = QSplitter(orientation)
+    splitter.setHandleWidth(6)
+    if on_moved is not None:
+        splitter.splitterMoved.connect(on_moved)
+    return splitter
+
+
+def build_tree(spec, make_pane, on_moved=None):
+    """Splitter tree for 'spec'; the root is always a QSplitter.
+
+    The whole tree is assembled before the caller inserts it, so it costs
+    one layout pass however many panes it holds.
+    """
+    if "children" not in spec:
+        spec = {"orientation": "horizontal", "children": [spec]}
+    splitter = new_splitter(BY_NAME.get(spec.get("orientation"), Qt.Horizontal), on_moved)
+    for child in spec["children"]:
+        if "children" in child:
+            splitter.addWidget(build_tree(child, make_pane, on_moved))
+        else:
+            splitter.addWidget(make_pane(child))
+    sizes = spec.get("sizes")
+    splitter.setSizes(sizes if sizes and len(sizes) == splitter.count()
+                      else [1] * splitter.count())
+    return splitter
+
+
+def describe(node, saved=None):
+    """Spec of a splitter tree; 'saved' overrides sizes (pane full screen)."""
+    if not isinstance(node, QSplitter):
+        return node.describe()
+    sizes = (saved or {}).get(node) or node.sizes()
+    return {
+        "orientation": ORIENTATIONS[node.orientation()],
+        "sizes": list(sizes),
+        "children": [describe(node.widget(i), saved) for i in range(node.count())],
+    }
+
+
+def leaves(node):
+    """Panes of a splitter tree, depth first (reading order for grids)."""
+    if not isinstance(node, QSplitter):
+        return [node]
+    out = []
+    for i in range(node.count()):
+        out += leaves(node.widget(i))
+    return out
+
+
+def maximize(pane, root):
+    """Give 'pane' the whole space of every splitter above it.
+
+    Only the splitters on the path to the root change; their previous
+    sizes are returned for restore_sizes(). The collapsed siblings are
+    hidden too: a zero-size widget still counts as visible, and Qt
+    WebEngine refuses to freeze or discard a page whose view is visible.
+    """
+    saved = {}
+    child = pane
+    while child is not root:
+        splitter = child.parentWidget()
+        sizes = splitter.sizes()
+        saved[splitter] = sizes
+        index = splitter.indexOf(child)
+        new = [0] * len(sizes)
+        new[index] = sum(sizes)
+        splitter.setSizes(new)
+        for i in range(splitter.count()):
+            if i != index:
+                splitter.widget(i).hide()
+        child = splitter
+    return saved
+
+
+def restore_sizes(saved):
+    """Show the siblings maximize() hid and give back their sizes."""
+    for splitter, sizes in saved.items():
+        for i in range(splitter.count()):
+            splitter.widget(i).show()
+        splitter.setSizes(sizes)
+
+
+def pane_rects(node, saved=None, rect=(0.0, 0.0, 1.0, 1.0), out=None):
+    """Rectangle of every pane in units of the tab (0..1 on both axes).
+
+    Computed from splitter sizes, using the saved ones in pane full
+    screen, so it is meaningful even while panes are collapsed.
+    """
+    if out is None:
+        out = {}
+    if not isinstance(node, QSplitter):
+        out[node] = rect
+        return out
+    sizes = (saved or {}).get(node) or node.sizes()
+    total = sum(sizes)
+    if not total:
+        sizes, total = [1] * node.count(), node.count()
+    x0, y0, x1, y1 = rect
+    start = 0
+    for i, size in enumerate(sizes):
+        a, b = start / total, (start + size) / total
+        start += size
+        if node.orientation() == Qt.Horizontal:
+            sub = (x0 + (x1 - x0) * a, y0, x0 + (x1 - x0) * b, y1)
+        else:
+            sub = (x0, y0 + (y1 - y0) * a, x1, y0 + (y1 - y0) * b)
+        pane_rects(node.widget(i), saved, sub, out)
+    return out
+
+
+def neighbour(rects, pane, direction):
+    """Nearest pane in 'direction' sharing an edge span with 'pane', or None."""
+    x0, y0, x1, y1 = rects[pane]
+    best, best_key = None, None
+    for other, (a0, b0, a1, b1) in rects.items():
+        if other is pane:
+            continue
+        if direction in ("left", "right"):
+            gap = x0 - a1 if direction == "left" else a0 - x1
+            overlap = min(y1, b1) - max(y0, b0)
+            offset = abs((b0 + b1) - (y0 + y1))
+        else:
+            gap = y0 - b1 if direction == "up" else b0 - y1
+            overlap = min(x1, a1) - max(x0, a0)
+            offset = abs((a0 + a1) - (x0 + x1))
+        if gap < -1e-6 or overlap <= 1e-6:
+            continue
+        key = (round(gap, 6), offset)
+        if best_key is None or key < best_key:
+            best, best_key = other, key
+    return best
@@ -0,0 +1,100 @@
+"""Visibility-aware page lifecycle manager for SplitBrowser panes."""
+import time
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtWebEngineWidgets import QWebEnginePage
+
+ACTIVE    = QWebEnginePage.LifecycleState.Active
+FROZEN    = QWebEnginePage.LifecycleState.Frozen
+DISCARDED = QWebEnginePage.LifecycleState.Discarded
+
+STATE_NAMES = {ACTIVE: "active", FROZEN: "frozen", DISCARDED: "discarded"}
+
+
+def is_pane_visible(pane):
+    """True when the pane is on the current tab and has a non-zero size."""
+    return pane.isVisible() and pane.width() > 0 and pane.height() > 0
+
+
+class PageLifecycleManager(QObject):
+    """Freeze pages that stay hidden for 'freeze_after' ms, wake them when shown.
+
+    freeze_after=None never freezes (pages are still woken when shown).
+
+    MainWindow calls schedule() whenever visibility may have changed (tab
+    switch, split, pane full-screen); a single timer handles both that
+    deferred update and the freeze delays.
+    """
+    stateChanged = pyqtSignal(object, str)   # pane, new state name
+
+    def __init__(self, main_window, freeze_after=30000):
+        super().__init__(main_window)
+        self.main = main_window
+        self.freeze_after = freeze_after
+        self.hidden_since = {}
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.update)
+
+    def set_freeze_after(self, ms):
+        self.freeze_after = ms
+        self.update()
+
+    def schedule(self):
+        """Coalesce visibility changes into one update() on the next loop pass."""
+        self.timer.start(0)
+
+    def set_state(self, pane, state):
+        """Move the pane's page to 'state' if it differs from the current one.
+
+        Returns whether the page is in 'state' afterwards: Qt keeps a page
+        whose view is visible Active whatever is asked.
+        """
+        page = pane.webview.page()
+        if page.lifecycleState() == state:
+            return True
+        page.setLifecycleState(state)
+        if page.lifecycleState() != state:
+            return False
+        self.stateChanged.emit(pane, STATE_NAMES[state])
+        return True
+
+    def update(self):
+        """Wake visible panes, freeze those hidden long enough, re-arm the timer."""
+        now = time.monotonic()
+        hidden_since = {}
+        next_due = None
+
+        for pane in self.main.all_panes():
+            if pane.webview is None:
+                continue
+            if is_pane_visible(pane):
+                self.set_state(pane, ACTIVE)
+                continue
+
+            since = self.hidden_since.get(pane, now)
+            hidden_since[pane] = since
+            if self.freeze_after is None or pane.webview.page().lifecycleState() != ACTIVE:
+                continue
+            remaining = since + self.freeze_after / 1000 - now
+            if remaining <= 0:
+                self.set_state(pane, FROZEN)
+            elif next_due is None or remaining < next_due:
+                next_due = remaining
+
+        self.hidden_since = hidden_since
+        if next_due is None:
+            self.timer.stop()
+        else:
+            self.timer.start(int(next_due * 1000) + 1)
+
+    def counts(self):
+        """Number of panes per lifecycle state ('unloaded' = still lazy)."""
+        result = {"active": 0, "frozen": 0, "discarded": 0, "unloaded": 0}
+        for pane in self.main.all_panes():
+            if pane.webview is None:
+                result["unloaded"] += 1
+            else:
+                result[STATE_NAMES[pane.webview.page().lifecycleState()]] += 1
+        return result
@@ -1,19 +1,79 @@
 #!/usr/bin/env python3
+import logging
+import os
 import sys
-from PyQt5.QtCore import Qt, QUrl
+import time
+from contextlib import contextmanager
+from PyQt5.QtCore import Qt, QUrl, QTimer
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QAction, QMenu, QHBoxLayout, QVBoxLayout,
-    QSplitter, QLineEdit, QPushButton, QWidget, QTabWidget, QShortcut
+    QLineEdit, QPushButton, QWidget, QTabWidget, QShortcut, QLabel, QFileDialog,
+    QInputDialog, QMessageBox,
 )
 from PyQt5.QtGui import QKeySequence
-from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEngineProfile
+from PyQt5.QtWebEngineWidgets import QWebEngineProfile, QWebEnginePage
+from PyQt5 import sip
+
+from lifecycle import PageLifecycleManager
+from memory import MemoryGovernor
+from session import SessionManager, SESSION_PATH
+from registry import PaneRegistry
+from metrics import MetricsCollector, MetricsDock
+from adblock import RequestInterceptor, ContentBlocker
+from pool import WebViewPool
+from history import HistoryStore, HistoryCompleter, HISTORY_PATH, normalize_url
+from snapshots import SnapshotStore, SNAPSHOT_DIR, origin_of
+from remote import RemoteControl, server_running
+from refresh import RefreshScheduler, INTERVALS
+from downloads import DownloadManager, DownloadsDock, DOWNLOAD_DIR
+from thumbnails import ThumbnailCache, TabPreview, TabOverview, SPILL_DIR
+from predictor import Predictor
+from profiling import Profiler, PROFILE_DIR, instrument
+from textsearch import PageSearch, SearchDialog
+from netlog import NetworkLog, HAR_DIR
+from profiles import ProfileManager, DEFAULT_PROFILE, check_name
+from startup import StartupTimer, mark
+from layout import (
+    BY_NAME, build_tree, flat_spec, grid_spec, is_flat, leaves, new_splitter,
+    maximize, restore_sizes, pane_rects, neighbour,
+)
+from config import load_config, apply_engine_flags, apply_profile, window_options
+
+
+DEFAULT_URL = "https://www.google.com"
+
+mark("imports")
+
+
+def start_page_url(start_page, home_url):
+    """URL of the first tab: "home", "blank", a URL or a local HTML file."""
+    if start_page in (None, "", "home"):
+        return home_url
+    if start_page == "blank":
+        return "about:blank"
+    if os.path.isfile(start_page):
+        return QUrl.fromLocalFile(os.path.abspath(start_page)).toString()
+    return start_page
 
 
 class BrowserView(QWidget):
-    """Single browser pane with URL bar, navigation and cache cleaning."""
-    def __init__(self, main_window, url="https://www.google.com"):
+    """Single browser pane with URL bar, navigation and cache cleaning.
+
+    With lazy=True the pane starts as a cheap placeholder and only creates
+    its QWebEngineView the first time it is shown, focused or given a URL.
+    When the snapshot store has a copy of the first URL, that copy is shown
+    at once while a background page loads the live one and replaces it.
+    The page belongs to the named browser profile 'profile'.
+    """
+    def __init__(self, main_window, url=DEFAULT_URL, lazy=False, profile=DEFAULT_PROFILE):
         super().__init__()
         self.main = main_window
+        self.pending_url = url
+        self.profile_name = check_name(profile)
+        self.webview = None
+        self.snapshot_of = None     # live URL while a snapshot is displayed
+        self.fresh_page  = None     # background page replacing the snapshot
+        self.refresh_interval = None
 
         # Navigation controls
         self.url_bar            = QLineEdit(url)
@@ -21,62 +81,330 @@ class BrowserView(QWidget):
         self.forward_button     = QPushButton("▶")
         self.reload_button      = QPushButton("⟳")
         self.clear_cache_button = QPushButton("🗑")
+        self.clear_snapshots_button = QPushButton("📷")
         self.go_button          = QPushButton("Go")
-
-        self.back_button.clicked.connect(lambda: self.webview.back())
-        self.forward_button.clicked.connect(lambda: self.webview.forward())
-        self.reload_button.clicked.connect(lambda: self.webview.reload())
+        self.clear_cache_button.setToolTip("Clear the HTTP cache of this pane's profile")
+        self.clear_snapshots_button.setToolTip("Forget offline snapshots of this site")
+
+        self.back_button.clicked.connect(lambda: self.ensure_webview().back())
+        self.forward_button.clicked.connect(lambda: self.ensure_webview().forward())
+        self.reload_button.clicked.connect(self.reload)
+        self.reload_button.setToolTip("Reload (right-click: auto-refresh)")
+        self.reload_button.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.reload_button.customContextMenuRequested.connect(self._refresh_menu)
         self.clear_cache_button.clicked.connect(self.clear_cache)
+        self.clear_snapshots_button.clicked.connect(self.clear_snapshots)
         self.go_button.clicked.connect(self.load_url)
+        self.main.url_completer.attach(self.url_bar)
+        self.url_bar.textEdited.connect(lambda text: self.main.predictor.text_edited(self, text))
 
         top_layout = QHBoxLayout()
         top_layout.setContentsMargins(0, 0, 0, 0)
         for w in (
             self.back_button, self.forward_button,
             self.reload_button, self.clear_cache_button,
-            self.url_bar, self.go_button
+            self.clear_snapshots_button, self.url_bar, self.go_button
         ):
             top_layout.addWidget(w)
 
-        # Web view
-        self.webview = QWebEngineView()
-        self.webview.load(QUrl(url))
-        self.webview.titleChanged.connect(self.update_tab_title)
-        self.webview.installEventFilter(self)
+        # Placeholder shown until the web view is needed
+        self.placeholder = QLabel(url)
+        self.placeholder.setAlignment(Qt.AlignCenter)
+        self.placeholder.setFocusPolicy(Qt.StrongFocus)
+        self.placeholder.setStyleSheet("color: gray;")
+        self.placeholder.installEventFilter(self)
 
         # Main layout
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
         layout.addLayout(top_layout)
-        layout.addWidget(self.webview)
+        layout.addWidget(self.placeholder)
+
+        if not lazy:
+            self.ensure_webview()
+
+    def ensure_webview(self):
+        """Create the web view (and start the pending load) if needed."""
+        if self.webview is None:
+            self.main.start_engine()
+            self.webview = self.main.profiles.new_view(self.profile_name)
+            self.webview.titleChanged.connect(self.update_tab_title)
+            self.webview.titleChanged.connect(
+                lambda title: self.main.history.record(self.url(), title, visit=False))
+            self.webview.urlChanged.connect(self._on_url_changed)
+            self.webview.loadFinished.connect(self._on_load_finished)
+            self.webview.page().linkHovered.connect(self._on_link_hovered)
+            self.webview.installEventFilter(self)
+            self.main.metrics.attach(self)
+            self.main.netlog.attach(self)
+            self.layout().replaceWidget(self.placeholder, self.webview)
+            self.webview.show()
+            had_focus = self.placeholder.hasFocus()
+            self.placeholder.deleteLater()
+            self.placeholder = None
+            if had_focus:
+                self.webview.setFocus()
+            if self.pending_url:
+                snapshot = self.main.snapshots.lookup(self.profile_name, self.pending_url)
+                if snapshot:
+                    self.show_snapshot(self.pending_url, snapshot)
+                else:
+                    self.webview.load(QUrl(self.pending_url))
+                # Drop the pooled view's about:blank entry once the page is in
+                self.webview.loadFinished.connect(self._forget_blank)
+        return self.webview
+
+    def _forget_blank(self):
+        self.webview.loadFinished.disconnect(self._forget_blank)
+        self.webview.page().history().clear()
+
+    def show_snapshot(self, url, path):
+        """Display the stored copy of 'url' and fetch the live page behind it."""
+        self.snapshot_of = url
+        self.webview.load(QUrl.fromLocalFile(path))
+        self.fresh_page = QWebEnginePage(self.webview.page().profile(), self.webview)
+        self.fresh_page.loadFinished.connect(self._on_refreshed)
+        self.fresh_page.load(QUrl(url))
+
+    def _on_refreshed(self, ok):
+        page = self.fresh_page
+        if not ok:
+            # Offline: keep the snapshot, the reload button tries again
+            self._drop_refresh()
+            return
+        self.fresh_page = None
+        self._adopt_page(page)
+        self.main.snapshots.capture(self.profile_name, page, page.url().toString())
+        self.main.thumbnails.schedule(self)
+
+    def _adopt_page(self, page):
+        """Swap a page loaded in the background into the view."""
+        self.snapshot_of = None
+        page.setParent(self.webview)
+        old = self.webview.page()
+        old.linkHovered.disconnect(self._on_link_hovered)
+        self.webview.setPage(page)
+        page.linkHovered.connect(self._on_link_hovered)
+        self.main.netlog.attach(self)
+        if not sip.isdeleted(old) and old.parent() is self.webview:
+            old.deleteLater()
+        self.main.lifecycle.schedule()
+
+    def _drop_refresh(self):
+        if self.fresh_page is not None:
+            self.fresh_page.loadFinished.disconnect(self._on_refreshed)
+            self.fresh_page.deleteLater()
+            self.fresh_page = None
+
+    def _on_url_changed(self, url):
+        if self.snapshot_of is not None:
+            if url.isLocalFile():
+                return
+            # Navigated away from the snapshot before the live page arrived
+            self._drop_refresh()
+            self.snapshot_of = None
+        self.main.history.record(url.toString())
+        self.main.session.schedule()
+        self.main.search.schedule(self)
+
+    def _on_load_finished(self, ok):
+        if ok and self.snapshot_of is None:
+            self.main.snapshots.capture(self.profile_name, self.webview.page(), self.url())
+        self.main.thumbnails.schedule(self)
+        self.main.predictor.loaded(self)
+        self.main.startup.loaded()
+        if ok:
+            self.main.search.schedule(self)
+            self.main.netlog.collect(self)
+
+    def _on_link_hovered(self, url):
+        self.main.predictor.link_hovered(self, url)
+
+    def _refresh_menu(self, pos):
+        menu = QMenu(self)
+        for seconds in (None,) + INTERVALS:
+            if seconds is None:
+                label = "Auto-refresh off"
+            elif seconds < 60:
+                label = f"Every {seconds} s"
+            else:
+                label = f"Every {seconds // 60} min"
+            act = menu.addAction(label)
+            act.setCheckable(True)
+            act.setChecked(self.refresh_interval == seconds)
+            act.triggered.connect(lambda _, s=seconds: self.set_refresh(s))
+        menu.exec_(self.reload_button.mapToGlobal(pos))
+
+    def set_refresh(self, seconds):
+        self.main.refresher.set_interval(self, seconds)
+        self.main.session.schedule()
+
+    def dispose(self):
+        """Tear the pane down, handing its web view back to the pool."""
+        self._drop_refresh()
+        self.main.refresher.remove(self)
+        self.main.memory.forget(self)
+        self.main.predictor.forget_pane(self)
+        self.main.search.remove(self)
+        if self.webview is not None:
+            self.webview.page().linkHovered.disconnect(self._on_link_hovered)
+            self.main.netlog.detach(self)
+            self.webview.removeEventFilter(self)
+            self.main.webview_pool.release(self.webview)
+            self.webview = None
+        self.deleteLater()
+
+    def describe(self):
+        """Layout leaf of this pane, as stored in the session."""
+        leaf = {"url": self.url()}
+        if self.refresh_interval:
+            leaf["refresh"] = self.refresh_interval
+        if self.profile_name != DEFAULT_PROFILE:
+            leaf["profile"] = self.profile_name
+        return leaf
+
+    def url(self):
+        """Current URL, or the one still waiting to be loaded."""
+        if self.webview is None:
+            return self.pending_url
+        if self.snapshot_of is not None:
+            return self.snapshot_of
+        return self.webview.url().toString()
 
     def load_url(self):
-        txt = self.url_bar.text().strip()
-        if not txt.startswith(("http://", "https://")):
-            txt = "http://" + txt
-        self.webview.load(QUrl(txt))
-
-    def update_tab_title(self):
-        idx = self.main.tab_widget.currentIndex()
+        self.navigate(self.url_bar.text())
+        self.ensure_webview()
+
+    def navigate(self, url):
+        """Open 'url' here; a pane without a web view just remembers it."""
+        url = normalize_url(url)
+        self.url_bar.setText(url)
+        if self.webview is None:
+            self.pending_url = url
+            self.placeholder.setText(url)
+            return
+        page, loaded = self.main.predictor.commit(self, url)
+        if page is None:
+            self.webview.load(QUrl(url))
+            return
+        self._drop_refresh()
+        self._adopt_page(page)
+        if loaded:
+            self._on_load_finished(True)
+
+    def reload(self):
+        if self.snapshot_of is not None:
+            self.webview.load(QUrl(self.snapshot_of))
+        else:
+            self.ensure_webview().reload()
+
+    def _schedule_materialize(self):
+        # Defer to the event loop so the layout paints before the renderer
+        # starts; before start_engine() the engine itself is not up yet
+        if (self.webview is None and self.main.engine_started
+                and self.width() > 0 and self.height() > 0):
+            QTimer.singleShot(0, self.ensure_webview)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._schedule_materialize()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._schedule_materialize()
+
+    def update_tab_title(self, title=None):
+        # Look up our own tab: the pane may live in a background one
+        idx = self.main.registry.index(self)
         if idx >= 0:
-            title = self.webview.title() or "New Tab"
-            self.main.tab_widget.setTabText(idx, title)
+            if not title and self.webview is not None:
+                title = self.webview.title()
+            self.main.tab_widget.setTabText(idx, title or "New Tab")
+
+    def set_profile(self, name):
+        """Move the pane to browser profile 'name', reloading its URL there."""
+        if name == self.profile_name:
+            return
+        self.profile_name = check_name(name)
+        if self.webview is not None:
+            url = self.url()
+            self._drop_refresh()
+            self.main.predictor.forget_pane(self)
+            self._adopt_page(self.main.profiles.new_page(name, self.webview))
+            self.webview.load(QUrl(url))
+        self.main.session.schedule()
 
     def clear_cache(self):
-        profile = QWebEngineProfile.defaultProfile()
-        profile.clearHttpCache()
+        self.main.profiles.clear_cache(self.profile_name)
+
+    def clear_site_data(self):
+        origin = origin_of(self.url())
+        self.main.profiles.clear_origin(self.profile_name, origin)
+        self.main.snapshots.clear_origin(self.profile_name, origin)
+
+    def clear_snapshots(self):
+        self.main.snapshots.clear_origin(self.profile_name, origin_of(self.url()))
 
     def eventFilter(self, obj, event):
         # When this pane gains focus, mark it active in MainWindow
-        if obj is self.webview and event.type() == event.FocusIn:
+        if event.type() == event.FocusIn and obj in (self.webview, self.placeholder):
             self.main.set_current_pane(self)
+            if obj is self.placeholder and self.main.engine_started:
+                QTimer.singleShot(0, self.ensure_webview)
         return super().eventFilter(obj, event)
 
 
 class MainWindow(QMainWindow):
     """Main window with tabbed and split browser panes."""
-    def __init__(self):
+    def __init__(self, lazy_panes=True, freeze_after=30000, memory_budget_mb=None,
+                 session_path=SESSION_PATH, home_url=DEFAULT_URL, metrics_export=None,
+                 history_path=HISTORY_PATH, filter_lists=None, content_blocking=True,
+                 webview_pool=2, snapshot_dir=SNAPSHOT_DIR, snapshot_max_mb=256,
+                 control_socket=None, thumbnail_budget_mb=16, thumbnail_dir=SPILL_DIR,
+                 refresh_max_concurrent=2,
+                 download_dir=DOWNLOAD_DIR, max_downloads=3, max_downloads_per_host=2,
+                 speculative_hints=8, max_prerenders=1, profile_dir=None, devtools_port=None,
+                 search_index_mb=32, network_log=500, profiles=None, disk_cache_mb=0,
+                 cache_path=None, start_page=None, defer_engine=True, startup_report=None):
         super().__init__()
+        self.startup    = StartupTimer(self, startup_report)
+        # Slot timing wraps the methods before anything connects to them;
+        # outside a capture a wrapper only checks that nothing is recording
+        instrument(MainWindow, BrowserView)
+        self.profiler   = Profiler(self, profile_dir or PROFILE_DIR, devtools_port)
+        if profile_dir:
+            self.profiler.start()
+        self.home_url   = home_url
+        self.start_url  = start_page_url(start_page, home_url)
+        self.lazy_panes = lazy_panes
+        self.batch_depth = 0
+        self.defer_engine = defer_engine
+        self.engine_started = False
+        self.cache_options = {"disk_cache_mb": disk_cache_mb, "cache_path": cache_path}
+        self.lifecycle  = PageLifecycleManager(self, freeze_after)
+        self.memory     = MemoryGovernor(self, memory_budget_mb)
+        self.session    = SessionManager(self, session_path)
+        self.registry   = PaneRegistry()
+        self.metrics    = MetricsCollector(self, metrics_export)
+        self.thumbnails = ThumbnailCache(self, thumbnail_budget_mb * 2**20, thumbnail_dir)
+        self.refresher  = RefreshScheduler(self, refresh_max_concurrent)
+        self.downloads  = DownloadManager(self, download_dir, max_downloads, max_downloads_per_host)
+        self.history    = HistoryStore(self, history_path)
+        self.url_completer = HistoryCompleter(self.history, self)
+        self.webview_pool = WebViewPool(self, webview_pool)
+        self.snapshots  = SnapshotStore(self, snapshot_dir, snapshot_max_mb * 2**20)
+        self.predictor  = Predictor(self, speculative_hints, max_prerenders)
+        self.search     = PageSearch(self, search_index_mb)
+        self.netlog     = NetworkLog(self, network_log)
+
+        # Request interception (content blocking) on the panes' profiles
+        self.interceptor = RequestInterceptor(self)
+        self.blocker = ContentBlocker(self, filter_lists)
+        self.blocker.set_enabled(content_blocking)
+        self.interceptor.handlers.append(self.blocker.handle)
+        # Named browser profiles; each gets the interceptor and download handlers
+        self.profiles = ProfileManager(self, profiles)
+
         self.setWindowTitle("Split Browser")
         self.resize(1200, 800)
 
@@ -85,7 +413,11 @@ class MainWindow(QMainWindow):
         self.tab_widget.setTabsClosable(True)
         self.tab_widget.tabCloseRequested.connect(self.close_tab)
         self.tab_widget.currentChanged.connect(self.on_tab_changed)
+        self.tab_widget.tabBar().tabMoved.connect(self.registry.move_tab)
         self.setCentralWidget(self.tab_widget)
+        self.tab_preview = TabPreview(self, self.thumbnails)
+        self.overview    = TabOverview(self, self.thumbnails)
+        self.search_dialog = SearchDialog(self, self.search)
 
         # Full-screen actions
         self.full_tab_action = QAction("FullScreen Tab", self,
@@ -96,6 +428,20 @@ class MainWindow(QMainWindow):
                                         shortcut="Shift+F11", checkable=True)
         self.full_pane_action.toggled.connect(self.toggle_full_pane)
 
+        # Per-pane performance panel
+        self.metrics_dock = MetricsDock(self)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.metrics_dock)
+        self.metrics_dock.hide()
+        self.metrics_action = self.metrics_dock.toggleViewAction()
+        self.metrics_action.setShortcut("Ctrl+Shift+M")
+
+        # Downloads panel, shown when a download starts
+        self.downloads_dock = DownloadsDock(self, self.downloads)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.downloads_dock)
+        self.downloads_dock.hide()
+        self.downloads_action = self.downloads_dock.toggleViewAction()
+        self.downloads_action.setShortcut("Ctrl+J")
+
         # Build menu and shortcuts
         self._create_menus()
         self._create_shortcuts()
@@ -104,7 +450,36 @@ class MainWindow(QMainWindow):
         self.current_pane     = None
         self.is_pane_full     = False
 
-        self.add_tab()
+        # Qt WebEngine comes up after the first frame unless told otherwise;
+        # until then every pane is a placeholder
+        self.startup.watch(self.tab_widget)
+        if defer_engine:
+            self.startup.painted.connect(self.start_engine)
+        else:
+            self.start_engine()
+        if not self.session.restore():
+            self.add_tab(url=self.start_url)
+
+        self.remote = RemoteControl(self, control_socket) if control_socket else None
+        mark("window")
+
+    def start_engine(self):
+        """Initialize Qt WebEngine: profiles, the view pool, then the visible panes.
+
+        Runs once, right after the first paint with defer_engine, or
+        earlier when something needs a web view first.
+        """
+        if self.engine_started:
+            return
+        self.engine_started = True
+        mark("engine_start")
+        apply_profile(self.cache_options, QWebEngineProfile.defaultProfile())
+        self.profiles.start()
+        mark("engine_ready")
+        for pane in self.all_panes():
+            if pane.isVisible():
+                pane._schedule_materialize()
+        self.webview_pool.fill()
 
     def _create_menus(self):
         mb = self.menuBar()
@@ -112,7 +487,7 @@ class MainWindow(QMainWindow):
         # File menu
         file_menu = mb.addMenu("File")
         new_tab = QAction("New Tab", self, shortcut="Ctrl+T")
-        new_tab.triggered.connect(self.add_tab)
+        new_tab.triggered.connect(lambda: self.add_tab())
         file_menu.addAction(new_tab)
 
         close_tab = QAction("Close Tab", self, shortcut="Ctrl+W")
@@ -142,10 +517,101 @@ class MainWindow(QMainWindow):
             act_v.triggered.connect(lambda _, c=count: self.split_current(Qt.Vertical, c))
             vert.addAction(act_v)
 
+        grid = split_menu.addMenu("Grid")
+        for rows, cols in ((2, 2), (2, 3), (3, 3), (3, 4), (4, 4)):
+            act_g = QAction(f"{rows} × {cols}", self)
+            act_g.triggered.connect(lambda _, r=rows, c=cols: self.grid_current(r, c))
+            grid.addAction(act_g)
+
+        split_menu.addSeparator()
+        split_right = QAction("Split Pane Right", self, shortcut="Ctrl+Shift+E")
+        split_right.triggered.connect(lambda: self.split_pane(Qt.Horizontal))
+        split_menu.addAction(split_right)
+        split_down = QAction("Split Pane Down", self, shortcut="Ctrl+Shift+D")
+        split_down.triggered.connect(lambda: self.split_pane(Qt.Vertical))
+        split_menu.addAction(split_down)
+
         # View menu
         view_menu = mb.addMenu("View")
         view_menu.addAction(self.full_tab_action)
         view_menu.addAction(self.full_pane_action)
+        view_menu.addSeparator()
+        view_menu.addAction(self.metrics_action)
+        view_menu.addAction(self.downloads_action)
+        overview_act = QAction("Tab Overview", self, shortcut="Ctrl+Shift+O")
+        overview_act.triggered.connect(self.overview.open_overview)
+        view_menu.addAction(overview_act)
+        search_act = QAction("Search Open Pages…", self, shortcut="Ctrl+Shift+F")
+        search_act.triggered.connect(self.search_dialog.open_search)
+        search_act.setEnabled(self.search.enabled)
+        view_menu.addAction(search_act)
+        har_act = QAction("Export Network Log (HAR)…", self, shortcut="Ctrl+Shift+H")
+        har_act.triggered.connect(self.export_har)
+        har_act.setEnabled(self.netlog.enabled)
+        view_menu.addAction(har_act)
+        profile_act = QAction("Record Profile", self, shortcut="Ctrl+Shift+P", checkable=True)
+        profile_act.setChecked(self.profiler.running)
+        profile_act.toggled.connect(self.record_profile)
+        view_menu.addAction(profile_act)
+
+        view_menu.addSeparator()
+        block_act = QAction("Block Ads and Trackers", self, checkable=True)
+        block_act.setChecked(self.blocker.enabled)
+        block_act.toggled.connect(self.blocker.set_enabled)
+        view_menu.addAction(block_act)
+        reload_filters = QAction("Reload Filter Lists", self)
+        reload_filters.triggered.connect(self.blocker.reload)
+        view_menu.addAction(reload_filters)
+
+        # Profiles menu; the profile lists are built when a submenu opens
+        profiles_menu = mb.addMenu("Profiles")
+        for title, apply in (
+            ("New Tab in Profile", self.add_tab),
+            ("Move Tab to Profile", self.set_tab_profile),
+            ("Move Pane to Profile", lambda name: self.current_pane.set_profile(name)),
+        ):
+            sub = profiles_menu.addMenu(title)
+            sub.aboutToShow.connect(lambda m=sub, f=apply: self._fill_profile_menu(m, f))
+        profiles_menu.addSeparator()
+        clear_cache = QAction("Clear Profile Cache", self)
+        clear_cache.triggered.connect(lambda: self.current_pane.clear_cache())
+        profiles_menu.addAction(clear_cache)
+        clear_site = QAction("Clear Site Data for This Site", self)
+        clear_site.triggered.connect(lambda: self.current_pane.clear_site_data())
+        profiles_menu.addAction(clear_site)
+
+    def _fill_profile_menu(self, menu, apply):
+        menu.clear()
+        current = self.current_pane.profile_name if self.current_pane else None
+        for name in self.profiles.names():
+            act = menu.addAction(name)
+            act.setCheckable(True)
+            act.setChecked(name == current)
+            act.triggered.connect(lambda _, n=name: apply(n))
+        menu.addSeparator()
+        other = menu.addAction("New Profile…")
+        other.triggered.connect(lambda: self._new_profile(apply))
+
+    def _new_profile(self, apply):
+        name, ok = QInputDialog.getText(self, "New Profile", "Profile name:")
+        name = name.strip()
+        if not (ok and name):
+            return
+        try:
+            check_name(name)
+        except ValueError as exc:
+            QMessageBox.warning(self, "New Profile", str(exc))
+            return
+        apply(name)
+
+    def record_profile(self, on):
+        """Record Profile menu action: start or stop a capture."""
+        self.profiler.set_recording(on)
+        if on and self.profiler.tracer is None:
+            QMessageBox.information(
+                self, "Record Profile",
+                "Recording Python and slot timings. The Chromium trace is unavailable: "
+                "start SplitBrowser with --devtools-port PORT to include it.")
 
     def _create_shortcuts(self):
         # Exit any full-screen
@@ -159,27 +625,94 @@ class MainWindow(QMainWindow):
         QShortcut(QKeySequence("Ctrl+Tab"),       self, activated=lambda: self.switch_pane(1))
         QShortcut(QKeySequence("Ctrl+Shift+Tab"), self, activated=lambda: self.switch_pane(-1))
 
-    def add_tab(self):
+        # Move between panes in 2D (grids and nested splits)
+        for key, direction in (("Left", "left"), ("Right", "right"), ("Up", "up"), ("Down", "down")):
+            QShortcut(QKeySequence("Ctrl+Alt+" + key), self,
+                      activated=lambda d=direction: self.move_focus(d))
+
+    def export_har(self):
+        """Save the active pane's request log as a HAR file."""
+        pane = self.current_pane
+        if pane is None or pane.webview is None:
+            return
+        name = time.strftime("%Y%m%d-%H%M%S") + ".har"
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Network Log", os.path.join(HAR_DIR, name), "HAR files (*.har)")
+        if path:
+            self.netlog.export_har(pane, path)
+
+    def add_tab(self, profile=DEFAULT_PROFILE, url=None):
         """Add a new tab with a single browser pane."""
+        container = self.create_tab([url] if url else None, profile=profile)
+        self.tab_widget.setCurrentWidget(container)
+        self.set_current_pane(container.current)
+
+    def create_tab(self, urls=None, orientation=Qt.Horizontal, sizes=None, current=0,
+                   layout=None, profile=DEFAULT_PROFILE):
+        """Append a tab with one pane per URL, or with the given layout tree.
+
+        Panes are lazy when URLs or a layout are given (restoring a session).
+        Leaves without a "profile" of their own use 'profile'.
+        """
         container = QWidget()
         container.prev_sizes = None
         container.is_pane_fs = False
 
-        layout = QVBoxLayout(container)
-        layout.setContentsMargins(0, 0, 0, 0)
+        box = QVBoxLayout(container)
+        box.setContentsMargins(0, 0, 0, 0)
 
-        splitter = QSplitter(Qt.Horizontal)
-        splitter.setHandleWidth(6)
-        pane = BrowserView(self)
-        splitter.addWidget(pane)
-        layout.addWidget(splitter)
+        lazy = True if urls or layout else self.lazy_panes or self.batch_depth > 0
+        if layout is None:
+            layout = flat_spec(orientation, [{"url": url} for url in urls or [None]], sizes)
+        splitter = build_tree(layout, lambda leaf: self._new_pane(leaf, lazy, profile),
+                              self.session.schedule)
+        panes = leaves(splitter)
+        box.addWidget(splitter)
 
         container.splitter = splitter
-        container.current  = pane
+        container.panes    = panes
+        container.current  = panes[current] if 0 <= current < len(panes) else panes[0]
 
+        self.registry.add_tab(container)
         self.tab_widget.addTab(container, "New Tab")
-        self.tab_widget.setCurrentWidget(container)
-        self.set_current_pane(pane)
+        self.session.schedule()
+        return container
+
+    def _new_pane(self, leaf, lazy, profile=DEFAULT_PROFILE):
+        """BrowserView for a layout leaf ({"url": ..., "refresh": seconds, "profile": name})."""
+        profile = leaf.get("profile", profile)
+        if self.session.restoring:
+            profile = self.profiles.restorable(profile)
+        pane = BrowserView(self, leaf.get("url") or self.home_url, lazy=lazy, profile=profile)
+        if leaf.get("refresh"):
+            self.refresher.set_interval(pane, leaf["refresh"])
+        return pane
+
+    def set_tab_profile(self, name, cont=None):
+        """Move every pane of a tab (the current one by default) to profile 'name'."""
+        cont = cont or self.tab_widget.currentWidget()
+        if cont is None or not hasattr(cont, "panes"):
+            return
+        with self.batch():
+            for pane in cont.panes:
+                pane.set_profile(name)
+
+    @contextmanager
+    def batch(self):
+        """Group several changes into one repaint.
+
+        New panes stay lazy until the batch ends, so a pane that is created
+        and then navigated loads only its final URL.
+        """
+        self.batch_depth += 1
+        if self.batch_depth == 1:
+            self.setUpdatesEnabled(False)
+        try:
+            yield
+        finally:
+            self.batch_depth -= 1
+            if self.batch_depth == 0:
+                self.setUpdatesEnabled(True)
 
     def close_current_tab(self):
         idx = self.tab_widget.currentIndex()
@@ -187,61 +720,149 @@ class MainWindow(QMainWindow):
             self.close_tab(idx)
 
     def close_tab(self, index):
+        cont = self.tab_widget.widget(index)
+        if cont:
+            self.registry.remove_tab(index)
         self.tab_widget.removeTab(index)
+        # removeTab() does not delete the page: free or recycle its views
+        if cont:
+            self.thumbnails.discard(cont)
+            for pane in cont.panes:
+                pane.dispose()
+            cont.deleteLater()
         if self.tab_widget.count() == 0:
             self.add_tab()
+        self.lifecycle.schedule()
+        self.session.schedule()
 
     def on_tab_changed(self, index):
         cont = self.tab_widget.widget(index)
         if cont:
             self.set_current_pane(cont.current)
+            self.thumbnails.tab_shown(cont)
+        # One action for all tabs: show the pane full-screen state of this one
+        self._sync_full_pane_action(cont)
+        self.lifecycle.schedule()
+        self.session.schedule()
+
+    def all_panes(self):
+        """Every BrowserView in every tab."""
+        return self.registry.panes()
 
     def set_current_pane(self, pane):
         """Mark the given BrowserView as active."""
         self.current_pane = pane
+        self.memory.touch(pane)
         # Sync the active tab
-        for i in range(self.tab_widget.count()):
-            cont = self.tab_widget.widget(i)
-            if getattr(cont, "current", None) is pane:
-                self.tab_widget.setCurrentIndex(i)
-                break
+        cont = self.registry.container(pane)
+        if cont is not None:
+            cont.current = pane
+            idx = self.registry.index_of[cont]
+            if self.tab_widget.currentIndex() != idx:
+                self.tab_widget.setCurrentIndex(idx)
 
     def split_current(self, orientation, count):
-        """Rebuild the current tab with 'count' equally sized panes."""
+        """Resize the current tab to 'count' equally sized panes in one row or column."""
+        self._arrange(count, lambda panes: flat_spec(
+            orientation if count > 1 else Qt.Horizontal, panes))
+
+    def grid_current(self, rows, cols):
+        """Arrange the current tab as 'rows' x 'cols' equally sized panes."""
+        self._arrange(rows * cols, lambda panes: grid_spec(rows, cols, panes))
+
+    def _arrange(self, count, make_spec):
+        """Give the current tab 'count' panes laid out by make_spec(leaves).
+
+        Existing panes (and their renderers, history and scroll position)
+        are kept; only the missing panes are created or the extra ones
+        destroyed. The active pane always survives a shrink. A flat layout
+        replacing a flat one reuses its splitter; otherwise the new tree is
+        built off-screen and swapped in with a single layout pass.
+        """
         cont = self.tab_widget.currentWidget()
-        if not cont or not hasattr(cont, "current"):
+        if not cont or not hasattr(cont, "splitter"):
             return
 
-        old = cont.current
-        url = old.webview.url().toString()
-
-        layout = cont.layout()
-        # Clear existing widgets
-        while layout.count():
-            widget = layout.takeAt(0).widget()
-            if widget:
-                widget.deleteLater()
-
-        # Create new splitter
-        splitter = QSplitter(orientation if count > 1 else Qt.Horizontal)
-        splitter.setHandleWidth(6)
-
-        # First pane uses the current URL
-        first = BrowserView(self, url)
-        splitter.addWidget(first)
-        # Remaining panes
-        for _ in range(count - 1):
-            splitter.addWidget(BrowserView(self))
-
-        # Distribute sizes equally
-        splitter.setSizes([1] * count)
-
-        layout.addWidget(splitter)
-        cont.splitter = splitter
-        cont.current  = first
+        # Restore the normal sizes before touching the layout
+        if cont.is_pane_fs:
+            self._leave_pane_fs(cont)
+
+        keep = cont.panes[:count]
+        if cont.current not in keep:
+            keep[-1] = cont.current
+        # Decided outside our own batch, which would make every pane lazy
+        lazy = self.lazy_panes or self.batch_depth > 0
+
+        with self.batch():
+            # Drop the panes that no longer fit
+            for pane in cont.panes:
+                if pane not in keep:
+                    self.registry.remove_pane(pane)
+                    pane.setParent(None)
+                    pane.dispose()
+
+            # Add the missing ones
+            for _ in range(count - len(keep)):
+                pane = BrowserView(self, self.home_url, lazy=lazy,
+                                   profile=cont.current.profile_name)
+                self.registry.add_pane(cont, pane)
+                keep.append(pane)
+
+            spec = make_spec([{"pane": pane} for pane in keep])
+            old = cont.splitter
+            if is_flat(spec) and all(old.widget(i) in keep for i in range(old.count())):
+                old.setOrientation(BY_NAME[spec["orientation"]])
+                for pane in keep:
+                    if old.indexOf(pane) < 0:
+                        old.addWidget(pane)
+                old.setSizes([1] * count)
+            else:
+                cont.splitter = build_tree(spec, lambda leaf: leaf["pane"], self.session.schedule)
+                cont.layout().replaceWidget(old, cont.splitter)
+                old.setParent(None)
+                old.deleteLater()
+            cont.panes = leaves(cont.splitter)
+
         cont.prev_sizes = None
-        cont.is_pane_fs  = False
-        self.set_current_pane(first)
+        self.set_current_pane(cont.current)
+        self.thumbnails.schedule(cont.current)
+        self.lifecycle.schedule()
+        self.session.schedule()
+
+    def split_pane(self, orientation):
+        """Split the active pane in two, nesting a splitter when needed."""
+        cont = self.tab_widget.currentWidget()
+        if not cont or not hasattr(cont, "splitter"):
+            return
+        if cont.is_pane_fs:
+            self._leave_pane_fs(cont)
+
+        pane = cont.current
+        parent = pane.parentWidget()
+        index = parent.indexOf(pane)
+        sizes = parent.sizes()
+        new = BrowserView(self, self.home_url, lazy=self.lazy_panes or self.batch_depth > 0,
+                          profile=pane.profile_name)
+        self.registry.add_pane(cont, new)
+        with self.batch():
+            if parent.orientation() == orientation or parent.count() == 1:
+                parent.setOrientation(orientation)
+                parent.insertWidget(index + 1, new)
+                half = sizes[index] // 2
+                parent.setSizes(sizes[:index] + [sizes[index] - half, half] + sizes[index + 1:])
+            else:
+                inner = new_splitter(orientation, self.session.schedule)
+                parent.insertWidget(index, inner)
+                inner.addWidget(pane)
+                inner.addWidget(new)
+                inner.setSizes([1, 1])
+                parent.setSizes(sizes)
+            cont.panes = leaves(cont.splitter)
+
+        self.set_current_pane(new)
+        self.thumbnails.schedule(new)
+        self.lifecycle.schedule()
+        self.session.schedule()
 
     def toggle_full_tab(self, checked):
         """F11: toggle full-screen mode for the entire window."""
@@ -256,23 +877,30 @@ class MainWindow(QMainWindow):
         if not cont:
             return
 
-        splitter = cont.splitter
-        idx = splitter.indexOf(self.current_pane)
-        count = splitter.count()
-
         if checked:
-            # enter pane full-screen
-            cont.prev_sizes = splitter.sizes()
-            total = sum(cont.prev_sizes)
-            sizes = [0] * count
-            sizes[idx] = total
-            splitter.setSizes(sizes)
-            cont.is_pane_fs = True
+            # enter pane full-screen: collapse the siblings at every level
+            if not cont.is_pane_fs:
+                cont.prev_sizes = maximize(cont.current, cont.splitter)
+                cont.is_pane_fs = True
         else:
             # exit pane full-screen
-            if cont.prev_sizes:
-                splitter.setSizes(cont.prev_sizes)
-            cont.is_pane_fs = False
+            self._leave_pane_fs(cont)
+        self.lifecycle.schedule()
+        self.session.schedule()
+
+    def _leave_pane_fs(self, cont):
+        """Give a tab in pane full-screen its sizes and hidden panes back."""
+        if cont.prev_sizes:
+            restore_sizes(cont.prev_sizes)
+        cont.prev_sizes = None
+        cont.is_pane_fs = False
+        if cont is self.tab_widget.currentWidget():
+            self._sync_full_pane_action(cont)
+
+    def _sync_full_pane_action(self, cont):
+        self.full_pane_action.blockSignals(True)
+        self.full_pane_action.setChecked(bool(getattr(cont, "is_pane_fs", False)))
+        self.full_pane_action.blockSignals(False)
 
     def switch_pane(self, step):
         """Ctrl+Tab / Ctrl+Shift+Tab: cycle through panes in full-pane mode."""
@@ -280,13 +908,12 @@ class MainWindow(QMainWindow):
         if not cont or not cont.is_pane_fs:
             return
 
-        splitter = cont.splitter
-        panes = [splitter.widget(i) for i in range(splitter.count())]
+        panes = cont.panes
         if self.current_pane not in panes:
             return
 
         # Toggle off current
-        self.full_pane_action.setChecked(False)
+        self._leave_pane_fs(cont)
         # Move to next
         idx = panes.index(self.current_pane)
         next_pane = panes[(idx + step) % len(panes)]
@@ -294,6 +921,26 @@ class MainWindow(QMainWindow):
         # Toggle on new
         self.full_pane_action.setChecked(True)
 
+    def move_focus(self, direction):
+        """Ctrl+Alt+Arrow: focus the neighbouring pane in 'direction'.
+
+        In pane full-screen mode the full-screen pane moves along.
+        """
+        cont = self.tab_widget.currentWidget()
+        if not cont:
+            return
+        rects = pane_rects(cont.splitter, cont.prev_sizes if cont.is_pane_fs else None)
+        target = neighbour(rects, cont.current, direction)
+        if target is None:
+            return
+        full = cont.is_pane_fs
+        if full:
+            self._leave_pane_fs(cont)
+        self.set_current_pane(target)
+        if full:
+            self.full_pane_action.setChecked(True)
+        (target.webview or target.placeholder).setFocus()
+
     def next_tab(self):
         """Ctrl+PgDown: switch to next tab."""
         i = (self.tab_widget.currentIndex() + 1) % self.tab_widget.count()
@@ -304,6 +951,18 @@ class MainWindow(QMainWindow):
         i = (self.tab_widget.currentIndex() - 1) % self.tab_widget.count()
         self.tab_widget.setCurrentIndex(i)
 
+    def closeEvent(self, event):
+        self.profiler.close()
+        self.session.flush()
+        self.history.close()
+        self.snapshots.close()
+        self.thumbnails.close()
+        self.search.close()
+        if self.remote is not None:
+            self.remote.close()
+        self.webview_pool.clear()
+        super().closeEvent(event)
+
     def exit_fullscreen(self):
         """Esc: exit pane full-screen first, then tab full-screen."""
         cont = self.tab_widget.currentWidget()
@@ -314,7 +973,17 @@ class MainWindow(QMainWindow):
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    if sys.argv[1:2] == ["render"]:
+        from render import main as render_main
+        sys.exit(render_main(sys.argv[2:]))
+    config, qt_args = load_config(sys.argv[1:])
+    if config["control_socket"] and server_running(config["control_socket"]):
+        sys.exit("another SplitBrowser is running on %s" % config["control_socket"])
+    logging.basicConfig(level=config["log_level"].upper(),
+                        format="%(asctime)s %(name)s %(levelname)s: %(message)s")
+    apply_engine_flags(config)
+    app = QApplication(sys.argv[:1] + qt_args)
+    mark("qapplication")
     app.setStyle("Fusion")
     app.setStyleSheet("""
       QSplitter::handle {
@@ -324,6 +993,8 @@ if __name__ == "__main__":
       QSplitter::handle:vertical   { height: 6px; }
       QPushButton { min-width: 24px; }
     """)
-    window = MainWindow()
+    window = MainWindow(**window_options(config))
+    if config["exit_after_startup"]:
+        window.startup.finished.connect(lambda _: window.close())
     window.show()
     sys.exit(app.exec_())
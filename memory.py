@@ -0,0 +1,132 @@
+"""Memory governor: keep renderer RSS under a budget by discarding LRU panes."""
+import logging
+import os
+import time
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from lifecycle import DISCARDED, is_pane_visible
+
+log = logging.getLogger("splitbrowser.memory")
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def process_rss(pid):
+    """Resident set size of 'pid' in bytes (0 if unknown or not on Linux)."""
+    if not pid:
+        return 0
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+class MemoryGovernor(QObject):
+    """Discard least-recently-used hidden panes when RSS exceeds 'budget_mb'.
+
+    Recency comes from MainWindow.set_current_pane (touch()). Discarded
+    pages are reloaded by Qt Web Engine when they become Active again, so
+    the pane restores its URL transparently when shown. Every discard is
+    counted, emitted as evicted and kept as last_eviction for stats().
+    """
+    evicted = pyqtSignal(object, str, int)   # pane, url, renderer RSS in bytes
+
+    def __init__(self, main_window, budget_mb=None, interval=5000):
+        super().__init__(main_window)
+        self.main = main_window
+        self.budget_mb = budget_mb
+        self.lru = OrderedDict()
+        self.evictions = 0
+        self.last_eviction = None   # {"url", "rss_mb", "total_mb", "time"}
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.check)
+        self.set_budget(budget_mb, interval)
+
+    def set_budget(self, budget_mb, interval=5000):
+        """Set the budget in MiB; None disables the governor."""
+        self.budget_mb = budget_mb
+        if budget_mb is None:
+            self.timer.stop()
+            self.lru.clear()
+        else:
+            self.timer.start(interval)
+
+    def touch(self, pane):
+        """Mark the pane as most recently used (only tracked with a budget)."""
+        if self.budget_mb is None:
+            return
+        self.lru.pop(pane, None)
+        self.lru[pane] = True
+
+    def forget(self, pane):
+        self.lru.pop(pane, None)
+
+    def pane_rss(self, pane):
+        """RSS of the renderer process backing this pane."""
+        if pane.webview is None:
+            return 0
+        return process_rss(pane.webview.page().renderProcessPid())
+
+    def total_rss(self):
+        """Browser RSS plus every distinct renderer (shared ones counted once)."""
+        pids = {os.getpid()}
+        for pane in self.main.all_panes():
+            if pane.webview is not None:
+                pids.add(pane.webview.page().renderProcessPid())
+        return sum(process_rss(pid) for pid in pids)
+
+    def candidates(self):
+        """Hidden, loaded panes ordered from least to most recently used."""
+        panes = list(self.main.all_panes())
+        live = set(panes)
+        for pane in list(self.lru):
+            if pane not in live:
+                del self.lru[pane]
+        # Panes never focused are the oldest of all
+        ordered = [p for p in panes if p not in self.lru] + list(self.lru)
+        return [
+            p for p in ordered
+            if p.webview is not None
+            and not is_pane_visible(p)
+            and p.webview.page().lifecycleState() != DISCARDED
+        ]
+
+    def check(self):
+        """Discard LRU hidden panes until the total RSS fits the budget."""
+        if self.budget_mb is None:
+            return
+        budget = self.budget_mb * 1024 * 1024
+        total = self.total_rss()
+        users = {}
+        for pane in self.main.all_panes():
+            if pane.webview is not None:
+                pid = pane.webview.page().renderProcessPid()
+                users[pid] = users.get(pid, 0) + 1
+
+        for pane in self.candidates():
+            if total <= budget:
+                break
+            pid = pane.webview.page().renderProcessPid()
+            rss = process_rss(pid)
+            url = pane.url()
+            if not self.main.lifecycle.set_state(pane, DISCARDED):
+                continue    # Qt kept the page Active (its view is visible)
+            self.evictions += 1
+            # A shared renderer only goes away with its last page
+            users[pid] -= 1
+            if users[pid] == 0:
+                total -= rss
+            self.last_eviction = {"url": url, "rss_mb": round(rss / 2**20, 1),
+                                  "total_mb": round(total / 2**20, 1), "time": time.time()}
+            log.info("discarded %s (renderer %.1f MiB, total %.1f MiB, budget %d MiB)",
+                     url, rss / 2**20, total / 2**20, self.budget_mb)
+            self.evicted.emit(pane, url, rss)
+
+    def stats(self):
+        """Budget, evictions so far and the last one, for tuning the budget."""
+        return {"budget_mb": self.budget_mb, "evictions": self.evictions,
+                "last_eviction": self.last_eviction, "tracked": len(self.lru)}
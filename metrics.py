@@ -0,0 +1,278 @@
+"""Per-pane performance metrics, the metrics dock and periodic exports."""
+import json
+import os
+import time
+
+from PyQt5.QtCore import Qt, QObject, QTimer
+from PyQt5.QtWidgets import QDockWidget, QTableWidget, QTableWidgetItem, QHeaderView
+
+from lifecycle import STATE_NAMES
+from memory import process_rss
+from paths import write_atomic
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def process_cpu_seconds(pid):
+    """User + system CPU time of 'pid' in seconds (0 if unknown)."""
+    if not pid:
+        return 0.0
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # The command name may contain spaces: split after the closing ')'
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLK_TCK
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+class PaneMetrics:
+    """Load timing, navigation and renderer statistics of one pane."""
+
+    def __init__(self, pane):
+        self.pane = pane
+        self.loads = 0
+        self.failed_loads = 0
+        self.navigations = 0
+        self.crashes = 0
+        self.last_crash = ""
+        self.discards = 0       # by the memory governor
+        self.load_started = None
+        self.first_progress_ms = None
+        self.last_load_ms = None
+        self.total_load_ms = 0.0
+        self.progress = 0
+        self.pid = 0
+        self.rss = 0
+        self.cpu_percent = 0.0
+        self._cpu = (None, 0.0)
+
+        view = pane.webview
+        view.loadStarted.connect(self.on_load_started)
+        view.loadProgress.connect(self.on_load_progress)
+        view.loadFinished.connect(self.on_load_finished)
+        view.urlChanged.connect(self.on_url_changed)
+        view.renderProcessTerminated.connect(self.on_render_terminated)
+
+    def on_load_started(self):
+        self.load_started = time.perf_counter()
+        self.first_progress_ms = None
+        self.progress = 0
+
+    def on_load_progress(self, value):
+        self.progress = value
+        if self.first_progress_ms is None and self.load_started is not None and value > 0:
+            self.first_progress_ms = (time.perf_counter() - self.load_started) * 1000
+
+    def on_load_finished(self, ok):
+        if self.load_started is None:
+            return
+        self.last_load_ms = (time.perf_counter() - self.load_started) * 1000
+        self.load_started = None
+        self.loads += 1
+        self.total_load_ms += self.last_load_ms
+        if not ok:
+            self.failed_loads += 1
+
+    def on_url_changed(self, _url):
+        self.navigations += 1
+
+    def on_render_terminated(self, status, exit_code):
+        self.crashes += 1
+        self.last_crash = f"status {int(status)}, exit code {exit_code}"
+
+    def sample(self):
+        """Refresh renderer PID, RSS and CPU usage since the previous sample."""
+        self.pid = self.pane.webview.page().renderProcessPid()
+        self.rss = process_rss(self.pid)
+        now, cpu = time.monotonic(), process_cpu_seconds(self.pid)
+        then, before = self._cpu
+        if then is not None and now > then and cpu >= before:
+            self.cpu_percent = (cpu - before) / (now - then) * 100
+        self._cpu = (now, cpu)
+
+    def as_dict(self):
+        return {
+            "url": self.pane.url(),
+            "title": self.pane.webview.title(),
+            "pid": self.pid,
+            "rss_bytes": self.rss,
+            "cpu_percent": round(self.cpu_percent, 1),
+            "loads": self.loads,
+            "failed_loads": self.failed_loads,
+            "navigations": self.navigations,
+            "crashes": self.crashes,
+            "last_crash": self.last_crash,
+            "discards": self.discards,
+            "state": STATE_NAMES[self.pane.webview.page().lifecycleState()],
+            "loading": self.load_started is not None,
+            "progress": self.progress,
+            "first_progress_ms": _round(self.first_progress_ms),
+            "last_load_ms": _round(self.last_load_ms),
+            "mean_load_ms": _round(self.total_load_ms / self.loads if self.loads else None),
+        }
+
+
+def _round(value):
+    return None if value is None else round(value, 1)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+PROMETHEUS_METRICS = (
+    ("rss_bytes",     "gauge",   "Resident set size of the pane's renderer process."),
+    ("cpu_percent",   "gauge",   "CPU usage of the pane's renderer since the last sample."),
+    ("loads",         "counter", "Finished page loads."),
+    ("failed_loads",  "counter", "Page loads that finished with an error."),
+    ("navigations",   "counter", "URL changes."),
+    ("crashes",       "counter", "Renderer process terminations."),
+    ("discards",      "counter", "Discards by the memory governor."),
+    ("last_load_ms",  "gauge",   "Duration of the last page load in milliseconds."),
+)
+
+
+class MetricsCollector(QObject):
+    """Attaches PaneMetrics to every pane, samples them and exports snapshots.
+
+    Exports go to 'export_path' every 'interval' ms: Prometheus text format
+    when the path ends in .prom, JSON otherwise. Memory governor evictions
+    are counted per pane and exported with the governor's totals.
+    """
+
+    def __init__(self, main_window, export_path=None, interval=5000):
+        super().__init__(main_window)
+        self.main = main_window
+        self.export_path = export_path
+        self.listeners = []
+        main_window.memory.evicted.connect(self.on_evicted)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+        self.timer.start(interval)
+
+    def attach(self, pane):
+        pane.metrics = PaneMetrics(pane)
+
+    def on_evicted(self, pane, _url, _rss):
+        metrics = getattr(pane, "metrics", None)
+        if metrics is not None:
+            metrics.discards += 1
+
+    def tick(self):
+        if not self.listeners and not self.export_path:
+            return
+        self.sample()
+        for callback in self.listeners:
+            callback()
+        if self.export_path:
+            self.export(self.export_path)
+
+    def sample(self):
+        for pane in self.main.all_panes():
+            if pane.webview is not None:
+                pane.metrics.sample()
+
+    def snapshot(self):
+        """One dict per loaded pane, tagged with its tab and pane index."""
+        rows = []
+        for pane in self.main.all_panes():
+            if pane.webview is None:
+                continue
+            cont = self.main.registry.container(pane)
+            row = {"tab": self.main.registry.index(pane), "pane": cont.panes.index(pane)}
+            row.update(pane.metrics.as_dict())
+            rows.append(row)
+        rows.sort(key=lambda r: (r["tab"], r["pane"]))
+        return rows
+
+    def to_json(self):
+        return json.dumps({"timestamp": time.time(), "panes": self.snapshot(),
+                           "lifecycle": self.main.lifecycle.counts(),
+                           "memory": self.main.memory.stats()}, indent=1)
+
+    def to_prometheus(self):
+        rows = self.snapshot()
+        lines = []
+        for key, kind, help_text in PROMETHEUS_METRICS:
+            name = "splitbrowser_pane_" + key
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for row in rows:
+                if row[key] is None:
+                    continue
+                labels = 'tab="%d",pane="%d",url="%s"' % (row["tab"], row["pane"], _label(row["url"]))
+                lines.append(f"{name}{{{labels}}} {row[key]}")
+        lines += ["# HELP splitbrowser_panes Panes per page lifecycle state (unloaded = lazy).",
+                  "# TYPE splitbrowser_panes gauge"]
+        for state, count in self.main.lifecycle.counts().items():
+            lines.append(f'splitbrowser_panes{{state="{state}"}} {count}')
+        memory = self.main.memory.stats()
+        lines += ["# HELP splitbrowser_memory_evictions_total Panes discarded by the memory governor.",
+                  "# TYPE splitbrowser_memory_evictions_total counter",
+                  "splitbrowser_memory_evictions_total %d" % memory["evictions"]]
+        if memory["budget_mb"] is not None:
+            lines += ["# HELP splitbrowser_memory_budget_bytes Renderer memory budget.",
+                      "# TYPE splitbrowser_memory_budget_bytes gauge",
+                      "splitbrowser_memory_budget_bytes %d" % (memory["budget_mb"] * 2**20)]
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        text = self.to_prometheus() if path.endswith(".prom") else self.to_json()
+        write_atomic(path, text)
+
+
+class MetricsDock(QDockWidget):
+    """Table of per-pane metrics, refreshed only while it is visible."""
+    COLUMNS = (
+        ("Tab", "tab"), ("Pane", "pane"), ("URL", "url"), ("PID", "pid"),
+        ("RSS MiB", "rss_bytes"), ("CPU %", "cpu_percent"), ("Loads", "loads"),
+        ("Last load ms", "last_load_ms"), ("Navigations", "navigations"),
+        ("Crashes", "crashes"), ("Discards", "discards"), ("State", "state"),
+    )
+
+    def __init__(self, main_window):
+        super().__init__("Performance", main_window)
+        self.main = main_window
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels([c[0] for c in self.COLUMNS])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.cellDoubleClicked.connect(self.focus_row)
+        self.setWidget(self.table)
+        self.rows = []
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.main.metrics.listeners.append(self.refresh)
+        self.main.metrics.sample()
+        self.refresh()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        if self.refresh in self.main.metrics.listeners:
+            self.main.metrics.listeners.remove(self.refresh)
+
+    def refresh(self):
+        counts = self.main.lifecycle.counts()
+        self.setWindowTitle("Performance (%s)" % ", ".join(
+            "%d %s" % (n, state) for state, n in counts.items()))
+        self.rows = self.main.metrics.snapshot()
+        self.table.setRowCount(len(self.rows))
+        for r, row in enumerate(self.rows):
+            for c, (_, key) in enumerate(self.COLUMNS):
+                value = row[key]
+                if key == "rss_bytes":
+                    value = round(value / 2**20, 1)
+                item = QTableWidgetItem("" if value is None else str(value))
+                if row["crashes"]:
+                    item.setForeground(Qt.red)
+                self.table.setItem(r, c, item)
+
+    def focus_row(self, r, _column):
+        """Double click: jump to the pane of that row."""
+        tab, pane = self.rows[r]["tab"], self.rows[r]["pane"]
+        cont = self.main.tab_widget.widget(tab)
+        if cont and pane < len(cont.panes):
+            self.main.set_current_pane(cont.panes[pane])
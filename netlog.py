@@ -0,0 +1,294 @@
+"""Per-pane network request log: ring buffer, Resource Timing merge, HAR export."""
+import datetime
+import json
+import logging
+import os
+import time
+from collections import deque
+
+from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtWebEngineCore import QWebEngineUrlRequestInterceptor
+from PyQt5.QtWebEngineWidgets import QWebEngineScript
+
+from adblock import RESOURCE_TYPES
+from paths import DATA_DIR
+
+log = logging.getLogger("splitbrowser.netlog")
+
+HAR_DIR = os.path.join(DATA_DIR, "har")
+TIMING_BUFFER = 1000    # Resource Timing entries a page keeps before we clear them
+
+# Resource Timing entries added since 'offset' for the document started at
+# 'origin'; the buffer is cleared once it is nearly full so capture goes on
+# for pages that poll for hours.
+TIMING_JS = """(function (origin, offset) {
+    var p = performance;
+    if (p.timeOrigin !== origin) offset = 0;
+    var list = p.getEntriesByType('resource');
+    if (offset > list.length) offset = 0;
+    function row(e, type) {
+        return [e.name, type || e.initiatorType, p.timeOrigin + e.startTime, e.duration,
+                e.transferSize || 0, e.encodedBodySize || 0, e.responseStatus || 0];
+    }
+    var rows = [];
+    for (var i = offset; i < list.length; i++) rows.push(row(list[i]));
+    var nav = p.getEntriesByType('navigation')[0];
+    var next = list.length;
+    if (next >= %d) { p.clearResourceTimings(); next = 0; }
+    p.setResourceTimingBufferSize(%d);
+    return {origin: p.timeOrigin, next: next, rows: rows,
+            nav: nav && nav.duration ? row(nav, 'document') : null};
+})(%%r, %%d)""" % (TIMING_BUFFER - 100, TIMING_BUFFER)
+
+
+class Request:
+    """One request as seen by the interceptor, completed from Resource Timing."""
+    __slots__ = ("url", "method", "type", "started", "duration", "size", "body_size",
+                 "status", "intercepted")
+
+    def __init__(self, url, method, rtype, started, intercepted=True):
+        self.url = url
+        self.method = method
+        self.type = rtype
+        self.started = started          # epoch seconds
+        self.duration = None            # ms, None until timing arrived
+        self.size = None                # bytes over the wire (0: cache or cross-origin)
+        self.body_size = None
+        self.status = 0
+        self.intercepted = intercepted
+
+    def as_dict(self):
+        return {"url": self.url, "method": self.method, "type": self.type,
+                "started": self.started, "duration_ms": self.duration,
+                "size": self.size, "status": self.status}
+
+
+class RequestLog:
+    """Fixed-size ring buffer of one pane's requests."""
+
+    def __init__(self, capacity):
+        self.entries = deque(maxlen=capacity)
+        self.untimed = {}       # url -> deque of entries still waiting for timing
+        self.origin = 0.0       # timeOrigin of the document last read
+        self.offset = 0         # Resource Timing entries of it already merged
+        self.nav_origin = None
+        self.total = 0
+
+    def _append(self, entry):
+        if len(self.entries) == self.entries.maxlen:
+            old = self.entries[0]
+            waiting = self.untimed.get(old.url)
+            if waiting and old in waiting:
+                waiting.remove(old)
+                if not waiting:
+                    del self.untimed[old.url]
+        self.entries.append(entry)
+        self.total += 1
+
+    def record(self, url, method, rtype):
+        entry = Request(url, method, rtype, time.time())
+        self._append(entry)
+        self.untimed.setdefault(url, deque()).append(entry)
+
+    def merge_timing(self, result):
+        """Fold a TIMING_JS result into the entries."""
+        if not result:
+            return
+        self.origin, self.offset = result["origin"], result["next"]
+        rows = result["rows"]
+        if result["nav"] and self.nav_origin != result["origin"]:
+            self.nav_origin = result["origin"]
+            rows = [result["nav"]] + rows
+        for url, rtype, start, duration, transfer, body, status in rows:
+            waiting = self.untimed.get(url)
+            if waiting:
+                entry = waiting.popleft()
+                if not waiting:
+                    del self.untimed[url]
+            else:
+                # Not intercepted: served from the memory cache, or a
+                # request that started before the log was attached
+                entry = Request(url, "GET", rtype, start / 1000, intercepted=False)
+                self._append(entry)
+            entry.started = start / 1000
+            entry.duration = round(duration, 1)
+            entry.size = int(transfer)
+            entry.body_size = int(body)
+            entry.status = int(status)
+
+    def slowest(self, limit=10):
+        timed = [e for e in self.entries if e.duration is not None]
+        timed.sort(key=lambda e: -e.duration)
+        return [e.as_dict() for e in timed[:limit]]
+
+    def cache_counts(self):
+        """(served from the HTTP cache, fetched over the network) of the timed entries.
+
+        A same-origin response with a body but no bytes transferred came
+        from the cache; cross-origin entries without Timing-Allow-Origin
+        report neither size and are not counted.
+        """
+        hits = fetched = 0
+        for e in self.entries:
+            if e.duration is None:
+                continue
+            if e.size:
+                fetched += 1
+            elif e.body_size:
+                hits += 1
+        return hits, fetched
+
+    def summary(self, limit=10):
+        timed = [e for e in self.entries if e.duration is not None]
+        by_type = {}
+        for e in self.entries:
+            row = by_type.setdefault(e.type, {"count": 0, "bytes": 0})
+            row["count"] += 1
+            row["bytes"] += e.size or 0
+        return {
+            "requests": len(self.entries),
+            "recorded": self.total,
+            "timed": len(timed),
+            "bytes": sum(e.size or 0 for e in self.entries),
+            "by_type": by_type,
+            "slowest": self.slowest(limit),
+        }
+
+    def har(self, title=""):
+        """The buffer as a HAR 1.2 log; every main-frame request opens a page."""
+        pages, entries = [], []
+        page_id = None
+        for e in sorted(self.entries, key=lambda e: e.started):
+            started = datetime.datetime.fromtimestamp(e.started, datetime.timezone.utc)
+            stamp = started.isoformat(timespec="milliseconds").replace("+00:00", "Z")
+            if e.type == "document" or page_id is None:
+                page_id = "page_%d" % (len(pages) + 1)
+                pages.append({"startedDateTime": stamp, "id": page_id,
+                              "title": e.url if e.type == "document" else title,
+                              "pageTimings": {"onLoad": e.duration if e.type == "document"
+                                              else -1}})
+            duration = e.duration if e.duration is not None else -1
+            entries.append({
+                "pageref": page_id,
+                "startedDateTime": stamp,
+                "time": max(duration, 0),
+                "request": {"method": e.method, "url": e.url, "httpVersion": "",
+                            "cookies": [], "headers": [], "queryString": [],
+                            "headersSize": -1, "bodySize": -1},
+                "response": {"status": e.status, "statusText": "", "httpVersion": "",
+                             "cookies": [], "headers": [], "redirectURL": "",
+                             "headersSize": -1, "bodySize": e.size if e.size else -1,
+                             "content": {"size": e.body_size or 0, "mimeType": ""}},
+                "cache": {},
+                "timings": {"send": 0, "wait": max(duration, 0), "receive": 0},
+                "_resourceType": e.type,
+            })
+        return {"log": {"version": "1.2",
+                        "creator": {"name": "SplitBrowser", "version": "1"},
+                        "pages": pages, "entries": entries}}
+
+
+class PageInterceptor(QWebEngineUrlRequestInterceptor):
+    """Page-level interceptor feeding one pane's RequestLog.
+
+    Runs after the profile's interceptor (content blocking), so it sees
+    the requests of exactly one page, which a profile-wide handler
+    cannot tell apart.
+    """
+
+    def __init__(self, requests, parent=None):
+        super().__init__(parent)
+        self.requests = requests
+        self.spent = 0.0
+
+    def interceptRequest(self, info):
+        start = time.perf_counter()
+        self.requests.record(info.requestUrl().toString(),
+                             bytes(info.requestMethod()).decode("ascii", "replace"),
+                             RESOURCE_TYPES.get(info.resourceType(), "other"))
+        self.spent += time.perf_counter() - start
+
+
+class NetworkLog(QObject):
+    """Gives every pane a RequestLog of 'capacity' entries (0 disables).
+
+    Request start, URL, method and type come from a page interceptor;
+    duration, transfer size and status are read from the page's Resource
+    Timing buffer after each load and every 'interval' ms for visible
+    panes, since Qt WebEngine reports nothing when a response completes.
+    """
+
+    def __init__(self, main_window, capacity=500, interval=10000):
+        super().__init__(main_window)
+        self.main = main_window
+        self.capacity = capacity
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.collect_visible)
+        if capacity:
+            self.timer.start()
+
+    @property
+    def enabled(self):
+        return self.capacity > 0
+
+    def attach(self, pane):
+        """Install the pane's interceptor on its current page."""
+        if not self.enabled:
+            return
+        if getattr(pane, "requests", None) is None:
+            pane.requests = RequestLog(self.capacity)
+            pane.interceptor = PageInterceptor(pane.requests, pane)
+        pane.webview.page().setUrlRequestInterceptor(pane.interceptor)
+
+    def detach(self, pane):
+        if self.enabled and pane.webview is not None:
+            pane.webview.page().setUrlRequestInterceptor(None)
+
+    def collect(self, pane, callback=None):
+        """Merge the page's new Resource Timing entries, then call callback()."""
+        requests = getattr(pane, "requests", None)
+        if requests is None or pane.webview is None:
+            if callback:
+                callback()
+            return
+
+        def merged(result, requests=requests):
+            requests.merge_timing(result)
+            if callback:
+                callback()
+        pane.webview.page().runJavaScript(
+            TIMING_JS % (requests.origin, requests.offset),
+            QWebEngineScript.ApplicationWorld, merged)
+
+    def collect_visible(self):
+        for pane in self.main.all_panes():
+            if pane.webview is not None and pane.webview.isVisible():
+                self.collect(pane)
+
+    def summary(self, pane, limit=10):
+        requests = getattr(pane, "requests", None)
+        return requests.summary(limit) if requests is not None else None
+
+    def write_har(self, pane, path):
+        """Write the pane's log as HAR with the timings merged so far."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(pane.requests.har(pane.url()), f, indent=1)
+        log.info("HAR with %d requests -> %s", len(pane.requests.entries), path)
+        return len(pane.requests.entries)
+
+    def export_har(self, pane, path):
+        """write_har() once the page's latest timings are merged."""
+        if getattr(pane, "requests", None) is not None:
+            self.collect(pane, lambda: self.write_har(pane, path))
+
+    def stats(self):
+        logs = [p.requests for p in self.main.all_panes() if getattr(p, "requests", None)]
+        spent = sum(p.interceptor.spent for p in self.main.all_panes()
+                    if getattr(p, "requests", None))
+        recorded = sum(r.total for r in logs)
+        return {"capacity": self.capacity, "panes": len(logs), "recorded": recorded,
+                "buffered": sum(len(r.entries) for r in logs),
+                "intercept_us_per_request": round(spent / recorded * 1e6, 2) if recorded else None}
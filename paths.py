@@ -0,0 +1,21 @@
+"""Data directory and atomic file writes, without Qt so pure modules can use them."""
+import os
+import tempfile
+
+DATA_DIR = os.path.join(os.path.expanduser("~"), ".splitbrowser")
+
+
+def write_atomic(path, data, mode="w"):
+    """Write 'data' to 'path' through a temporary file and os.replace()."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, mode) as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
@@ -0,0 +1,87 @@
+"""Pool of pre-warmed QWebEngineViews for instant new tabs and splits."""
+from PyQt5.QtCore import QObject, QTimer, QUrl
+from PyQt5.QtWebEngineWidgets import QWebEngineView, QWebEnginePage, QWebEngineProfile
+
+# Signals that panes connect to; cleared before a view goes back to the pool
+VIEW_SIGNALS = (
+    "titleChanged", "urlChanged", "loadStarted", "loadProgress", "loadFinished",
+    "iconChanged", "iconUrlChanged", "selectionChanged", "renderProcessTerminated",
+)
+
+
+class WebViewPool(QObject):
+    """Keeps up to 'size' hidden views with a live renderer on about:blank.
+
+    take() hands one out (or builds one on the spot when the pool is
+    empty); the pool is refilled one view per event loop pass so refilling
+    never blocks input. Views of closed panes come back through release()
+    when they are still in a reusable state. Pooled views use the default
+    profile; views of panes in a named profile are never taken back.
+    """
+
+    def __init__(self, parent=None, size=2):
+        super().__init__(parent)
+        self.size = size
+        self.views = []
+        self.hits = 0
+        self.misses = 0
+        self.recycled = 0
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._refill_one)
+
+    def fill(self):
+        """Start (or continue) refilling in idle time."""
+        if len(self.views) < self.size and not self.timer.isActive():
+            self.timer.start(0)
+
+    def _refill_one(self):
+        if len(self.views) < self.size:
+            view = QWebEngineView()
+            view.setUrl(QUrl("about:blank"))
+            self.views.append(view)
+        self.fill()
+
+    def take(self):
+        if self.views:
+            self.hits += 1
+            view = self.views.pop()
+        else:
+            self.misses += 1
+            view = QWebEngineView()
+        self.fill()
+        return view
+
+    def release(self, view):
+        """Reset a view from a closed pane and keep it, or delete it."""
+        view.setParent(None)
+        for name in VIEW_SIGNALS:
+            try:
+                getattr(view, name).disconnect()
+            except TypeError:
+                pass        # nothing connected
+        page = view.page()
+        reusable = (
+            len(self.views) < self.size
+            and page.lifecycleState() == QWebEnginePage.LifecycleState.Active
+            and page.renderProcessPid() != 0
+            and page.devToolsPage() is None
+            and page.profile() is QWebEngineProfile.defaultProfile()
+        )
+        if not reusable:
+            view.deleteLater()
+            return
+        page.triggerAction(QWebEnginePage.Stop)
+        page.history().clear()
+        view.setUrl(QUrl("about:blank"))
+        self.recycled += 1
+        self.views.append(view)
+
+    def stats(self):
+        return {"idle": len(self.views), "hits": self.hits,
+                "misses": self.misses, "recycled": self.recycled}
+
+    def clear(self):
+        while self.views:
+            self.views.pop().deleteLater()
@@ -0,0 +1,256 @@
+"""Speculative loading: preconnect, prefetch and pre-render likely navigations."""
+import json
+import logging
+import time
+from collections import deque
+
+from PyQt5.QtCore import QObject, QTimer, QUrl
+from PyQt5.QtWebEngineWidgets import QWebEnginePage, QWebEngineScript
+
+from history import completion_key, normalize_url
+from snapshots import origin_of
+
+log = logging.getLogger("splitbrowser.predictor")
+
+HINT_TTL = 30           # seconds a preconnect / prefetch counts as warm
+PRERENDER_TTL = 60      # seconds a pre-rendered page is kept
+HOVER_PRECONNECT = 150  # ms of hovering before a preconnect
+HOVER_PREFETCH = 600    # ms of hovering before a prefetch
+TYPING_IDLE = 150       # ms after the last keystroke
+
+# Resource hints go into a hidden blank page of the pane's profile whose
+# base URL is the target's origin, never into the document being shown
+# (a page could watch its DOM for them and learn history and typing).
+# Chromium then warms its socket pool / HTTP cache for the profile, keyed
+# by the same top-level site as the later navigation.
+HINT_JS = """(function (rel, href) {
+    var link = document.createElement('link');
+    link.rel = rel;
+    link.href = href;
+    (document.head || document.documentElement).appendChild(link);
+})(%s, %s)"""
+
+
+def has_history(pane):
+    """Whether the pane's page has entries worth keeping on back/forward."""
+    history = pane.webview.page().history()
+    return any(item.url().toString() not in ("", "about:blank")
+               for item in history.items())
+
+
+class Predictor(QObject):
+    """Turns URL bar input and link hovers into speculative work.
+
+    Likely targets get a preconnect to their origin, very likely ones a
+    prefetch or, with 'max_prerenders' > 0, a hidden page that the pane
+    adopts when the user commits to that URL. At most 'max_hints' hints are
+    issued per HINT_TTL window (0 turns speculation off) and
+    'max_prerenders' pages exist at once.
+    Commits are classified as prerender / prefetch / preconnect hits or
+    misses, with time-to-loadFinished kept for each class.
+    """
+
+    def __init__(self, main_window, max_hints=8, max_prerenders=1):
+        super().__init__(main_window)
+        self.main = main_window
+        self.max_hints = max_hints
+        self.max_prerenders = max_prerenders
+        self.warm = {}              # origin or url -> (kind, time issued)
+        self.issued = deque()       # times of recent hints
+        self.prerenders = {}        # url -> [page, owner pane, time, loaded]
+        self.hint_pages = deque()   # (blank page carrying a hint, time created)
+        self.counts = {"preconnect": 0, "prefetch": 0, "prerender": 0,
+                       "budget_exhausted": 0}
+        self.outcomes = {"prerender": 0, "prefetch": 0, "preconnect": 0, "miss": 0}
+        self.latency = {kind: deque(maxlen=100) for kind in self.outcomes}
+        self.pending_commit = {}    # pane -> (outcome, commit time)
+
+        self.hover = None           # (pane, url, hovered since)
+        self.hover_timer = QTimer(self)
+        self.hover_timer.setSingleShot(True)
+        self.hover_timer.timeout.connect(self._hover_tick)
+
+        self.typed = None           # (pane, text)
+        self.typing_timer = QTimer(self)
+        self.typing_timer.setSingleShot(True)
+        self.typing_timer.setInterval(TYPING_IDLE)
+        self.typing_timer.timeout.connect(self._typing_idle)
+
+    # Inputs
+
+    def link_hovered(self, pane, url):
+        if not self.max_hints or not url.startswith(("http://", "https://")):
+            self.hover = None
+            self.hover_timer.stop()
+            return
+        self.hover = (pane, url, time.monotonic())
+        self.hover_timer.start(HOVER_PRECONNECT)
+
+    def _hover_tick(self):
+        if self.hover is None:
+            return
+        pane, url, since = self.hover
+        dwell = (time.monotonic() - since) * 1000
+        if dwell < HOVER_PREFETCH:
+            self.hint(pane, "preconnect", url)
+            self.hover_timer.start(int(HOVER_PREFETCH - dwell))
+        else:
+            self.hint(pane, "prefetch", url)
+
+    def text_edited(self, pane, text):
+        if not self.max_hints:
+            return
+        self.typed = (pane, text)
+        self.typing_timer.start()
+
+    def _typing_idle(self):
+        if self.typed is None:
+            return
+        pane, text = self.typed
+        key = completion_key(text.strip())
+        if len(key) < 2:
+            return
+        history = self.main.history
+        candidates = history.complete(text, 2)
+        if not candidates or not completion_key(candidates[0]).startswith(key):
+            return
+        now = time.time()
+        scores = [history.index.score(url, now) for url in candidates]
+        top = candidates[0]
+        share = scores[0] / sum(scores) if sum(scores) else 0
+        if share < 0.8 or len(key) < 4:
+            self.hint(pane, "preconnect", top)
+        elif self.max_prerenders:
+            self.prerender(pane, top)
+        else:
+            self.hint(pane, "prefetch", top)
+
+    # Speculative work
+
+    def _budget(self):
+        now = time.monotonic()
+        while self.issued and now - self.issued[0] > HINT_TTL:
+            self.issued.popleft()
+        if len(self.issued) >= self.max_hints:
+            self.counts["budget_exhausted"] += 1
+            return False
+        self.issued.append(now)
+        return True
+
+    def _is_warm(self, key):
+        entry = self.warm.get(key)
+        return entry is not None and time.monotonic() - entry[1] < HINT_TTL
+
+    def hint(self, pane, kind, url):
+        """Issue a <link rel=preconnect|prefetch> for 'url' in the pane's profile."""
+        target = origin_of(url) if kind == "preconnect" else url
+        if self._is_warm(target) or pane.webview is None or not self._budget():
+            return
+        self._expire()
+        self.warm[target] = (kind, time.monotonic())
+        self.counts[kind] += 1
+        script = HINT_JS % (json.dumps(kind), json.dumps(target))
+        page = QWebEnginePage(pane.webview.page().profile(), self)
+        page.loadFinished.connect(
+            lambda ok, p=page: p.runJavaScript(script, QWebEngineScript.ApplicationWorld))
+        page.setHtml("<!doctype html>", QUrl(origin_of(url) + "/"))
+        self.hint_pages.append((page, time.monotonic()))
+
+    def prerender(self, pane, url):
+        """Load 'url' in a hidden page that 'pane' can adopt on commit."""
+        self._expire()
+        url = normalize_url(url)
+        if url in self.prerenders or pane.webview is None:
+            return
+        if len(self.prerenders) >= self.max_prerenders:
+            # The newest intent wins over an older guess
+            oldest = min(self.prerenders, key=lambda u: self.prerenders[u][2])
+            self._drop(oldest)
+        if not self._budget():
+            return
+        page = QWebEnginePage(pane.webview.page().profile(), pane)
+        page.loadFinished.connect(lambda ok, u=url: self._prerendered(u, ok))
+        page.load(QUrl(url))
+        self.prerenders[url] = [page, pane, time.monotonic(), False]
+        self.warm[url] = ("prerender", time.monotonic())
+        self.counts["prerender"] += 1
+
+    def _prerendered(self, url, ok):
+        entry = self.prerenders.get(url)
+        if entry is None or entry[0] is not self.sender():
+            return      # already adopted or dropped
+        if ok:
+            entry[3] = True
+        else:
+            self._drop(url)
+
+    def _drop(self, url):
+        page = self.prerenders.pop(url)[0]
+        page.deleteLater()
+
+    def _expire(self):
+        now = time.monotonic()
+        while self.hint_pages and now - self.hint_pages[0][1] > HINT_TTL:
+            self.hint_pages.popleft()[0].deleteLater()
+        for url in [u for u, e in self.prerenders.items() if now - e[2] > PRERENDER_TTL]:
+            self._drop(url)
+
+    def forget_pane(self, pane):
+        for url in [u for u, e in self.prerenders.items() if e[1] is pane]:
+            self._drop(url)
+        self.pending_commit.pop(pane, None)
+        if self.hover is not None and self.hover[0] is pane:
+            self.hover = None
+        if self.typed is not None and self.typed[0] is pane:
+            self.typed = None
+
+    # Outcomes
+
+    def commit(self, pane, url):
+        """The pane is about to load 'url'.
+
+        Returns (page, loaded) when a pre-rendered page for it is ready to
+        be adopted, else (None, False). Adopting swaps out the pane's page
+        and with it the back/forward list, so a pane with history loads
+        'url' itself; the pre-render has still warmed the HTTP cache.
+        """
+        self._expire()
+        url = normalize_url(url)
+        now = time.monotonic()
+        entry = self.prerenders.pop(url, None)
+        if entry is not None and entry[1] is pane and not has_history(pane):
+            self.outcomes["prerender"] += 1
+            self.pending_commit[pane] = ("prerender", now)
+            return entry[0], entry[3]
+        if entry is not None:
+            entry[0].deleteLater()
+        if entry is not None or self._is_warm(url):
+            outcome = "prefetch"
+        elif self._is_warm(origin_of(url)):
+            outcome = "preconnect"
+        else:
+            outcome = "miss"
+        self.outcomes[outcome] += 1
+        self.pending_commit[pane] = (outcome, now)
+        return None, False
+
+    def loaded(self, pane):
+        """The pane finished the load started by commit()."""
+        outcome = self.pending_commit.pop(pane, None)
+        if outcome is not None:
+            self.latency[outcome[0]].append(time.monotonic() - outcome[1])
+
+    def stats(self):
+        def median_ms(values):
+            ordered = sorted(values)
+            return round(ordered[len(ordered) // 2] * 1000, 1) if ordered else None
+        hits = sum(v for k, v in self.outcomes.items() if k != "miss")
+        total = hits + self.outcomes["miss"]
+        return {
+            "issued": dict(self.counts),
+            "outcomes": dict(self.outcomes),
+            "hit_rate": round(hits / total, 3) if total else None,
+            "median_load_ms": {k: median_ms(v) for k, v in self.latency.items()},
+            "prerendering": len(self.prerenders),
+            "hint_pages": len(self.hint_pages),
+        }
@@ -0,0 +1,291 @@
+"""Named browser profiles: per-profile disk cache, cookies and scoped clearing."""
+import logging
+import os
+import re
+import time
+from urllib.parse import urlsplit
+
+from PyQt5.QtCore import QObject, QTimer, QUrl
+from PyQt5.QtWebEngineWidgets import QWebEngineProfile, QWebEnginePage, QWebEngineScript, QWebEngineView
+
+from paths import DATA_DIR
+
+log = logging.getLogger("splitbrowser.profiles")
+
+DEFAULT_PROFILE = "default"
+STORAGE_DIR = os.path.join(DATA_DIR, "storage")     # one directory per named profile
+CLEAR_TIMEOUT = 5.0     # s to wait for the site-data clearing script
+NAME_RE = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,63}")  # also a directory name
+
+COOKIE_POLICIES = {
+    QWebEngineProfile.NoPersistentCookies:    "session-only",
+    QWebEngineProfile.AllowPersistentCookies: "allow",
+    QWebEngineProfile.ForcePersistentCookies: "force",
+}
+
+# Storage of the origin the page was created for. Runs in a blank page
+# whose base URL is the origin, so nothing is fetched; window.__cleared
+# turns true once the asynchronous deletions are done.
+CLEAR_JS = """(function () {
+    window.__cleared = false;
+    try { localStorage.clear(); } catch (e) {}
+    var jobs = [];
+    if (window.caches)
+        jobs.push(caches.keys().then(function (keys) {
+            return Promise.all(keys.map(function (k) { return caches.delete(k); }));
+        }));
+    if (window.indexedDB && indexedDB.databases)
+        jobs.push(indexedDB.databases().then(function (dbs) {
+            dbs.forEach(function (db) { indexedDB.deleteDatabase(db.name); });
+        }));
+    if (navigator.serviceWorker)
+        jobs.push(navigator.serviceWorker.getRegistrations().then(function (regs) {
+            return Promise.all(regs.map(function (r) { return r.unregister(); }));
+        }));
+    Promise.all(jobs.map(function (j) { return j.catch(function () {}); }))
+        .then(function () { window.__cleared = true; });
+})()"""
+
+
+def check_name(name):
+    """Return 'name' if it is usable as a profile name, else raise ValueError.
+
+    The name becomes a directory under STORAGE_DIR, so separators, a
+    leading dot ("..") and anything outside [A-Za-z0-9_.-] are refused.
+    """
+    if not isinstance(name, str) or not NAME_RE.fullmatch(name):
+        raise ValueError("invalid profile name %r: use letters, digits, '_', '.' and '-', "
+                         "not starting with '.'" % (name,))
+    return name
+
+
+def dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path or ""):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def cookie_matches(cookie, host):
+    domain = cookie.domain().lstrip(".")
+    return host == domain or host.endswith("." + domain)
+
+
+class Profile:
+    """One QWebEngineProfile and what we track about it."""
+
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        self.cookies = {}       # (name, domain, path) -> QNetworkCookie
+        self.cleared = 0        # HTTP cache clears
+        self.origins_cleared = 0
+
+    def _cookie_added(self, cookie):
+        self.cookies[bytes(cookie.name()), cookie.domain(), cookie.path()] = cookie
+
+    def _cookie_removed(self, cookie):
+        self.cookies.pop((bytes(cookie.name()), cookie.domain(), cookie.path()), None)
+
+
+class ProfileManager(QObject):
+    """Creates named profiles on first use and scopes cache clearing to them.
+
+    'definitions' maps a name to {"cache_mb", "cache_path",
+    "persistent_cookies"}; a name without a definition gets the defaults
+    (Qt's cache size, cache and cookies under STORAGE_DIR/<name>). The
+    "default" profile is QWebEngineProfile.defaultProfile(), configured by
+    apply_profile(). Panes of different profiles share no cache, cookies
+    or storage, so clearing one profile leaves the others warm. Nothing
+    touches Qt WebEngine before start().
+    """
+
+    def __init__(self, main_window, definitions=None, root=STORAGE_DIR):
+        super().__init__(main_window)
+        self.main = main_window
+        self.definitions = {}
+        for name, spec in (definitions or {}).items():
+            try:
+                self.definitions[check_name(name)] = spec
+            except ValueError as exc:
+                log.warning("%s, ignored", exc)
+        self.root = root
+        self.profiles = {}
+        self.clearing = []      # [page, origin, deadline, callback]
+
+        self.clear_timer = QTimer(self)
+        self.clear_timer.setInterval(100)
+        self.clear_timer.timeout.connect(self._poll_clearing)
+
+    def start(self):
+        """Set up the default profile; part of MainWindow.start_engine()."""
+        if DEFAULT_PROFILE not in self.profiles:
+            self._add(DEFAULT_PROFILE, QWebEngineProfile.defaultProfile())
+
+    def names(self):
+        """Defined and already created profile names, default first."""
+        rest = sorted((set(self.definitions) | set(self.profiles)) - {DEFAULT_PROFILE})
+        return [DEFAULT_PROFILE] + rest
+
+    def restorable(self, name):
+        """'name' for a pane restored from the session, else DEFAULT_PROFILE.
+
+        A session may name a profile that is invalid or gone (neither
+        defined, created nor on disk); its panes come back in the default
+        profile instead of failing the restore.
+        """
+        name = name or DEFAULT_PROFILE
+        try:
+            check_name(name)
+        except ValueError as exc:
+            log.warning("%s; restored in the default profile", exc)
+            return DEFAULT_PROFILE
+        if (name == DEFAULT_PROFILE or name in self.definitions or name in self.profiles
+                or os.path.isdir(os.path.join(self.root, name))):
+            return name
+        log.warning("profile %s no longer exists; restored in the default profile", name)
+        return DEFAULT_PROFILE
+
+    def _add(self, name, engine):
+        profile = Profile(name, engine)
+        engine.setUrlRequestInterceptor(self.main.interceptor)
+        engine.downloadRequested.connect(self.main.snapshots.on_download)
+        engine.downloadRequested.connect(self.main.downloads.on_download)
+        store = engine.cookieStore()
+        store.cookieAdded.connect(profile._cookie_added)
+        store.cookieRemoved.connect(profile._cookie_removed)
+        store.loadAllCookies()
+        self.profiles[name] = profile
+        return profile
+
+    def get(self, name=DEFAULT_PROFILE):
+        """The Profile called 'name', created on first use."""
+        self.main.start_engine()
+        profile = self.profiles.get(name or DEFAULT_PROFILE)
+        if profile is not None:
+            return profile
+        check_name(name)
+        spec = self.definitions.get(name) or {}
+        storage = os.path.join(self.root, name)
+        engine = QWebEngineProfile(name, self)
+        engine.setPersistentStoragePath(storage)
+        engine.setCachePath(spec.get("cache_path") or os.path.join(storage, "cache"))
+        if spec.get("cache_mb"):
+            engine.setHttpCacheMaximumSize(spec["cache_mb"] * 1024 * 1024)
+        engine.setPersistentCookiesPolicy(
+            QWebEngineProfile.ForcePersistentCookies if spec.get("persistent_cookies", True)
+            else QWebEngineProfile.NoPersistentCookies)
+        log.info("profile %s: cache %s", name, engine.cachePath())
+        return self._add(name, engine)
+
+    def new_view(self, name):
+        """A web view for a pane of profile 'name' (pooled for the default one)."""
+        if (name or DEFAULT_PROFILE) == DEFAULT_PROFILE:
+            return self.main.webview_pool.take()
+        view = QWebEngineView()
+        view.setPage(self.new_page(name, view))
+        return view
+
+    def new_page(self, name, parent=None):
+        return QWebEnginePage(self.get(name).engine, parent)
+
+    def panes(self, name):
+        return [p for p in self.main.all_panes() if p.profile_name == name]
+
+    # Clearing
+
+    def clear_cache(self, name):
+        """Drop the HTTP cache of one profile; the others keep theirs."""
+        profile = self.get(name)
+        profile.engine.clearHttpCache()
+        profile.cleared += 1
+        log.info("cleared HTTP cache of profile %s", name)
+
+    def clear_origin(self, name, origin, callback=None):
+        """Delete the cookies and storage one origin has in profile 'name'.
+
+        Cookies of the host and its parent domains go through the cookie
+        store; localStorage, Cache Storage, IndexedDB and service workers
+        are cleared by CLEAR_JS in a hidden page of that origin. Qt cannot
+        evict single HTTP cache entries, so those stay until the profile's
+        cache is cleared. callback(ok) runs when the script is done.
+        """
+        profile = self.get(name)
+        host = urlsplit(origin).hostname or ""
+        store = profile.engine.cookieStore()
+        for cookie in [c for c in profile.cookies.values() if cookie_matches(c, host)]:
+            store.deleteCookie(cookie, QUrl(origin))
+        profile.origins_cleared += 1
+
+        page = self.new_page(name, self)
+        page.loadFinished.connect(
+            lambda ok, p=page: p.runJavaScript(CLEAR_JS, QWebEngineScript.ApplicationWorld))
+        page.setHtml("<!doctype html>", QUrl(origin + "/"))
+        self.clearing.append([page, origin, time.monotonic() + CLEAR_TIMEOUT, callback])
+        self.clear_timer.start()
+
+    def _poll_clearing(self):
+        now = time.monotonic()
+        for entry in list(self.clearing):
+            page, origin, deadline, callback = entry
+            if now > deadline:
+                log.warning("clearing site data of %s timed out", origin)
+                self._done_clearing(entry, False)
+            else:
+                page.runJavaScript("window.__cleared === true",
+                                   QWebEngineScript.ApplicationWorld,
+                                   lambda done, e=entry: self._check_cleared(e, done))
+        if not self.clearing:
+            self.clear_timer.stop()
+
+    def _check_cleared(self, entry, done):
+        if done and entry in self.clearing:
+            self._done_clearing(entry, True)
+
+    def _done_clearing(self, entry, ok):
+        self.clearing.remove(entry)
+        entry[0].deleteLater()
+        if ok:
+            log.info("cleared site data of %s", entry[1])
+        if entry[3]:
+            entry[3](ok)
+
+    # Statistics
+
+    def stats(self):
+        """Per profile: cache location, limit and size, cookies, panes, cache hits."""
+        out = {}
+        for name in self.names():
+            if name not in self.profiles:
+                out[name] = {"created": False, "definition": self.definitions[name]}
+                continue
+            profile = self.profiles[name]
+            engine = profile.engine
+            panes = self.panes(name)
+            hits = fetched = 0
+            for pane in panes:
+                requests = getattr(pane, "requests", None)
+                if requests is not None:
+                    h, f = requests.cache_counts()
+                    hits += h
+                    fetched += f
+            out[name] = {
+                "created": True,
+                "storage_path": engine.persistentStoragePath(),
+                "cache_path": engine.cachePath(),
+                "cache_max_mb": engine.httpCacheMaximumSize() // 2**20,   # 0 = Qt default
+                "cache_bytes": dir_size(engine.cachePath()),
+                "cookies": len(profile.cookies),
+                "cookie_policy": COOKIE_POLICIES.get(engine.persistentCookiesPolicy()),
+                "panes": len(panes),
+                "cache_hits": hits,
+                "network_fetches": fetched,
+                "hit_ratio": round(hits / (hits + fetched), 3) if hits + fetched else None,
+                "cache_clears": profile.cleared,
+                "origin_clears": profile.origins_cleared,
+            }
+        return out
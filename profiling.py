@@ -0,0 +1,294 @@
+"""Profiling captures: cProfile, per-slot timings and a Chromium trace."""
+import bisect
+import cProfile
+import functools
+import inspect
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import time
+from collections import deque
+
+from PyQt5.QtCore import QObject, QTimer, QUrl, QEventLoop
+from PyQt5.QtNetwork import QNetworkAccessManager, QNetworkRequest
+from PyQt5.QtWebSockets import QWebSocket
+
+from paths import DATA_DIR
+
+log = logging.getLogger("splitbrowser.profiling")
+
+PROFILE_DIR = os.path.join(DATA_DIR, "profiles")
+DEVTOOLS_PORT = 9229
+FRAME_MS = 16.7
+# Upper bounds (ms) of the slot duration histogram buckets; the last is open
+BUCKETS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16.7, 33, 66, 100, 250, 1000)
+TRACE_CATEGORIES = [
+    "toplevel", "benchmark", "blink", "cc", "gpu", "v8", "viz", "loading",
+    "navigation", "input", "disabled-by-default-devtools.timeline",
+]
+
+_recording = []     # the active SlotTimings, if any; read by every wrapper
+
+
+class SlotTimings:
+    """Duration samples and a fixed-bucket histogram per slot."""
+
+    def __init__(self, keep=10000):
+        self.keep = keep
+        self.samples = {}       # name -> deque of ms
+        self.histograms = {}    # name -> [count per bucket]
+
+    def add(self, name, ms):
+        if name not in self.samples:
+            self.samples[name] = deque(maxlen=self.keep)
+            self.histograms[name] = [0] * (len(BUCKETS) + 1)
+        self.samples[name].append(ms)
+        self.histograms[name][bisect.bisect_left(BUCKETS, ms)] += 1
+
+    def summary(self):
+        rows = {}
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            histogram = self.histograms[name]
+            rows[name] = {
+                "calls": sum(histogram),
+                "total_ms": round(sum(ordered), 2),
+                "p50_ms": round(ordered[len(ordered) // 2], 3),
+                "p95_ms": round(ordered[int(len(ordered) * 0.95)], 3),
+                "max_ms": round(ordered[-1], 3),
+                "over_frame": sum(ms > FRAME_MS for ms in ordered),
+                "histogram": {("<=%g" % b if i < len(BUCKETS) else ">%g" % BUCKETS[-1]): n
+                              for i, (b, n) in enumerate(zip(BUCKETS + (None,), histogram))
+                              if n},
+            }
+        return dict(sorted(rows.items(), key=lambda kv: -kv[1]["total_ms"]))
+
+    def table(self):
+        lines = ["%-40s %8s %10s %9s %9s %9s %6s" % (
+            "slot", "calls", "total ms", "p50 ms", "p95 ms", "max ms", ">16ms")]
+        for name, row in self.summary().items():
+            lines.append("%-40s %8d %10.1f %9.3f %9.3f %9.3f %6d" % (
+                name, row["calls"], row["total_ms"], row["p50_ms"], row["p95_ms"],
+                row["max_ms"], row["over_frame"]))
+        return "\n".join(lines)
+
+
+def _timed(name, func):
+    # Qt passes every signal argument and leaves it to the slot to ignore
+    # the extra ones, so trim them here as PyQt would on a TypeError
+    spec = inspect.getfullargspec(func)
+    nargs = None if spec.varargs else len(spec.args)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if nargs is not None:
+            args = args[:nargs]
+        if not _recording:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _recording[0].add(name, (time.perf_counter() - start) * 1000)
+    wrapper.timed = True
+    return wrapper
+
+
+def instrument(*classes):
+    """Wrap the methods of 'classes' so recorded captures time them.
+
+    Must run before the instances connect their signals: a connection
+    holds on to the function it was made with.
+    """
+    for cls in classes:
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith("__") or not inspect.isfunction(value) \
+                    or getattr(value, "timed", False):
+                continue
+            setattr(cls, attr, _timed(f"{cls.__name__}.{attr}", value))
+
+
+class ChromiumTracer(QObject):
+    """Records a Chromium trace over the DevTools protocol.
+
+    Needs the engine started with --remote-debugging-port=<port>. The
+    trace is streamed as Tracing.dataCollected events and written in the
+    JSON format chrome://tracing and Perfetto load.
+    """
+
+    def __init__(self, parent, port):
+        super().__init__(parent)
+        self.port = port
+        self.network = QNetworkAccessManager(self)
+        self.socket = None
+        self.events = []
+        self.path = None
+        self.state = "idle"     # idle, connecting, tracing, ending
+        self.next_id = 0
+
+    def start(self, path, attempts=10):
+        self.path = path
+        self.events = []
+        self.state = "connecting"
+        self._discover(attempts)
+
+    def _discover(self, attempts):
+        # The DevTools server comes up with the first web contents
+        reply = self.network.get(QNetworkRequest(
+            QUrl("http://127.0.0.1:%d/json/version" % self.port)))
+        reply.finished.connect(lambda: self._discovered(reply, attempts))
+
+    def _discovered(self, reply, attempts):
+        reply.deleteLater()
+        if self.state != "connecting":
+            return
+        try:
+            target = json.loads(bytes(reply.readAll()).decode())["webSocketDebuggerUrl"]
+        except (ValueError, KeyError):
+            if attempts > 1:
+                QTimer.singleShot(500, lambda: self._discover(attempts - 1))
+            else:
+                log.warning("no DevTools endpoint on port %d, Chromium trace skipped", self.port)
+                self.state = "idle"
+            return
+        self.socket = QWebSocket()
+        self.socket.setParent(self)
+        self.socket.connected.connect(self._connected)
+        self.socket.textMessageReceived.connect(self._message)
+        self.socket.open(QUrl(target))
+
+    def _send(self, method, params=None):
+        self.next_id += 1
+        self.socket.sendTextMessage(json.dumps(
+            {"id": self.next_id, "method": method, "params": params or {}}))
+
+    def _connected(self):
+        if self.state != "connecting":
+            return
+        self.state = "tracing"
+        self._send("Tracing.start", {
+            "transferMode": "ReportEvents",
+            "traceConfig": {"includedCategories": TRACE_CATEGORIES},
+        })
+
+    def _message(self, text):
+        message = json.loads(text)
+        if "error" in message:
+            log.warning("DevTools: %s", message["error"].get("message"))
+        method = message.get("method")
+        if method == "Tracing.dataCollected":
+            self.events.extend(message["params"]["value"])
+        elif method == "Tracing.tracingComplete":
+            self._write()
+
+    def stop(self, timeout=10000):
+        """End the trace and wait (running the event loop) until it is saved."""
+        if self.state == "connecting":
+            self.state = "idle"
+        if self.state != "tracing":
+            return
+        self.state = "ending"
+        self._send("Tracing.end")
+        deadline = time.monotonic() + timeout / 1000
+        while self.state == "ending" and time.monotonic() < deadline:
+            loop = QEventLoop()
+            QTimer.singleShot(50, loop.quit)
+            loop.exec_()
+        if self.state == "ending":
+            log.warning("Chromium trace did not complete in time")
+            self._write()
+
+    def _write(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.events}, f)
+        log.info("Chromium trace: %d events -> %s", len(self.events), self.path)
+        self.events = []
+        self.state = "idle"
+        if self.socket is not None:
+            self.socket.close()
+            self.socket.deleteLater()
+            self.socket = None
+
+
+class Profiler(QObject):
+    """One capture at a time into a timestamped directory under 'root'.
+
+    A capture holds python.prof (cProfile of the GUI thread, for pstats or
+    snakeviz) with a python.txt excerpt, slots.json / slots.txt (duration
+    histograms of the methods passed through instrument()) and, when the
+    DevTools port is open, chromium-trace.json; without it a
+    chromium-trace.txt says why there is no trace.
+    """
+
+    def __init__(self, parent, root=PROFILE_DIR, devtools_port=None):
+        super().__init__(parent)
+        self.root = root
+        self.tracer = ChromiumTracer(self, devtools_port) if devtools_port else None
+        self.profile = None
+        self.slots = None
+        self.directory = None
+
+    @property
+    def running(self):
+        return self.profile is not None
+
+    def start(self):
+        if self.running:
+            return
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        self.directory = os.path.join(self.root, "profile-" + stamp)
+        os.makedirs(self.directory, exist_ok=True)
+        self.slots = SlotTimings()
+        _recording[:] = [self.slots]
+        if self.tracer is not None:
+            self.tracer.start(os.path.join(self.directory, "chromium-trace.json"))
+        else:
+            log.warning("no DevTools port, the capture has no Chromium trace")
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+        log.info("profiling into %s", self.directory)
+
+    def stop(self):
+        """End the capture, write its files and return the directory."""
+        if not self.running:
+            return None
+        self.profile.disable()
+        _recording[:] = []
+        if self.tracer is not None:
+            self.tracer.stop()
+
+        self.profile.dump_stats(os.path.join(self.directory, "python.prof"))
+        text = io.StringIO()
+        pstats.Stats(self.profile, stream=text).sort_stats("cumulative").print_stats(40)
+        with open(os.path.join(self.directory, "python.txt"), "w", encoding="utf-8") as f:
+            f.write(text.getvalue())
+        with open(os.path.join(self.directory, "slots.json"), "w", encoding="utf-8") as f:
+            json.dump(self.slots.summary(), f, indent=1)
+        table = self.slots.table()
+        with open(os.path.join(self.directory, "slots.txt"), "w", encoding="utf-8") as f:
+            f.write(table + "\n")
+        if self.tracer is None:
+            with open(os.path.join(self.directory, "chromium-trace.txt"), "w",
+                      encoding="utf-8") as f:
+                f.write("No Chromium trace: the DevTools port was not open. "
+                        "Start with --devtools-port PORT to record one.\n")
+        self.profile = None
+        return self.directory
+
+    def set_recording(self, on):
+        """Menu action handler."""
+        if on:
+            self.start()
+        else:
+            self.stop()
+
+    def close(self):
+        """At exit: finish a running capture and print the slot summary."""
+        if not self.running:
+            return
+        table = self.slots.table()
+        directory = self.stop()
+        sys.stderr.write(f"{table}\nprofile written to {directory}\n")
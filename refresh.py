@@ -0,0 +1,169 @@
+"""Central auto-refresh scheduler: staggered, capped and backing off on failures."""
+import logging
+import random
+import statistics
+import time
+from collections import deque
+
+from PyQt5.QtCore import QObject, QTimer
+
+from lifecycle import ACTIVE, is_pane_visible
+
+log = logging.getLogger("splitbrowser.refresh")
+
+INTERVALS = (30, 60, 300, 900)      # seconds offered in the pane menu
+MAX_BACKOFF = 900                   # seconds
+LOAD_TIMEOUT = 60                   # seconds before a reload counts as failed
+
+
+class RefreshScheduler(QObject):
+    """Reloads panes that have an auto-refresh interval.
+
+    Each pane's first reload lands at a random phase of its interval and
+    every later one is jittered by +/- 'jitter', so panes sharing an
+    interval never line up. At most 'max_concurrent' reloads run at once
+    and starts are at least 'spacing' ms apart; due panes wait in a queue.
+    Hidden or frozen panes are skipped until their next turn, and a failed
+    load doubles the wait (up to MAX_BACKOFF) until one succeeds.
+    """
+
+    def __init__(self, main_window, max_concurrent=2, jitter=0.1, spacing=250):
+        super().__init__(main_window)
+        self.main = main_window
+        self.max_concurrent = max_concurrent
+        self.jitter = jitter
+        self.spacing = spacing / 1000
+        self.entries = {}           # pane -> {"interval", "due", "failures"}
+        self.queue = deque()        # due panes waiting for a free slot
+        self.running = {}           # pane -> (start time, loadFinished slot)
+        self.last_start = 0.0
+        self.reloads = 0
+        self.failures = 0
+        self.skipped = 0
+        self.latencies = deque(maxlen=200)
+        self.waits = deque(maxlen=200)
+        self.random = random.Random()
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.tick)
+
+    def set_interval(self, pane, seconds):
+        """Auto-refresh 'pane' every 'seconds' (None or 0 turns it off)."""
+        pane.refresh_interval = seconds or None
+        if not seconds:
+            self.remove(pane)
+            return
+        phase = self.random.uniform(0, seconds)
+        self.entries[pane] = {"interval": seconds, "due": time.monotonic() + phase,
+                              "failures": 0}
+        self._arm()
+
+    def remove(self, pane):
+        self.entries.pop(pane, None)
+        if pane in self.queue:
+            self.queue.remove(pane)
+        self._finish(pane, None)
+
+    def _next_due(self, entry, ok):
+        """Schedule the next reload; ok=None (skipped) keeps the backoff as it is."""
+        interval = entry["interval"]
+        if ok:
+            entry["failures"] = 0
+        elif ok is not None:
+            entry["failures"] += 1
+        if entry["failures"]:
+            interval = min(interval * 2 ** entry["failures"], max(MAX_BACKOFF, interval))
+        spread = interval * self.jitter
+        entry["due"] = time.monotonic() + interval + self.random.uniform(-spread, spread)
+
+    def tick(self):
+        now = time.monotonic()
+        # Reloads that never finished count as failures
+        for pane, (start, _) in list(self.running.items()):
+            if now - start > LOAD_TIMEOUT:
+                self._finish(pane, False)
+
+        for pane, entry in self.entries.items():
+            if entry["due"] <= now and pane not in self.queue and pane not in self.running:
+                entry["due"] = float("inf")     # until it has been handled
+                entry["queued_at"] = now
+                self.queue.append(pane)
+
+        while self.queue and len(self.running) < self.max_concurrent:
+            if now - self.last_start < self.spacing:
+                break
+            pane = self.queue.popleft()
+            entry = self.entries.get(pane)
+            if entry is None:
+                continue
+            view = pane.webview
+            if view is None or not is_pane_visible(pane) \
+                    or view.page().lifecycleState() != ACTIVE:
+                self.skipped += 1
+                self._next_due(entry, None)
+                continue
+            self._start(pane, view, entry, now)
+        self._arm()
+
+    def _start(self, pane, view, entry, now):
+        self.waits.append(now - entry.pop("queued_at", now))
+        slot = lambda ok, p=pane: self._finish(p, ok)
+        view.loadFinished.connect(slot)
+        self.running[pane] = (time.monotonic(), slot)
+        self.last_start = now
+        self.reloads += 1
+        pane.reload()
+
+    def _finish(self, pane, ok):
+        start, slot = self.running.pop(pane, (None, None))
+        if start is None:
+            return
+        if pane.webview is not None:
+            try:
+                pane.webview.loadFinished.disconnect(slot)
+            except TypeError:
+                pass
+        if ok is None:
+            return
+        self.latencies.append(time.monotonic() - start)
+        entry = self.entries.get(pane)
+        if not ok:
+            self.failures += 1
+            log.info("auto-refresh of %s failed, backing off", pane.url())
+        if entry is not None:
+            self._next_due(entry, ok)
+        self._arm(0)
+
+    def _arm(self, delay=None):
+        if delay is None:
+            now = time.monotonic()
+            if self.queue and len(self.running) < self.max_concurrent:
+                delay = max(0.0, self.last_start + self.spacing - now)
+            else:
+                dues = [e["due"] for e in self.entries.values() if e["due"] != float("inf")]
+                if self.running:
+                    dues.append(min(s for s, _ in self.running.values()) + LOAD_TIMEOUT)
+                if not dues:
+                    self.timer.stop()
+                    return
+                delay = max(0.0, min(dues) - now)
+        self.timer.start(int(delay * 1000) + 1)
+
+    def stats(self):
+        def summary(values):
+            if not values:
+                return None
+            ordered = sorted(values)
+            return {"mean_ms": round(statistics.mean(ordered) * 1000, 1),
+                    "p95_ms": round(ordered[int(len(ordered) * 0.95)] * 1000, 1)}
+        return {
+            "panes": len(self.entries),
+            "queue_depth": len(self.queue),
+            "running": len(self.running),
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "latency": summary(self.latencies),
+            "queue_wait": summary(self.waits),
+        }
@@ -0,0 +1,58 @@
+"""Pane / tab registry with constant-time lookups."""
+
+
+class PaneRegistry:
+    """Maps pane -> tab container -> tab index.
+
+    MainWindow keeps it in sync on add, close, split and reorder, so focus
+    changes and title updates never have to scan the tabs.
+    """
+
+    def __init__(self):
+        self.containers = []    # in tab order
+        self.index_of   = {}    # container -> tab index
+        self.tab_of     = {}    # pane -> container
+
+    def __len__(self):
+        return len(self.tab_of)
+
+    def panes(self):
+        return list(self.tab_of)
+
+    def container(self, pane):
+        return self.tab_of.get(pane)
+
+    def index(self, pane):
+        """Tab index of the pane, or -1 if it is not registered."""
+        cont = self.tab_of.get(pane)
+        return -1 if cont is None else self.index_of[cont]
+
+    def add_tab(self, cont):
+        """Register a container appended at the end of the tab bar."""
+        self.index_of[cont] = len(self.containers)
+        self.containers.append(cont)
+        for pane in cont.panes:
+            self.tab_of[pane] = cont
+
+    def remove_tab(self, index):
+        cont = self.containers.pop(index)
+        del self.index_of[cont]
+        for pane in cont.panes:
+            self.tab_of.pop(pane, None)
+        self._reindex(index, len(self.containers))
+        return cont
+
+    def move_tab(self, src, dst):
+        """Follow a QTabBar.tabMoved(src, dst)."""
+        self.containers.insert(dst, self.containers.pop(src))
+        self._reindex(min(src, dst), max(src, dst) + 1)
+
+    def add_pane(self, cont, pane):
+        self.tab_of[pane] = cont
+
+    def remove_pane(self, pane):
+        self.tab_of.pop(pane, None)
+
+    def _reindex(self, start, stop):
+        for i in range(start, stop):
+            self.index_of[self.containers[i]] = i
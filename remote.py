@@ -0,0 +1,374 @@
+"""Local remote control: JSON-RPC 2.0 over a Unix socket.
+
+One JSON request (or a JSON array of requests, a batch) per line; one
+response line per request line. A batch is applied inside
+MainWindow.batch(), so reconfiguring many panes costs one repaint and
+every pane loads its final URL only once.
+
+    echo '{"jsonrpc": "2.0", "id": 1, "method": "state"}' | nc -U ~/.splitbrowser/control.sock
+"""
+import base64
+import itertools
+import json
+import logging
+import os
+import socket
+
+from PyQt5.QtCore import QObject, QBuffer, QByteArray, QIODevice, QUrl
+from PyQt5.QtNetwork import QLocalServer
+
+from layout import BY_NAME, DIRECTIONS
+from paths import DATA_DIR
+from snapshots import origin_of
+
+log = logging.getLogger("splitbrowser.remote")
+
+CONTROL_SOCKET = os.path.join(DATA_DIR, "control.sock")
+
+PARSE_ERROR      = -32700
+INVALID_REQUEST  = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS   = -32602
+SERVER_ERROR     = -32000
+
+
+def server_running(path, timeout=1.0):
+    """Whether something accepts connections on the Unix socket 'path'."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        return False
+    finally:
+        sock.close()
+    return True
+
+
+class RemoteError(Exception):
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class RemoteControl(QObject):
+    """Serves the rpc_* methods below on a QLocalServer.
+
+    Panes are addressed by tab index and pane index; both default to the
+    current one. The server runs on the Qt event loop, so commands apply
+    between two events like menu actions do. A socket another instance
+    still answers on is left alone and this one does not listen.
+    """
+
+    def __init__(self, main_window, path=CONTROL_SOCKET):
+        super().__init__(main_window)
+        self.main = main_window
+        self.path = path
+        self.buffers = {}
+        self.served = 0
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self._accept)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if server_running(path):
+            log.error("another instance serves %s, remote control disabled", path)
+            return
+        QLocalServer.removeServer(path)     # stale socket of a dead instance
+        if not self.server.listen(path):
+            log.warning("cannot listen on %s: %s", path, self.server.errorString())
+
+    def close(self):
+        self.server.close()
+
+    def _accept(self):
+        while self.server.hasPendingConnections():
+            conn = self.server.nextPendingConnection()
+            self.buffers[conn] = b""
+            conn.readyRead.connect(lambda c=conn: self._read(c))
+            conn.disconnected.connect(lambda c=conn: self._drop(c))
+
+    def _drop(self, conn):
+        self.buffers.pop(conn, None)
+        conn.deleteLater()
+
+    def _read(self, conn):
+        data = self.buffers.get(conn, b"") + bytes(conn.readAll())
+        *lines, self.buffers[conn] = data.split(b"\n")
+        for line in lines:
+            if line.strip():
+                reply = self.handle_line(line)
+                if reply is not None:
+                    conn.write(reply.encode() + b"\n")
+        conn.flush()
+
+    def handle_line(self, line):
+        """Response text for one request line, or None for notifications."""
+        try:
+            message = json.loads(line)
+        except ValueError as exc:
+            return json.dumps(error_response(None, PARSE_ERROR, str(exc)))
+        if isinstance(message, list):
+            if not message:
+                return json.dumps(error_response(None, INVALID_REQUEST, "empty batch"))
+            with self.main.batch():
+                replies = [self.handle(m) for m in message]
+            replies = [r for r in replies if r is not None]
+            return json.dumps(replies) if replies else None
+        reply = self.handle(message)
+        return json.dumps(reply) if reply is not None else None
+
+    def handle(self, message):
+        if not isinstance(message, dict) or not isinstance(message.get("method"), str):
+            return error_response(None, INVALID_REQUEST, "not a JSON-RPC request")
+        request_id = message.get("id")
+        params = message.get("params", {})
+        method = getattr(self, "rpc_" + message["method"], None)
+        self.served += 1
+        try:
+            if method is None:
+                raise RemoteError(METHOD_NOT_FOUND, "unknown method " + message["method"])
+            if isinstance(params, list):
+                result = method(*params)
+            elif isinstance(params, dict):
+                result = method(**params)
+            else:
+                raise RemoteError(INVALID_PARAMS, "params must be an array or object")
+        except RemoteError as exc:
+            reply = error_response(request_id, exc.code, exc.message)
+        except (TypeError, ValueError, IndexError, KeyError) as exc:
+            reply = error_response(request_id, INVALID_PARAMS, str(exc))
+        except Exception as exc:
+            log.exception("remote call %s failed", message["method"])
+            reply = error_response(request_id, SERVER_ERROR, str(exc))
+        else:
+            reply = {"jsonrpc": "2.0", "id": request_id, "result": result}
+        return reply if "id" in message else None
+
+    # Addressing
+
+    def container(self, tab=None):
+        if tab is None:
+            tab = self.main.tab_widget.currentIndex()
+        if not 0 <= tab < self.main.tab_widget.count():
+            raise IndexError("no tab %d" % tab)
+        return self.main.tab_widget.widget(tab)
+
+    def pane(self, tab=None, pane=None):
+        cont = self.container(tab)
+        if pane is None:
+            return cont.current
+        if not 0 <= pane < len(cont.panes):
+            raise IndexError("no pane %d" % pane)
+        return cont.panes[pane]
+
+    # Methods
+
+    def rpc_add_tab(self, urls=None, orientation="horizontal", profile="default"):
+        cont = self.main.create_tab(urls, BY_NAME[orientation], profile=profile)
+        self.main.tab_widget.setCurrentWidget(cont)
+        self.main.set_current_pane(cont.current)
+        return {"tab": self.main.registry.index_of[cont]}
+
+    def rpc_close_tab(self, tab=None):
+        cont = self.container(tab)
+        self.main.close_tab(self.main.registry.index_of[cont])
+        return True
+
+    def rpc_split_current(self, count, orientation="horizontal", tab=None):
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        self.main.set_current_pane(self.container(tab).current)
+        self.main.split_current(BY_NAME[orientation], count)
+        return {"panes": len(self.container(tab).panes)}
+
+    def rpc_grid(self, rows, cols, tab=None):
+        if rows < 1 or cols < 1:
+            raise ValueError("rows and cols must be at least 1")
+        self.main.set_current_pane(self.container(tab).current)
+        self.main.grid_current(rows, cols)
+        return {"panes": len(self.container(tab).panes)}
+
+    def rpc_split_pane(self, orientation="horizontal", tab=None, pane=None):
+        self.main.set_current_pane(self.pane(tab, pane))
+        self.main.split_pane(BY_NAME[orientation])
+        return {"panes": len(self.container(tab).panes)}
+
+    def rpc_move_focus(self, direction):
+        if direction not in DIRECTIONS:
+            raise ValueError("direction must be one of " + ", ".join(DIRECTIONS))
+        self.main.move_focus(direction)
+        cont = self.container()
+        return {"pane": cont.panes.index(cont.current)}
+
+    def rpc_navigate(self, url, tab=None, pane=None):
+        self.pane(tab, pane).navigate(url)
+        return True
+
+    def rpc_set_refresh(self, seconds, tab=None, pane=None):
+        """Auto-refresh interval of a pane in seconds; 0 or null turns it off."""
+        self.pane(tab, pane).set_refresh(seconds)
+        return True
+
+    def rpc_back(self, tab=None, pane=None):
+        self.pane(tab, pane).ensure_webview().back()
+        return True
+
+    def rpc_forward(self, tab=None, pane=None):
+        self.pane(tab, pane).ensure_webview().forward()
+        return True
+
+    def rpc_reload(self, tab=None, pane=None):
+        self.pane(tab, pane).reload()
+        return True
+
+    def rpc_focus(self, tab=None, pane=None):
+        self.main.set_current_pane(self.pane(tab, pane))
+        return True
+
+    def rpc_full_pane(self, on=True, tab=None, pane=None):
+        self.main.set_current_pane(self.pane(tab, pane))
+        # Re-enter so another pane of the tab can take over the full pane
+        self.main.full_pane_action.setChecked(False)
+        self.main.full_pane_action.setChecked(on)
+        return True
+
+    def rpc_screenshot(self, path=None, tab=None, pane=None):
+        """PNG of a pane's page, written to 'path' or returned as base64."""
+        view = self.pane(tab, pane).webview
+        if view is None:
+            raise RemoteError(SERVER_ERROR, "pane has not loaded yet")
+        image = view.grab()
+        result = {"width": image.width(), "height": image.height()}
+        if path:
+            if not image.save(path, "PNG"):
+                raise RemoteError(SERVER_ERROR, "cannot write " + path)
+            result["path"] = path
+        else:
+            data = QByteArray()
+            buf = QBuffer(data)
+            buf.open(QIODevice.WriteOnly)
+            image.save(buf, "PNG")
+            result["png"] = base64.b64encode(bytes(data)).decode("ascii")
+        return result
+
+    def rpc_state(self):
+        state = self.main.session.snapshot()
+        for cont, tab in zip(self.main.registry.containers, state["tabs"]):
+            tab["full_pane"] = cont.is_pane_fs
+            tab["panes"] = [{
+                "url": pane.url(),
+                "title": pane.webview.title() if pane.webview is not None else "",
+                "loaded": pane.webview is not None,
+            } for pane in cont.panes]
+        state["lifecycle"] = self.main.lifecycle.counts()
+        state["memory"] = self.main.memory.stats()
+        return state
+
+    def rpc_metrics(self):
+        return self.main.metrics.snapshot()
+
+    def rpc_download(self, url, tab=None, pane=None):
+        """Download 'url' through a pane's page (the download manager queues it)."""
+        self.pane(tab, pane).ensure_webview().page().download(QUrl(url))
+        return True
+
+    def rpc_downloads(self):
+        manager = self.main.downloads
+        return {"stats": manager.stats(), "downloads": [d.as_dict() for d in manager.downloads]}
+
+    def rpc_refresh_stats(self):
+        return self.main.refresher.stats()
+
+    def rpc_startup(self):
+        """Start-up timeline in ms since process start (complete after the first load)."""
+        return self.main.startup.report()
+
+    def rpc_speculation_stats(self):
+        return self.main.predictor.stats()
+
+    def rpc_network_log(self, limit=10, tab=None, pane=None):
+        """Request counts, bytes per type and the slowest requests of a pane."""
+        summary = self.main.netlog.summary(self.pane(tab, pane), limit)
+        if summary is None:
+            raise RemoteError(SERVER_ERROR, "no network log for this pane")
+        return summary
+
+    def rpc_export_har(self, path, tab=None, pane=None):
+        """Write a pane's request log (timings merged so far) as HAR."""
+        target = self.pane(tab, pane)
+        if getattr(target, "requests", None) is None:
+            raise RemoteError(SERVER_ERROR, "no network log for this pane")
+        return {"path": path, "entries": self.main.netlog.write_har(target, path)}
+
+    def rpc_profiles(self):
+        """Cache location, size and hit ratio, cookies and panes of every profile."""
+        return self.main.profiles.stats()
+
+    def rpc_set_profile(self, name, tab=None, pane=None):
+        """Move a pane (or with pane "all", every pane of the tab) to profile 'name'."""
+        if pane == "all":
+            self.main.set_tab_profile(name, self.container(tab))
+        else:
+            self.pane(tab, pane).set_profile(name)
+        return True
+
+    def rpc_clear_cache(self, tab=None, pane=None):
+        """Clear the HTTP cache of a pane's profile only."""
+        target = self.pane(tab, pane)
+        target.clear_cache()
+        return {"profile": target.profile_name}
+
+    def rpc_clear_site_data(self, origin=None, tab=None, pane=None):
+        """Delete one origin's cookies and storage (default: the pane's site) in its profile."""
+        target = self.pane(tab, pane)
+        origin = origin or origin_of(target.url())
+        self.main.profiles.clear_origin(target.profile_name, origin)
+        return {"profile": target.profile_name, "origin": origin}
+
+    def rpc_search(self, query, limit=10):
+        """Open panes whose page text matches 'query', best first."""
+        return [{"tab": hit["tab"], "pane": hit["index"], "score": hit["score"],
+                 "title": hit["title"], "url": hit["url"], "snippet": hit["snippet"]}
+                for hit in self.main.search.search(query, limit)]
+
+
+def error_response(request_id, code, message):
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+class RemoteClient:
+    """Minimal blocking client for scripts and benchmarks."""
+
+    def __init__(self, path=CONTROL_SOCKET, timeout=30):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self.file = self.sock.makefile("rb")
+        self.ids = itertools.count(1)
+
+    def _send(self, payload):
+        self.sock.sendall(json.dumps(payload).encode() + b"\n")
+        return json.loads(self.file.readline())
+
+    def call(self, method, **params):
+        reply = self._send({"jsonrpc": "2.0", "id": next(self.ids),
+                            "method": method, "params": params})
+        return result_of(reply)
+
+    def batch(self, calls):
+        """Send [(method, params), ...] as one batch; returns the results."""
+        requests = [{"jsonrpc": "2.0", "id": next(self.ids), "method": m, "params": p}
+                    for m, p in calls]
+        replies = {r["id"]: r for r in self._send(requests)}
+        return [result_of(replies[r["id"]]) for r in requests]
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+def result_of(reply):
+    if "error" in reply:
+        raise RemoteError(reply["error"]["code"], reply["error"]["message"])
+    return reply["result"]
@@ -0,0 +1,255 @@
+"""Headless batch rendering of URL lists into split-layout PNGs.
+
+    python main.py render --urls urls.txt --grid 2x2 --out shots/ [--concurrency 4]
+
+The URLs are cut into boards of rows x cols panes. Each board is a tab
+of an offscreen MainWindow built from the usual layout tree, so the PNGs
+look like the wallboards on screen. Pages load in the background tabs
+with at most --concurrency loads running; a board is captured --settle
+ms after its last loadFinished, then closed. manifest.json records the
+load time of every page and the overall pages per minute.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from config import PRESETS
+from layout import grid_spec
+
+# Everything that would persist state, speculate or index is off
+RENDER_OPTIONS = {
+    "home_url": "about:blank",
+    "lazy_panes": True,
+    "freeze_after": None,
+    "memory_budget_mb": None,
+    "session_path": None,
+    "history_path": None,
+    "snapshot_dir": None,
+    "webview_pool": 0,
+    "thumbnail_budget_mb": 0,
+    "speculative_hints": 0,
+    "max_prerenders": 0,
+    "search_index_mb": 0,
+    "network_log": 0,
+    "control_socket": None,
+    "background_throttling": False,
+}
+PAINT_MS = 300      # from showing a board to grabbing it
+
+
+class BatchRenderer(QObject):
+    """Feeds boards through a MainWindow and writes their PNGs.
+
+    Boards are created just ahead of the load queue, so at most a couple
+    exist besides the ones waiting for capture. Tab 0 (about:blank) stays
+    current while pages load: background tabs are never shown, so their
+    lazy panes load only when given a slot. Captures run one at a time.
+    """
+    finished = pyqtSignal(dict)
+
+    def __init__(self, window, urls, out_dir, rows=1, cols=1, concurrency=4, settle=500,
+                 timeout=30, per_pane=False):
+        super().__init__(window)
+        self.window = window
+        self.out_dir = out_dir
+        self.rows, self.cols = rows, cols
+        self.concurrency = concurrency
+        self.settle = settle
+        self.timeout = timeout
+        self.per_pane = per_pane
+        size = rows * cols
+        self.todo = deque(urls[i:i + size] for i in range(0, len(urls), size))
+        self.count = len(self.todo)
+        self.boards = []            # created and not yet captured
+        self.queue = deque()        # panes waiting for a load slot
+        self.loading = {}           # pane -> (board, start, loadFinished slot)
+        self.slots = {}             # pane -> (board, position in the board)
+        self.ready = deque()        # boards waiting for capture
+        self.capturing = None
+        self.manifest = []
+        self.started = None
+
+        self.watchdog = QTimer(self)
+        self.watchdog.setInterval(500)
+        self.watchdog.timeout.connect(self._check_timeouts)
+
+    def start(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        self.started = time.perf_counter()
+        self.watchdog.start()
+        self._pump()
+
+    def _pump(self):
+        # Keep enough boards open that every load slot has a page to take
+        while self.todo and len(self.queue) < self.concurrency:
+            self._open_board(self.todo.popleft())
+        while self.queue and len(self.loading) < self.concurrency:
+            self._load(self.queue.popleft())
+        if not self.todo and not self.boards:
+            self._finish()
+
+    def _open_board(self, urls):
+        leaves = [{"url": url} for url in urls]
+        leaves += [{"url": "about:blank"}] * (self.rows * self.cols - len(urls))
+        cont = self.window.create_tab(layout=grid_spec(self.rows, self.cols, leaves))
+        board = {"index": self.count - len(self.todo) - 1, "cont": cont,
+                 "created": time.perf_counter(), "waiting": len(cont.panes),
+                 "pages": [None] * len(cont.panes)}
+        self.boards.append(board)
+        for i, pane in enumerate(cont.panes):
+            self.slots[pane] = (board, i)
+            self.queue.append(pane)
+
+    def _load(self, pane):
+        board, _ = self.slots[pane]
+        view = pane.ensure_webview()
+        slot = lambda ok, p=pane: self._loaded(p, ok)
+        view.loadFinished.connect(slot)
+        self.loading[pane] = (board, time.perf_counter(), slot)
+
+    def _loaded(self, pane, ok, error=None):
+        board, start, slot = self.loading.pop(pane)
+        pane.webview.loadFinished.disconnect(slot)
+        _, i = self.slots[pane]
+        board["pages"][i] = {"url": pane.url(), "ok": ok,
+                             "load_ms": round((time.perf_counter() - start) * 1000, 1)}
+        if error:
+            board["pages"][i]["error"] = error
+        board["waiting"] -= 1
+        if board["waiting"] == 0:
+            QTimer.singleShot(self.settle, lambda: self._ready(board))
+        self._pump()
+
+    def _check_timeouts(self):
+        now = time.perf_counter()
+        for pane, (_, start, _) in list(self.loading.items()):
+            if now - start > self.timeout:
+                pane.webview.stop()
+                if pane in self.loading:    # stop() did not finish the load
+                    self._loaded(pane, False, "timeout")
+
+    def _ready(self, board):
+        self.ready.append(board)
+        self._capture_next()
+
+    def _capture_next(self):
+        if self.capturing is not None or not self.ready:
+            return
+        self.capturing = self.ready.popleft()
+        self.window.tab_widget.setCurrentWidget(self.capturing["cont"])
+        QTimer.singleShot(PAINT_MS, self._capture)
+
+    def _capture(self):
+        board, self.capturing = self.capturing, None
+        cont = board["cont"]
+        name = "board-%03d" % board["index"]
+        path = os.path.join(self.out_dir, name + ".png")
+        cont.grab().save(path, "PNG")
+        entry = {"board": board["index"], "png": os.path.basename(path),
+                 "seconds": round(time.perf_counter() - board["created"], 3),
+                 "panes": []}
+        for i, (pane, page) in enumerate(zip(cont.panes, board["pages"])):
+            if page["url"] == "about:blank":
+                continue        # padding of the last board
+            if self.per_pane:
+                page["png"] = "%s-pane-%d.png" % (name, i)
+                pane.webview.grab().save(os.path.join(self.out_dir, page["png"]), "PNG")
+            entry["panes"].append(page)
+        self.manifest.append(entry)
+
+        # Back to the blank tab first: closing the current tab would show
+        # another board and load its queued panes outside the limit
+        self.window.tab_widget.setCurrentIndex(0)
+        self.window.close_tab(self.window.registry.index_of[cont])
+        for pane in cont.panes:
+            del self.slots[pane]
+        self.boards.remove(board)
+        self._capture_next()
+        self._pump()
+
+    def _finish(self):
+        if self.started is None:
+            return
+        self.watchdog.stop()
+        seconds = time.perf_counter() - self.started
+        self.started = None
+        pages = [p for board in self.manifest for p in board["panes"]]
+        summary = {
+            "grid": "%dx%d" % (self.rows, self.cols),
+            "concurrency": self.concurrency,
+            "settle_ms": self.settle,
+            "boards": len(self.manifest),
+            "pages": len(pages),
+            "failed": sum(not p["ok"] for p in pages),
+            "seconds": round(seconds, 3),
+            "pages_per_minute": round(len(pages) / seconds * 60, 1) if seconds else None,
+            "results": sorted(self.manifest, key=lambda b: b["board"]),
+        }
+        with open(os.path.join(self.out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=1)
+        self.finished.emit(summary)
+
+
+def parse_size(text, sep="x"):
+    a, b = text.lower().split(sep)
+    return int(a), int(b)
+
+
+def read_urls(path):
+    f = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    with f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="main.py render",
+                                description="Render URL lists to PNGs offscreen")
+    p.add_argument("--urls", required=True, metavar="FILE",
+                   help="one URL per line ('-' reads stdin)")
+    p.add_argument("--out", required=True, metavar="DIR")
+    p.add_argument("--grid", default="1x1", type=parse_size, metavar="ROWSxCOLS")
+    p.add_argument("--size", default="1600x900", type=parse_size, metavar="WxH",
+                   help="board size in pixels")
+    p.add_argument("--concurrency", type=int, default=4, metavar="N",
+                   help="pages loading at the same time")
+    p.add_argument("--settle", type=int, default=500, metavar="MS",
+                   help="wait after a board's last loadFinished")
+    p.add_argument("--timeout", type=int, default=30, metavar="S", help="per page")
+    p.add_argument("--per-pane", action="store_true", help="also write one PNG per pane")
+    p.add_argument("--preset", choices=sorted(PRESETS), default="default")
+    return p
+
+
+def main(argv):
+    args = build_parser().parse_args(argv)
+    urls = read_urls(args.urls)
+    if not urls:
+        raise SystemExit("no URLs in " + args.urls)
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+    from PyQt5.QtWidgets import QApplication
+    from harness import make_window
+
+    window = make_window(args.preset, **RENDER_OPTIONS)
+    app = QApplication.instance()
+    window.menuBar().hide()
+    window.tab_widget.tabBar().hide()
+    window.resize(*args.size)
+    window.show()
+
+    rows, cols = args.grid
+    renderer = BatchRenderer(window, urls, args.out, rows, cols, args.concurrency,
+                             args.settle, args.timeout, args.per_pane)
+    result = {}
+    renderer.finished.connect(lambda summary: (result.update(summary), app.quit()))
+    QTimer.singleShot(0, renderer.start)
+    app.exec_()
+    window.close()
+    print(json.dumps({k: v for k, v in result.items() if k != "results"}, indent=1))
+    return 0 if result and not result["failed"] else 1
@@ -0,0 +1,107 @@
+"""Session persistence: save and restore the tab / splitter / pane tree."""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import Qt, QObject, QTimer
+
+from layout import BY_NAME, describe, flat_spec
+from paths import DATA_DIR, write_atomic
+
+SESSION_PATH = os.path.join(DATA_DIR, "session.json")
+VERSION      = 2     # 1: one flat splitter per tab; 2: layout tree
+
+
+class SessionManager(QObject):
+    """Debounced, atomic session writer and lazy session restorer.
+
+    The snapshot of the widget tree is taken on the GUI thread (it only
+    reads attributes); encoding and writing happen on a single worker
+    thread, and a write is skipped when nothing changed since the last one.
+    """
+
+    def __init__(self, main_window, path=SESSION_PATH, delay=1000):
+        super().__init__(main_window)
+        self.main = main_window
+        self.path = path
+        self.restoring = False
+        self.last_written = None
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.save)
+
+    def schedule(self, *_):
+        """Request a save; bursts of changes collapse into one write."""
+        if self.path and not self.restoring:
+            self.timer.start()
+
+    def snapshot(self):
+        """Plain-dict description of every tab, its layout tree and its panes."""
+        tabs = []
+        for i in range(self.main.tab_widget.count()):
+            cont = self.main.tab_widget.widget(i)
+            panes = cont.panes
+            saved = cont.prev_sizes if cont.is_pane_fs else None
+            tabs.append({
+                "layout": describe(cont.splitter, saved),
+                "current": panes.index(cont.current) if cont.current in panes else 0,
+            })
+        return {
+            "version": VERSION,
+            "current": self.main.tab_widget.currentIndex(),
+            "tabs": tabs,
+        }
+
+    def save(self):
+        if self.path:
+            self.executor.submit(self._write, self.snapshot())
+
+    def _write(self, data):
+        # Runs on the worker thread
+        text = json.dumps(data, indent=1)
+        if text == self.last_written:
+            return
+        write_atomic(self.path, text)
+        self.last_written = text
+
+    def flush(self):
+        """Write any pending change and wait for the worker (used at exit)."""
+        if self.timer.isActive():
+            self.timer.stop()
+            self.save()
+        self.executor.shutdown(wait=True)
+
+    def restore(self):
+        """Rebuild the saved layout with lazy panes; False if there is none."""
+        if not self.path:
+            return False
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") not in (1, VERSION) or not data.get("tabs"):
+            return False
+
+        self.restoring = True
+        try:
+            for tab in data["tabs"]:
+                spec = tab.get("layout")
+                if spec is None:
+                    # Version 1: a single splitter
+                    spec = flat_spec(
+                        BY_NAME.get(tab.get("orientation"), Qt.Horizontal),
+                        tab.get("panes") or [{"url": None}],
+                        tab.get("sizes") or None,
+                    )
+                self.main.create_tab(layout=spec, current=tab.get("current", 0))
+            current = data.get("current", 0)
+            if 0 <= current < self.main.tab_widget.count():
+                self.main.tab_widget.setCurrentIndex(current)
+            self.main.on_tab_changed(self.main.tab_widget.currentIndex())
+        finally:
+            self.restoring = False
+        return True
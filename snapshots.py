@@ -0,0 +1,199 @@
+"""Offline page snapshots: MHTML captures in a content-addressed LRU cache."""
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtWebEngineWidgets import QWebEngineDownloadItem
+
+from profiles import DEFAULT_PROFILE
+from paths import DATA_DIR, write_atomic
+
+SNAPSHOT_DIR = os.path.join(DATA_DIR, "snapshots")
+
+
+def origin_of(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def snapshot_key(profile, url):
+    # Index keys are JSON strings; a normalized URL holds no spaces
+    return "%s %s" % (profile, url)
+
+
+class SnapshotStore(QObject):
+    """MHTML snapshots keyed by browser profile and URL, stored once per content hash.
+
+    capture() asks the page to save itself (QWebEnginePage.save); hashing
+    and moving the file into blobs/ happen on a worker thread. The index
+    maps each (profile, URL) to its blob and last access time; when the
+    blobs exceed 'max_bytes' the least recently used URLs are dropped
+    first. A snapshot taken in one profile, possibly of a logged-in page,
+    is never shown in another.
+    """
+    _ingested = pyqtSignal(str, str, int)   # index key, content hash, size
+
+    def __init__(self, parent=None, root=SNAPSHOT_DIR, max_bytes=256 * 2**20,
+                 min_interval=300):
+        super().__init__(parent)
+        self.root = root
+        self.max_bytes = max_bytes
+        self.min_interval = min_interval
+        self.hits = 0
+        self.misses = 0
+        self.pending = {}           # temporary MHTML path -> index key
+        self.counter = itertools.count()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self._ingested.connect(self._add)
+
+        self.index = {}
+        if self.enabled:
+            self.blobs = os.path.join(root, "blobs")
+            self.index_path = os.path.join(root, "index.json")
+            os.makedirs(self.blobs, exist_ok=True)
+            try:
+                with open(self.index_path, encoding="utf-8") as f:
+                    self.index = json.load(f)
+            except (OSError, ValueError):
+                pass
+            # Entries from before profiles were part of the key
+            for key in [k for k, e in self.index.items() if "profile" not in e]:
+                entry = self.index.pop(key)
+                entry.update(profile=DEFAULT_PROFILE, url=key)
+                self.index[snapshot_key(DEFAULT_PROFILE, key)] = entry
+
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(1000)
+        self.save_timer.timeout.connect(self._save_index)
+
+    @property
+    def enabled(self):
+        return bool(self.root and self.max_bytes)
+
+    def blob_path(self, digest):
+        return os.path.join(self.blobs, digest + ".mhtml")
+
+    def lookup(self, profile, url):
+        """Path of the snapshot of 'url' taken in 'profile', or None."""
+        entry = self.index.get(snapshot_key(profile, url)) if self.enabled else None
+        if entry is None or not os.path.exists(self.blob_path(entry["hash"])):
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry["atime"] = time.time()
+        self.save_timer.start()
+        return self.blob_path(entry["hash"])
+
+    def capture(self, profile, page, url):
+        """Save 'page' of 'profile' as a snapshot of 'url' unless one is fresh enough."""
+        if not self.enabled or not url.startswith(("http://", "https://")):
+            return
+        key = snapshot_key(profile, url)
+        entry = self.index.get(key)
+        if entry and time.time() - entry["mtime"] < self.min_interval:
+            return
+        if key in self.pending.values():
+            return
+        tmp = os.path.join(self.root, "tmp-%d-%d.mhtml" % (os.getpid(), next(self.counter)))
+        self.pending[tmp] = key
+        page.save(tmp, QWebEngineDownloadItem.MimeHtmlSaveFormat)
+
+    def on_download(self, item):
+        """profile.downloadRequested: pick up our own save-page downloads."""
+        if not item.isSavePageDownload() or item.path() not in self.pending:
+            return
+        item.accept()
+        item.finished.connect(lambda: self._saved(item))
+
+    def _saved(self, item):
+        tmp = item.path()
+        key = self.pending.pop(tmp, None)
+        if key is None:
+            return
+        if item.state() == QWebEngineDownloadItem.DownloadCompleted:
+            self.executor.submit(self._ingest, tmp, key)
+        elif os.path.exists(tmp):
+            os.unlink(tmp)
+
+    def _ingest(self, tmp, key):
+        # Worker thread: hash, then move into place (or drop a duplicate)
+        digest = hashlib.sha256()
+        with open(tmp, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+        name = digest.hexdigest()
+        size = os.path.getsize(tmp)
+        target = self.blob_path(name)
+        if os.path.exists(target):
+            os.unlink(tmp)
+        else:
+            os.replace(tmp, target)
+        self._ingested.emit(key, name, size)
+
+    def _add(self, key, digest, size):
+        now = time.time()
+        profile, url = key.split(" ", 1)
+        old = self.index.get(key)
+        self.index[key] = {"hash": digest, "size": size, "profile": profile, "url": url,
+                           "origin": origin_of(url), "atime": now, "mtime": now}
+        if old and old["hash"] != digest:
+            self._drop_blob(old["hash"])
+        self.evict()
+        self.save_timer.start()
+
+    def total_bytes(self):
+        sizes = {e["hash"]: e["size"] for e in self.index.values()}
+        return sum(sizes.values())
+
+    def evict(self):
+        """Drop least recently used URLs until the blobs fit 'max_bytes'."""
+        total = self.total_bytes()
+        for key, entry in sorted(self.index.items(), key=lambda kv: kv[1]["atime"]):
+            if total <= self.max_bytes:
+                break
+            del self.index[key]
+            if self._drop_blob(entry["hash"]):
+                total -= entry["size"]
+
+    def _drop_blob(self, digest):
+        """Delete a blob no URL refers to any more; True if deleted."""
+        if any(e["hash"] == digest for e in self.index.values()):
+            return False
+        try:
+            os.unlink(self.blob_path(digest))
+        except OSError:
+            pass
+        return True
+
+    def clear_origin(self, profile, origin):
+        """Forget every snapshot of scheme://host[:port] taken in 'profile'."""
+        for key in [k for k, e in self.index.items()
+                    if e["origin"] == origin and e["profile"] == profile]:
+            entry = self.index.pop(key)
+            self._drop_blob(entry["hash"])
+        self.save_timer.start()
+
+    def clear(self):
+        for key in list(self.index):
+            self._drop_blob(self.index.pop(key)["hash"])
+        self.save_timer.start()
+
+    def stats(self):
+        return {"entries": len(self.index), "bytes": self.total_bytes(),
+                "hits": self.hits, "misses": self.misses}
+
+    def _save_index(self):
+        if self.enabled:
+            write_atomic(self.index_path, json.dumps(self.index))
+
+    def close(self):
+        if self.save_timer.isActive():
+            self.save_timer.stop()
+            self._save_index()
+        self.executor.shutdown(wait=True)
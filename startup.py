@@ -0,0 +1,111 @@
+"""Start-up timeline: process start -> window -> first paint -> engine -> first load."""
+import json
+import logging
+import os
+import time
+
+from PyQt5.QtCore import QObject, QEvent, QTimer, pyqtSignal
+
+from paths import write_atomic
+
+log = logging.getLogger("splitbrowser.startup")
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAINT_DEADLINE_MS = 2000   # emit painted anyway when nothing got painted
+
+
+def process_age():
+    """Seconds since this process was started, None when /proc cannot tell."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the command name; starttime is field 22 of stat
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(uptime - start_ticks / CLK_TCK, 0.0)
+
+
+# Process start on the monotonic clock; the import of this module when
+# /proc is not available
+_age = process_age()
+ORIGIN = time.monotonic() - (_age or 0.0)
+MARKS = {}
+
+
+def mark(name):
+    """Record milestone 'name' (the first time only), in ms since ORIGIN."""
+    if name not in MARKS:
+        MARKS[name] = round((time.monotonic() - ORIGIN) * 1000, 1)
+
+
+class StartupTimer(QObject):
+    """Watches the first paint and the first loadFinished of a MainWindow.
+
+    painted is emitted from the event loop right after the first frame
+    was flushed, which is when MainWindow starts Qt WebEngine. The
+    timeline is logged (and written to 'report_path') once the first page
+    has loaded, then finished is emitted.
+    """
+    painted = pyqtSignal()
+    finished = pyqtSignal(dict)
+
+    def __init__(self, main_window, report_path=None):
+        super().__init__(main_window)
+        self.main = main_window
+        self.report_path = report_path
+        self.watched = None
+        self.fired = False
+        self.done = False
+
+    def watch(self, widget):
+        """Wait for the first paint of 'widget' (falls back to a deadline)."""
+        self.watched = widget
+        widget.installEventFilter(self)
+        QTimer.singleShot(PAINT_DEADLINE_MS, self._painted)
+
+    def eventFilter(self, obj, event):
+        if obj is self.watched and event.type() == QEvent.Paint:
+            mark("first_paint")
+            obj.removeEventFilter(self)
+            self.watched = None
+            # Queued: the frame is flushed before the event loop gets here
+            QTimer.singleShot(0, self._painted)
+        return super().eventFilter(obj, event)
+
+    def _painted(self):
+        if self.fired:
+            return
+        self.fired = True
+        if self.watched is not None:
+            log.info("no paint within %d ms", PAINT_DEADLINE_MS)
+            self.watched.removeEventFilter(self)
+            self.watched = None
+        self.painted.emit()
+
+    def loaded(self):
+        """A pane finished loading; the first call completes the timeline."""
+        if self.done:
+            return
+        self.done = True
+        mark("first_load")
+        report = self.report()
+        ms = report["ms"]
+        log.info("startup: window %s ms, first paint %s ms, engine ready %s ms, "
+                 "first load %s ms", ms.get("window"), ms.get("first_paint"),
+                 ms.get("engine_ready"), ms.get("first_load"))
+        if self.report_path:
+            write_atomic(self.report_path, json.dumps(report, indent=1))
+        self.finished.emit(report)
+
+    def report(self):
+        ms = dict(sorted(MARKS.items(), key=lambda item: item[1]))
+        return {
+            "ms": ms,
+            "from_process_start": _age is not None,
+            "deferred_engine": self.main.defer_engine,
+            "engine_init_ms": round(ms["engine_ready"] - ms["engine_start"], 1)
+            if "engine_ready" in ms else None,
+            "start_page": self.main.start_url,
+        }
@@ -0,0 +1,339 @@
+"""Full-text search over the open pages: inverted index, indexer thread, search box."""
+import bisect
+import heapq
+import itertools
+import logging
+import math
+import queue
+import re
+import threading
+import time
+
+from PyQt5.QtCore import Qt, QObject, QTimer
+from PyQt5.QtWidgets import QDialog, QLabel, QLineEdit, QListWidget, QListWidgetItem, QVBoxLayout
+
+log = logging.getLogger("splitbrowser.textsearch")
+
+TOKEN_RE = re.compile(r"\w+")
+MAX_CHARS = 100000      # text kept per page
+MAX_TERMS = 20000       # distinct terms indexed per page
+POSTING_BYTES = 100     # rough cost of one posting, for the memory budget
+HEAD_BOOST = 2.0        # extra weight of a term found in the title or URL
+TICK_MS = 250           # spacing of page text collections
+
+
+def tokens(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class Document:
+    __slots__ = ("url", "title", "text", "tf", "head", "length", "cost", "seq")
+
+    def __init__(self, url, title, text, seq):
+        self.url = url
+        self.title = title
+        self.text = text[:MAX_CHARS]
+        words = tokens(self.text)
+        counts = {}
+        for word in words:
+            counts[word] = counts.get(word, 0) + 1
+        if len(counts) > MAX_TERMS:
+            counts = dict(heapq.nlargest(MAX_TERMS, counts.items(), key=lambda kv: kv[1]))
+        self.head = set(tokens(title or "") + tokens(url or ""))
+        for word in self.head:
+            counts.setdefault(word, 0)
+        self.tf = counts
+        self.length = max(len(words), 1)
+        self.cost = len(self.text) + POSTING_BYTES * len(counts)
+        self.seq = seq
+
+
+class TextIndex:
+    """Inverted index of page text, keyed by document id.
+
+    Documents are tokenized before the lock is taken, so a query waits at
+    most for the postings of one page to be merged. Queries AND their
+    terms, match the last one as a prefix (the user is still typing it)
+    through a sorted vocabulary rebuilt after each batch of updates, and
+    rank by BM25 with a bonus for title / URL terms and for the whole
+    query appearing as a phrase. When the estimated size exceeds
+    'budget' bytes the least recently indexed pages are dropped.
+    """
+
+    def __init__(self, budget=32 * 2**20, scan=64):
+        self.budget = budget
+        self.scan = scan
+        self.lock = threading.Lock()
+        self.docs = {}          # doc id -> Document
+        self.postings = {}      # term -> {doc id: term frequency}
+        self.vocab = []         # sorted terms, for prefix matches
+        self.size = 0
+        self.total_length = 0
+        self.seq = itertools.count()
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, doc_id, url, title, text):
+        doc = Document(url, title, text, next(self.seq))
+        with self.lock:
+            self._remove(doc_id)
+            self.docs[doc_id] = doc
+            for term, tf in doc.tf.items():
+                self.postings.setdefault(term, {})[doc_id] = tf
+            self.size += doc.cost
+            self.total_length += doc.length
+            while self.size > self.budget and len(self.docs) > 1:
+                oldest = min(self.docs, key=lambda d: self.docs[d].seq)
+                self._remove(oldest)
+                self.evicted += 1
+
+    def remove(self, doc_id):
+        with self.lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        doc = self.docs.pop(doc_id, None)
+        if doc is None:
+            return
+        for term in doc.tf:
+            posting = self.postings[term]
+            del posting[doc_id]
+            if not posting:
+                del self.postings[term]
+        self.size -= doc.cost
+        self.total_length -= doc.length
+
+    def rebuild_vocab(self):
+        with self.lock:
+            terms = list(self.postings)
+        self.vocab = sorted(terms)
+
+    def _matching(self, term, prefix):
+        """Postings of 'term', merged with those of words it starts if 'prefix'."""
+        exact = self.postings.get(term)
+        if not prefix:
+            return [exact] if exact else []
+        vocab = self.vocab
+        start = bisect.bisect_left(vocab, term)
+        merged = [self.postings[w] for w in vocab[start:start + self.scan]
+                  if w.startswith(term) and w in self.postings]
+        if exact and not any(p is exact for p in merged):
+            merged.append(exact)
+        return merged
+
+    def search(self, query, limit=20):
+        """[(doc id, score, title, url, snippet)] best first."""
+        terms = tokens(query)
+        if not terms:
+            return []
+        phrase = query.lower().strip()
+        with self.lock:
+            n = len(self.docs)
+            if not n:
+                return []
+            avg = self.total_length / n
+            per_term = []
+            for i, term in enumerate(terms):
+                postings = self._matching(term, i == len(terms) - 1)
+                if not postings:
+                    return []
+                per_term.append(postings)
+            # Intersect starting from the rarest term
+            matches = [set().union(*postings) for postings in per_term]
+            candidates = set.intersection(*sorted(matches, key=len))
+            idfs = [math.log(1 + n / len(m)) for m in matches]
+
+            scored = []
+            last = len(terms) - 1
+            for doc_id in candidates:
+                doc = self.docs[doc_id]
+                norm = 1.2 * (0.25 + 0.75 * doc.length / avg)
+                score = 0.0
+                for i, (term, postings, idf) in enumerate(zip(terms, per_term, idfs)):
+                    tf = sum(p.get(doc_id, 0) for p in postings)
+                    score += idf * (tf * 2.2 / (tf + norm))
+                    if term in doc.head or (i == last and
+                                            any(w.startswith(term) for w in doc.head)):
+                        score += HEAD_BOOST * idf
+                scored.append((score, doc_id))
+            best = heapq.nlargest(limit * 2, scored)
+            if len(terms) > 1:
+                # Phrase test only on the leaders: it scans the page text
+                best = heapq.nlargest(limit, (
+                    (score * 1.5 if phrase in self.docs[doc_id].text.lower() else score, doc_id)
+                    for score, doc_id in best))
+            best = best[:limit]
+            return [(doc_id, round(score, 3), self.docs[doc_id].title, self.docs[doc_id].url,
+                     snippet(self.docs[doc_id].text, terms))
+                    for score, doc_id in best]
+
+    def stats(self):
+        return {"pages": len(self.docs), "terms": len(self.postings),
+                "bytes": self.size, "budget": self.budget, "evicted": self.evicted}
+
+
+def snippet(text, terms, width=120):
+    """The text around the first occurrence of a query term."""
+    lowered = text.lower()
+    found = [i for i in (lowered.find(t) for t in terms) if i >= 0]
+    if not found:
+        return text[:width].strip()
+    start = max(0, min(found) - width // 3)
+    return " ".join(text[start:start + width].split())
+
+
+class PageSearch(QObject):
+    """Keeps a TextIndex of every pane's page text.
+
+    Panes are queued after loadFinished or a URL change and collected
+    'delay' ms later (a pane is re-read at most every 'min_interval'
+    seconds), at most 'per_tick' every TICK_MS and only while their page is
+    active, so frozen background tabs are never woken. page.toPlainText()
+    runs in the renderer; tokenizing and indexing run on a worker thread.
+    """
+
+    def __init__(self, main_window, budget_mb=32, delay=2000, min_interval=15, per_tick=2):
+        super().__init__(main_window)
+        self.main = main_window
+        self.enabled = budget_mb > 0
+        self.index = TextIndex(budget_mb * 2**20)
+        self.delay = delay / 1000
+        self.min_interval = min_interval
+        self.per_tick = per_tick
+        self.panes = {}         # doc id -> pane
+        self.due = {}           # pane -> monotonic time to collect it
+        self.last = {}          # pane -> monotonic time of the last collection
+        self.queue = queue.Queue()
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.tick)
+        if self.enabled:
+            self.thread = threading.Thread(target=self._run, name="textsearch", daemon=True)
+            self.thread.start()
+
+    def schedule(self, pane):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        due = max(now + self.delay, self.last.get(pane, 0) + self.min_interval)
+        self.due[pane] = due
+        self.panes[id(pane)] = pane
+        self.timer.start(min(max(0, int((min(self.due.values()) - now) * 1000)), 60000))
+
+    def tick(self):
+        now = time.monotonic()
+        ready = sorted((d, id(p), p) for p, d in self.due.items() if d <= now)
+        for _, _, pane in ready[:self.per_tick]:
+            del self.due[pane]
+            view = pane.webview
+            if view is None or view.page().lifecycleState() != view.page().LifecycleState.Active:
+                continue        # indexed again after its next load
+            self.last[pane] = now
+            url, title = pane.url(), view.title()
+            view.page().toPlainText(
+                lambda text, p=pane, u=url, t=title: self._collected(p, u, t, text))
+        if self.due:
+            self.timer.start(max(TICK_MS, int((min(self.due.values()) - now) * 1000) + 1))
+
+    def _collected(self, pane, url, title, text):
+        if self.panes.get(id(pane)) is pane:
+            self.queue.put((id(pane), url, title, text[:MAX_CHARS]))
+
+    def remove(self, pane):
+        self.due.pop(pane, None)
+        self.last.pop(pane, None)
+        if self.panes.pop(id(pane), None) is not None:
+            self.queue.put((id(pane), None, None, None))
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            batch = [item]
+            while item is not None:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+            for entry in batch:
+                if entry is None:
+                    return
+                doc_id, url, title, text = entry
+                if text is None:
+                    self.index.remove(doc_id)
+                else:
+                    self.index.add(doc_id, url, title, text)
+            self.index.rebuild_vocab()
+
+    def search(self, query, limit=20):
+        """Hits as dicts with the pane, its tab and pane index, and a snippet."""
+        hits = []
+        for doc_id, score, title, url, text in self.index.search(query, limit):
+            pane = self.panes.get(doc_id)
+            cont = self.main.registry.container(pane) if pane is not None else None
+            if cont is None:
+                continue
+            hits.append({"pane": pane, "tab": self.main.registry.index_of[cont],
+                         "index": cont.panes.index(pane), "score": score,
+                         "title": title, "url": url, "snippet": text})
+        return hits
+
+    def close(self):
+        if self.enabled:
+            self.queue.put(None)
+            self.thread.join(timeout=5)
+
+
+class SearchDialog(QDialog):
+    """Search box over all open pages; Enter jumps to the best hit."""
+
+    def __init__(self, main_window, search):
+        super().__init__(main_window)
+        self.main = main_window
+        self.search = search
+        self.setWindowTitle("Search Open Pages")
+        self.query = QLineEdit()
+        self.query.setPlaceholderText("Text, ticket or host name")
+        self.query.textChanged.connect(self.update_results)
+        self.query.returnPressed.connect(
+            lambda: self.list.count() and self.activate(self.list.item(0)))
+        self.list = QListWidget()
+        self.list.itemActivated.connect(self.activate)
+        self.status = QLabel()
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.query)
+        layout.addWidget(self.list)
+        layout.addWidget(self.status)
+        self.resize(main_window.size() * 0.6)
+
+    def open_search(self):
+        self.show()
+        self.query.selectAll()
+        self.query.setFocus()
+        self.update_results(self.query.text())
+
+    def update_results(self, text):
+        start = time.perf_counter()
+        hits = self.search.search(text)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.list.clear()
+        for hit in hits:
+            item = QListWidgetItem("%s  [tab %d, pane %d]\n%s\n%s" % (
+                hit["title"] or hit["url"], hit["tab"] + 1, hit["index"] + 1,
+                hit["url"], hit["snippet"]))
+            item.setData(Qt.UserRole, hit["pane"])
+            self.list.addItem(item)
+        stats = self.search.index.stats()
+        self.status.setText("%d hits in %.1f ms, %d pages indexed" % (
+            len(hits), elapsed, stats["pages"]))
+
+    def activate(self, item):
+        pane = item.data(Qt.UserRole)
+        self.hide()
+        self.main.set_current_pane(pane)
+        view = pane.ensure_webview()
+        view.setFocus()
+        view.findText(self.query.text())
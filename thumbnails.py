@@ -0,0 +1,249 @@
+"""Tab thumbnails: debounced captures, an LRU byte budget, hover previews and a grid."""
+import itertools
+import os
+import shutil
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import Qt, QObject, QTimer, QSize, QEvent, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap, QIcon
+from PyQt5.QtWidgets import QLabel, QDialog, QListWidget, QListWidgetItem, QVBoxLayout
+
+from paths import DATA_DIR
+
+SPILL_DIR = os.path.join(DATA_DIR, "cache", "thumbnails")    # one subdirectory per process
+THUMB_SIZE = QSize(320, 200)
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass            # exists, owned by someone else
+    return True
+
+
+def sweep_spill_dirs(root):
+    """Remove the spill directories left behind by processes that are gone."""
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return
+    for name in names:
+        if name.isdigit() and not pid_alive(int(name)):
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def downscale(image, size=THUMB_SIZE):
+    # Safe off the GUI thread: QImage, unlike QPixmap, is not tied to it
+    return image.scaled(size, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+
+class ThumbnailCache(QObject):
+    """One thumbnail per tab (its whole splitter), newest in memory.
+
+    schedule(pane) is called on loadFinished; captures are debounced and
+    only taken of the visible tab, so frozen or discarded pages are never
+    woken for a picture. Tabs that changed while hidden are captured the
+    next time they are shown. The full-size grab happens on the GUI thread
+    (it has to); scaling runs on a worker. Past 'max_bytes' the least
+    recently used thumbnails are written to a directory of this process
+    under 'spill_dir' and reloaded on use; it is removed by close().
+    """
+    updated = pyqtSignal(object)            # tab container
+    _scaled = pyqtSignal(object, object)    # tab container, QImage
+    _spilled = pyqtSignal(object)           # tab container
+
+    def __init__(self, main_window, max_bytes=16 * 2**20, spill_dir=SPILL_DIR, delay=500):
+        super().__init__(main_window)
+        self.main = main_window
+        self.max_bytes = max_bytes
+        self.spill_dir = None
+        self.images = OrderedDict()     # container -> QImage, least recent first
+        self.bytes = 0
+        self.spilling = {}              # container -> QImage being written
+        self.spilled = {}               # container -> PNG path
+        self.dirty = set()
+        self.pending = set()
+        self.names = itertools.count()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self._scaled.connect(self._store)
+        self._spilled.connect(lambda cont: self.spilling.pop(cont, None))
+
+        if spill_dir and self.enabled:
+            # Other instances may share 'spill_dir'; only dead ones are swept
+            sweep_spill_dirs(spill_dir)
+            self.spill_dir = os.path.join(spill_dir, str(os.getpid()))
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            os.makedirs(self.spill_dir, exist_ok=True)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.capture_pending)
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def schedule(self, pane):
+        cont = self.main.registry.container(pane)
+        if cont is not None and self.enabled:
+            self.pending.add(cont)
+            self.timer.start()
+
+    def tab_shown(self, cont):
+        """Capture a tab that changed while it was hidden."""
+        if cont in self.dirty:
+            self.dirty.discard(cont)
+            self.pending.add(cont)
+            self.timer.start()
+
+    def capture_pending(self):
+        current = self.main.tab_widget.currentWidget()
+        for cont in self.pending:
+            if cont not in self.main.registry.index_of:
+                continue                # closed meanwhile
+            if cont is current and cont.isVisible():
+                image = cont.grab().toImage()
+                self.executor.submit(lambda c=cont, i=image: self._scaled.emit(c, downscale(i)))
+            else:
+                self.dirty.add(cont)
+        self.pending.clear()
+
+    def _store(self, cont, image):
+        if cont not in self.main.registry.index_of:
+            return
+        self._forget(cont)
+        self.images[cont] = image
+        self.bytes += image.sizeInBytes()
+        self._evict()
+        self.updated.emit(cont)
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and len(self.images) > 1:
+            cont, image = self.images.popitem(last=False)
+            self.bytes -= image.sizeInBytes()
+            if not self.spill_dir:
+                continue
+            path = os.path.join(self.spill_dir, "%d.png" % next(self.names))
+            self.spilled[cont] = path
+            self.spilling[cont] = image
+            self.executor.submit(self._spill, cont, image, path)
+
+    def _spill(self, cont, image, path):
+        image.save(path, "PNG")
+        self._spilled.emit(cont)
+
+    def get(self, cont):
+        """QImage thumbnail of a tab, or None if it was never captured."""
+        if cont in self.images:
+            self.images.move_to_end(cont)
+            return self.images[cont]
+        image = self.spilling.get(cont)
+        if image is None and cont in self.spilled:
+            image = QImage(self.spilled[cont])
+            if image.isNull():
+                return None
+        if image is None:
+            return None
+        self._forget(cont)
+        self.images[cont] = image
+        self.bytes += image.sizeInBytes()
+        self._evict()
+        return image
+
+    def _forget(self, cont):
+        image = self.images.pop(cont, None)
+        if image is not None:
+            self.bytes -= image.sizeInBytes()
+        path = self.spilled.pop(cont, None)
+        if path and cont not in self.spilling:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+    def discard(self, cont):
+        """Drop the thumbnail of a closed tab."""
+        self._forget(cont)
+        self.dirty.discard(cont)
+        self.pending.discard(cont)
+
+    def stats(self):
+        return {"in_memory": len(self.images), "bytes": self.bytes,
+                "spilled": len(self.spilled)}
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        if self.spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+class TabPreview(QObject):
+    """Shows a tab's thumbnail while the mouse hovers over its tab."""
+
+    def __init__(self, main_window, cache):
+        super().__init__(main_window)
+        self.main = main_window
+        self.cache = cache
+        self.label = QLabel(None, Qt.ToolTip)
+        self.label.setStyleSheet("border: 1px solid #5c85d6; background: white;")
+        main_window.tab_widget.tabBar().installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.ToolTip:
+            index = obj.tabAt(event.pos())
+            cont = self.main.tab_widget.widget(index) if index >= 0 else None
+            image = self.cache.get(cont) if cont is not None else None
+            if image is not None and cont is not self.main.tab_widget.currentWidget():
+                self.label.setPixmap(QPixmap.fromImage(image))
+                self.label.adjustSize()
+                self.label.move(obj.mapToGlobal(obj.tabRect(index).bottomLeft()))
+                self.label.show()
+                return True
+            self.label.hide()
+        elif event.type() in (QEvent.Leave, QEvent.MouseButtonPress):
+            self.label.hide()
+        return super().eventFilter(obj, event)
+
+
+class TabOverview(QDialog):
+    """Grid of every tab's thumbnail; built from the cache only."""
+
+    def __init__(self, main_window, cache):
+        super().__init__(main_window)
+        self.main = main_window
+        self.cache = cache
+        self.setWindowTitle("Tab Overview")
+        self.list = QListWidget()
+        self.list.setViewMode(QListWidget.IconMode)
+        self.list.setIconSize(THUMB_SIZE)
+        self.list.setResizeMode(QListWidget.Adjust)
+        self.list.setMovement(QListWidget.Static)
+        self.list.setSpacing(8)
+        self.list.itemActivated.connect(self.activate)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.list)
+        self.resize(main_window.size() * 0.8)
+
+    def open_overview(self):
+        self.list.clear()
+        blank = QPixmap(THUMB_SIZE)
+        blank.fill(Qt.lightGray)
+        for i in range(self.main.tab_widget.count()):
+            cont = self.main.tab_widget.widget(i)
+            image = self.cache.get(cont)
+            pixmap = QPixmap.fromImage(image) if image is not None else blank
+            item = QListWidgetItem(QIcon(pixmap), self.main.tab_widget.tabText(i))
+            item.setData(Qt.UserRole, i)
+            self.list.addItem(item)
+        self.list.setCurrentRow(self.main.tab_widget.currentIndex())
+        self.show()
+        self.list.setFocus()
+
+    def activate(self, item):
+        self.main.tab_widget.setCurrentIndex(item.data(Qt.UserRole))
+        self.hide()